@@ -2,6 +2,9 @@ const express = require('express');
 const path = require('path');
 const cors = require('cors');
 const connectDB = require('./config/db');
+const { setHlsHeaders, precompressed } = require('./middleware/hlsStatic');
+const watchHistoryBuffer = require('./utils/watchHistoryBuffer');
+const actionLogBuffer = require('./utils/actionLogBuffer');
 require('dotenv').config();
 
 const app = express();
@@ -19,15 +22,9 @@ app.use(express.json());
 
 // Static Files
 app.use('/uploads', express.static('uploads'));
+app.use('/api/hls', precompressed(path.join(__dirname, 'hls')));
 app.use('/api/hls', express.static(path.join(__dirname, 'hls'), {
-    setHeaders: (res, path) => {
-        if (path.endsWith('.vtt')) {
-            res.setHeader('Content-Type', 'text/vtt; charset=utf-8');
-        }
-        res.removeHeader('Access-Control-Allow-Origin');
-        res.removeHeader('Access-Control-Allow-Credentials');
-        res.setHeader('Access-Control-Allow-Origin', '*');
-    }
+    setHeaders: setHlsHeaders
 }));
 
 // Routes
@@ -41,7 +38,20 @@ app.use('/api/favorites', require('./routes/favorites'));
 app.use('/api/stream', require('./routes/streaming'));
 app.use('/api/download', require('./routes/download'));
 
-const PORT = 3001;
+const PORT = parseInt(process.env.PORT) || 3001;
 app.listen(PORT, () => {
   console.log(`Server is running on port ${PORT}`);
 });
+
+// 종료 시 메모리에 쌓인 재생 위치/로그를 저장하고 종료
+const shutdown = async (signal) => {
+  console.log(`${signal} received, flushing buffers...`);
+  try {
+    await Promise.all([watchHistoryBuffer.flush(), actionLogBuffer.flush()]);
+  } catch (err) {
+    console.error('Flush on shutdown failed:', err);
+  }
+  process.exit(0);
+};
+process.on('SIGINT', () => shutdown('SIGINT'));
+process.on('SIGTERM', () => shutdown('SIGTERM'));
@@ -1,8 +1,11 @@
 const mongoose = require('mongoose');
 
+// MONGO_URI 로 다른 DB(예: 부하 테스트용 임시 mongod)에 연결할 수 있음
+const MONGO_URI = process.env.MONGO_URI || 'mongodb://localhost:27017/movies';
+
 const connectDB = async () => {
   try {
-    await mongoose.connect('mongodb://localhost:27017/movies', { useNewUrlParser: true, useUnifiedTopology: true });
+    await mongoose.connect(MONGO_URI, { useNewUrlParser: true, useUnifiedTopology: true });
     console.log('MongoDB Connected');
   } catch (err) {
     console.error('MongoDB connection error:', err);
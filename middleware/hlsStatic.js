@@ -0,0 +1,132 @@
+const fs = require('fs');
+const path = require('path');
+
+// /api/hls 정적 파일 캐시 정책
+// - 세그먼트(.ts/.m4s), 단일 파일 미디어(video.ts 등), 스프라이트 이미지
+//   ?v= 버전이 붙은 URL: 1년 immutable. 완료된 playlist 는 인코딩(변환)마다 다른 ?v= 를 붙이므로
+//   (utils/ffmpeg.js finalizePlaylist, simple_scripts/hls_single_file.py) 폴더를 다시 만들어도 URL 이 바뀐다.
+//   버전 없는 URL(트랜스코딩 중인 EVENT playlist, 이전에 만든 폴더): 짧게 캐시한 뒤 ETag 로 재검증
+// - 완료된 미디어 playlist(#EXT-X-ENDLIST): 일정 시간 캐시
+// - 트랜스코딩 중(EVENT)인 playlist, master playlist, 자막(.vtt): 매번 재검증 (스크립트가 다시 쓰는 파일)
+const VERSIONED_MEDIA = 'public, max-age=31536000, immutable';
+const MEDIA = 'public, max-age=60, must-revalidate';
+const FINISHED_PLAYLIST = 'public, max-age=600';
+const REVALIDATE = 'no-cache';
+const MEDIA_EXTS = ['.ts', '.m4s', '.jpg', '.jpeg', '.png', '.webp'];
+
+const CONTENT_TYPES = {
+    '.m3u8': 'application/vnd.apple.mpegurl',
+    '.vtt': 'text/vtt; charset=utf-8'
+};
+
+// playlist 완료 여부는 (경로, mtime) 기준으로 캐시하여 요청마다 파일을 다시 읽지 않음
+const playlistState = new Map();
+
+function isFinishedMediaPlaylist(filePath, stat) {
+    const mtimeMs = stat ? stat.mtimeMs : fs.statSync(filePath).mtimeMs;
+    const cached = playlistState.get(filePath);
+    if (cached && cached.mtimeMs === mtimeMs) {
+        return cached.finished;
+    }
+    const content = fs.readFileSync(filePath, 'utf8');
+    const finished = content.includes('#EXT-X-ENDLIST') && !content.includes('#EXT-X-STREAM-INF');
+    playlistState.set(filePath, { mtimeMs, finished });
+    return finished;
+}
+
+function setHlsHeaders(res, filePath, stat) {
+    const ext = path.extname(filePath).toLowerCase();
+    if (ext === '.vtt') {
+        res.setHeader('Content-Type', CONTENT_TYPES['.vtt']);
+    }
+    if (CONTENT_TYPES[ext]) {
+        // 같은 URL 을 압축본/원본으로 나눠 보내므로 공유 캐시가 구분하도록 항상 표시
+        res.setHeader('Vary', 'Accept-Encoding');
+    }
+
+    if (MEDIA_EXTS.includes(ext)) {
+        const versioned = Boolean(res.req && res.req.query && res.req.query.v);
+        res.setHeader('Cache-Control', versioned ? VERSIONED_MEDIA : MEDIA);
+    } else if (ext === '.m3u8') {
+        let finished = false;
+        try {
+            finished = isFinishedMediaPlaylist(filePath, stat);
+        } catch {
+            finished = false;
+        }
+        res.setHeader('Cache-Control', finished ? FINISHED_PLAYLIST : REVALIDATE);
+    } else {
+        res.setHeader('Cache-Control', REVALIDATE);
+    }
+
+    res.removeHeader('Access-Control-Allow-Origin');
+    res.removeHeader('Access-Control-Allow-Credentials');
+    res.setHeader('Access-Control-Allow-Origin', '*');
+}
+
+// simple_scripts/precompress_hls.py 가 만든 .br/.gz 파일이 원본보다 최신이면 그대로 전송 (요청마다 압축하지 않음)
+const ENCODINGS = [
+    { name: 'br', ext: '.br' },
+    { name: 'gzip', ext: '.gz' }
+];
+
+// Accept-Encoding 에서 q=0 이 아닌 인코딩 이름 집합 (예: "br;q=0, gzip" -> {gzip})
+function acceptedEncodings(header) {
+    const accepted = new Set();
+    for (const part of (header || '').split(',')) {
+        const [name, ...params] = part.trim().toLowerCase().split(';');
+        const q = params.map(p => p.trim()).find(p => p.startsWith('q='));
+        if (name && !(q && parseFloat(q.slice(2)) === 0)) {
+            accepted.add(name);
+        }
+    }
+    return accepted;
+}
+
+function precompressed(root) {
+    const rootDir = path.resolve(root);
+
+    return (req, res, next) => {
+        if (req.method !== 'GET' && req.method !== 'HEAD') return next();
+
+        const ext = path.extname(req.path).toLowerCase();
+        if (!CONTENT_TYPES[ext]) return next();
+
+        const acceptEncoding = acceptedEncodings(req.headers['accept-encoding']);
+        const accepted = ENCODINGS.filter(e => acceptEncoding.has(e.name));
+        if (accepted.length === 0) return next();
+
+        let filePath;
+        try {
+            filePath = path.join(rootDir, decodeURIComponent(req.path));
+        } catch {
+            return next();
+        }
+        if (!filePath.startsWith(rootDir + path.sep)) return next();
+
+        fs.stat(filePath, (err, stat) => {
+            if (err) return next();
+
+            const tryEncoding = (i) => {
+                if (i >= accepted.length) return next();
+                const encoding = accepted[i];
+                fs.stat(filePath + encoding.ext, (cErr, cStat) => {
+                    if (cErr || cStat.mtimeMs < stat.mtimeMs) return tryEncoding(i + 1);
+
+                    setHlsHeaders(res, filePath, stat);
+                    res.sendFile(filePath + encoding.ext, {
+                        headers: {
+                            'Content-Encoding': encoding.name,
+                            'Content-Type': CONTENT_TYPES[ext]
+                        }
+                    }, (sendErr) => {
+                        if (sendErr && !res.headersSent) next(sendErr);
+                    });
+                });
+            };
+            tryEncoding(0);
+        });
+    };
+}
+
+module.exports = { setHlsHeaders, precompressed };
@@ -0,0 +1,44 @@
+// migrate_movie_availability.js
+// 기존 영화 문서에 mainMovie 기반 파생 필드(availableQualities, hasWebCopy)를 채우고 인덱스를 생성
+// (이후 저장/수정은 models/Movie.js 의 hook 이 자동으로 갱신)
+
+const mongoose = require('mongoose');
+const Movie = require('./models/Movie');
+
+const BATCH_SIZE = 500;
+
+async function migrateMovieAvailability() {
+  await mongoose.connect('mongodb://localhost:27017/movies', { useNewUrlParser: true, useUnifiedTopology: true });
+  try {
+    let ops = [];
+    let updated = 0;
+    const cursor = Movie.collection.find({}, { projection: { mainMovie: 1 } });
+    for await (const doc of cursor) {
+      ops.push({
+        updateOne: {
+          filter: { _id: doc._id },
+          update: { $set: Movie.computeAvailability(doc.mainMovie) }
+        }
+      });
+      if (ops.length >= BATCH_SIZE) {
+        await Movie.collection.bulkWrite(ops, { ordered: false });
+        updated += ops.length;
+        ops = [];
+      }
+    }
+    if (ops.length > 0) {
+      await Movie.collection.bulkWrite(ops, { ordered: false });
+      updated += ops.length;
+    }
+    console.log(`영화 ${updated}개의 availableQualities/hasWebCopy 갱신 완료.`);
+
+    await Movie.createIndexes();
+    console.log('인덱스 생성 완료.');
+  } catch (err) {
+    console.error('마이그레이션 오류:', err);
+  } finally {
+    await mongoose.disconnect();
+  }
+}
+
+migrateMovieAvailability();
@@ -0,0 +1,51 @@
+// migrate_movie_list_indexes.js
+// 목록 인덱스를 models/Movie.js 정의와 맞추고(_id 보조 키 추가, 예전 인덱스 삭제),
+// 자주 쓰는 목록 쿼리의 explain() 결과로 정렬이 인덱스로 처리되는지(SORT 단계 없음) 확인
+
+const mongoose = require('mongoose');
+const Movie = require('./models/Movie');
+
+const PAGE_SIZE = 40;
+const DEFAULT_SORT = { releaseDate: -1, _id: -1 };
+
+// routes/movies.js GET / 가 만드는 필터 중 대표 조합
+const QUERIES = [
+  { name: '기본 목록', filter: { category: { $ne: 'AdultVideo' } } },
+  { name: '기본 목록 (오름차순)', filter: { category: { $ne: 'AdultVideo' } }, sort: { releaseDate: 1, _id: 1 } },
+  { name: '카테고리', filter: { category: 'AdultVideo' } },
+  { name: '웹 보유', filter: { category: { $ne: 'AdultVideo' }, hasWebCopy: true } },
+  { name: '카테고리 + 웹 보유', filter: { category: 'AdultVideo', hasWebCopy: true } },
+  { name: '카테고리 + 미보유', filter: { category: 'AdultVideo', plexRegistered: false, hasWebCopy: false } },
+  { name: '카테고리 + 1080p', filter: { category: 'AdultVideo', availableQualities: '1080p' } },
+];
+
+function stages(plan, out = []) {
+  if (!plan) return out;
+  out.push(plan.indexName ? `${plan.stage}(${plan.indexName})` : plan.stage);
+  stages(plan.inputStage, out);
+  (plan.inputStages || []).forEach(p => stages(p, out));
+  return out;
+}
+
+async function migrateMovieListIndexes() {
+  await mongoose.connect('mongodb://localhost:27017/movies', { useNewUrlParser: true, useUnifiedTopology: true });
+  try {
+    const dropped = await Movie.syncIndexes();
+    console.log(`인덱스 동기화 완료. 삭제된 예전 인덱스: ${dropped.length ? dropped.join(', ') : '없음'}`);
+
+    for (const q of QUERIES) {
+      const explain = await Movie.find(q.filter).sort(q.sort || DEFAULT_SORT).limit(PAGE_SIZE).explain('executionStats');
+      const winning = stages(explain.queryPlanner.winningPlan.queryPlan || explain.queryPlanner.winningPlan);
+      const blocking = winning.includes('SORT'); // SORT_MERGE 는 인덱스 순서를 합치는 것이라 괜찮음
+      const stats = explain.executionStats;
+      console.log(`${blocking ? '[정렬 필요]' : '[OK]'} ${q.name}: ${winning.join(' <- ')} ` +
+        `(keys ${stats.totalKeysExamined}, docs ${stats.totalDocsExamined}, ${stats.executionTimeMillis}ms)`);
+    }
+  } catch (err) {
+    console.error('마이그레이션 오류:', err);
+  } finally {
+    await mongoose.disconnect();
+  }
+}
+
+migrateMovieListIndexes();
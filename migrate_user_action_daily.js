@@ -0,0 +1,43 @@
+// migrate_user_action_daily.js
+// 기존 UserActionLog 를 한 번 집계하여 일별 롤업(UserActionDaily)을 채움
+// (이후에는 utils/actionLogBuffer.js 가 로그 저장 시 함께 갱신)
+
+const mongoose = require('mongoose');
+const UserActionLog = require('./models/UserActionLog');
+const UserActionDaily = require('./models/UserActionDaily');
+
+async function migrateUserActionDaily() {
+  await mongoose.connect('mongodb://localhost:27017/movies', { useNewUrlParser: true, useUnifiedTopology: true });
+  try {
+    const timezone = Intl.DateTimeFormat().resolvedOptions().timeZone;
+    await UserActionDaily.createIndexes();
+    await UserActionLog.aggregate([
+      {
+        $group: {
+          _id: {
+            day: { $dateToString: { format: '%Y-%m-%d', date: '$timestamp', timezone } },
+            action: '$action'
+          },
+          count: { $sum: 1 }
+        }
+      },
+      { $project: { _id: 0, day: '$_id.day', action: '$_id.action', count: 1 } },
+      {
+        $merge: {
+          into: UserActionDaily.collection.name,
+          on: ['day', 'action'],
+          whenMatched: 'replace',
+          whenNotMatched: 'insert'
+        }
+      }
+    ]);
+    const total = await UserActionDaily.countDocuments();
+    console.log(`일별 집계 ${total}건 생성 완료. (timezone: ${timezone})`);
+  } catch (err) {
+    console.error('마이그레이션 오류:', err);
+  } finally {
+    await mongoose.disconnect();
+  }
+}
+
+migrateUserActionDaily();
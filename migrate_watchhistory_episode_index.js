@@ -0,0 +1,42 @@
+// migrate_watchhistory_episode_index.js
+// episodeIndex 필드가 없는 옛 WatchHistory 문서를 episodeIndex: -1(본편)로 일괄 변환
+// (POST /api/watch-history 에서 요청마다 하던 변환을 한 번만 수행)
+// 같은 (userId, movieId)에 이미 -1 문서가 있으면 더 최근 기록만 남긴다.
+
+const mongoose = require('mongoose');
+const WatchHistory = require('./models/WatchHistory');
+
+async function migrateWatchHistoryEpisodeIndex() {
+  await mongoose.connect('mongodb://localhost:27017/movies', { useNewUrlParser: true, useUnifiedTopology: true });
+  try {
+    const legacy = await WatchHistory.find({ episodeIndex: { $exists: false } }).lean();
+    console.log(`episodeIndex가 없는 기록 ${legacy.length}개 발견.`);
+
+    let converted = 0;
+    let merged = 0;
+    for (const doc of legacy) {
+      const current = await WatchHistory.findOne({ userId: doc.userId, movieId: doc.movieId, episodeIndex: -1 }).lean();
+      if (!current) {
+        await WatchHistory.collection.updateOne({ _id: doc._id }, { $set: { episodeIndex: -1 } });
+        converted++;
+        continue;
+      }
+      // 중복: 최신 기록을 -1 문서에 반영하고 옛 문서 삭제
+      if ((doc.updatedAt || 0) > (current.updatedAt || 0)) {
+        await WatchHistory.collection.updateOne(
+          { _id: current._id },
+          { $set: { lastWatchedTime: doc.lastWatchedTime, updatedAt: doc.updatedAt } }
+        );
+      }
+      await WatchHistory.collection.deleteOne({ _id: doc._id });
+      merged++;
+    }
+    console.log(`변환 ${converted}개, 중복 병합 ${merged}개 완료.`);
+  } catch (err) {
+    console.error('마이그레이션 오류:', err);
+  } finally {
+    await mongoose.disconnect();
+  }
+}
+
+migrateWatchHistoryEpisodeIndex();
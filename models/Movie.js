@@ -3,6 +3,8 @@ const mongoose = require('mongoose');
 // 영화 스키마 정의
 const movieSchema = new mongoose.Schema({
   serialNumber: { type: String, required: true, unique: true },
+  serialKey: { type: String, default: '' }, // 검색용 정규화 품번 (대문자, '-'/공백 제거, serialNumber에서 자동 계산)
+  serialGrams: { type: [String], default: [] }, // 부분 검색용 3-gram 토큰 (serialKey에서 자동 계산)
   title: { type: String, required: true },      // 영화 제목 (필수)
   actor: { 
     type: String, 
@@ -13,6 +15,8 @@ const movieSchema = new mongoose.Schema({
   trailer: { type: String, required: false, default: '' },    // 예고편 영상 파일 경로 (옵션)
   mainMovie: {type: Map, of: String, required: false, default:{}}, // 영화 메인 본펀 경로 (옵션)
   mainMovieSub:{type:String, default:''}, // 영화 메인 본편 자막 경로(있을경우에만 사용.)
+  availableQualities: { type: [String], default: [] }, // 경로가 있는 mainMovie 화질 목록 (소문자, mainMovie에서 자동 계산)
+  hasWebCopy: { type: Boolean, default: false }, // 웹 재생 가능한 본편 존재 여부 (mainMovie에서 자동 계산)
   isSeries: { type: Boolean, default: false }, // 시리즈 여부
   episodes: [{
       title: { type: String, required: true },
@@ -27,6 +31,82 @@ const movieSchema = new mongoose.Schema({
   category: {type:String,default:"Unknown"} //카테고리
 });
 
+// mainMovie 맵에서 검색용 파생 필드 계산
+// GET /api/movies 의 owned 필터가 $objectToArray 대신 인덱스를 탈 수 있도록 저장 시점에 미리 계산해 둔다.
+function computeAvailability(mainMovie) {
+  let entries = [];
+  if (mainMovie instanceof Map) {
+    entries = Array.from(mainMovie.entries());
+  } else if (mainMovie && typeof mainMovie === 'object') {
+    entries = Object.entries(mainMovie);
+  }
+  const qualities = [...new Set(entries.filter(([, v]) => v).map(([k]) => k.toLowerCase()))];
+  return { availableQualities: qualities, hasWebCopy: qualities.length > 0 };
+}
+
+// 품번 검색용 파생 필드
+// 접두 검색은 serialKey 범위 조회, 부분 검색은 serialGrams($all) 로 후보를 좁힌 뒤 serialKey 로 확인한다.
+const SERIAL_GRAM = 3;
+
+function normalizeSerial(serialNumber) {
+  return String(serialNumber || '').toUpperCase().replace(/[-\s]/g, '');
+}
+
+function serialGrams(key) {
+  const grams = new Set();
+  for (let i = 0; i + SERIAL_GRAM <= key.length; i++) {
+    grams.add(key.substr(i, SERIAL_GRAM));
+  }
+  return [...grams];
+}
+
+function computeSerialSearch(serialNumber) {
+  const serialKey = normalizeSerial(serialNumber);
+  return { serialKey, serialGrams: serialGrams(serialKey) };
+}
+
+movieSchema.pre('save', function(next) {
+  if (this.isNew || this.isModified('mainMovie')) {
+    Object.assign(this, computeAvailability(this.mainMovie));
+  }
+  if (this.isNew || this.isModified('serialNumber')) {
+    Object.assign(this, computeSerialSearch(this.serialNumber));
+  }
+  next();
+});
+
+movieSchema.pre(['findOneAndUpdate', 'updateOne', 'updateMany'], function(next) {
+  const update = this.getUpdate() || {};
+  const updatedValue = (field) => (update.$set && update.$set[field] !== undefined ? update.$set[field] : update[field]);
+
+  const mainMovie = updatedValue('mainMovie');
+  if (mainMovie !== undefined) {
+    this.set(computeAvailability(mainMovie));
+  }
+  const serialNumber = updatedValue('serialNumber');
+  if (serialNumber !== undefined) {
+    this.set(computeSerialSearch(serialNumber));
+  }
+  next();
+});
+
+// 목록 정렬은 (releaseDate, _id). 모든 목록 인덱스 끝에 _id 를 두어 정렬을 인덱스 순서로 처리 (커서 페이지네이션)
+movieSchema.index({ category: 1, hasWebCopy: 1, releaseDate: -1, _id: -1 });
+movieSchema.index({ category: 1, plexRegistered: 1, hasWebCopy: 1, releaseDate: -1, _id: -1 });
+movieSchema.index({ category: 1, availableQualities: 1, releaseDate: -1, _id: -1 });
+movieSchema.index({ category: 1, releaseDate: -1, _id: -1 });
+// 기본 목록(category 미지정)은 category: { $ne: 'AdultVideo' } 라 category 로 시작하는 인덱스로는 정렬할 수 없음
+// → 정렬 순서 인덱스를 따라가며 category 를 거르는 이 인덱스 사용 (migrate_movie_list_indexes.js 로 explain 확인)
+movieSchema.index({ releaseDate: -1, _id: -1 });
+movieSchema.index({ serialKey: 1 });
+movieSchema.index({ serialGrams: 1 });
+
+movieSchema.statics.computeAvailability = computeAvailability;
+movieSchema.statics.computeSerialSearch = computeSerialSearch;
+movieSchema.statics.normalizeSerial = normalizeSerial;
+movieSchema.statics.serialGrams = serialGrams;
+movieSchema.statics.SERIAL_GRAM = SERIAL_GRAM;
+
 // 영화 모델 생성
 const Movie = mongoose.model('Movie', movieSchema);
 
@@ -0,0 +1,12 @@
+const mongoose = require('mongoose');
+
+// 일별 액션 집계 (view, play 등). 원본 로그를 훑지 않고 통계를 보여주기 위한 롤업 컬렉션
+const UserActionDailySchema = new mongoose.Schema({
+    day: { type: String, required: true }, // YYYY-MM-DD (서버 로컬 시간 기준)
+    action: { type: String, required: true },
+    count: { type: Number, default: 0 }
+});
+
+UserActionDailySchema.index({ day: 1, action: 1 }, { unique: true });
+
+module.exports = mongoose.model('UserActionDaily', UserActionDailySchema);
@@ -1,11 +1,23 @@
 const mongoose = require('mongoose');
 
+// 보관 기간이 지난 로그는 TTL 인덱스로 자동 삭제
+// (기간을 바꾸면 기존 인덱스는 collMod 로 expireAfterSeconds 를 수정해야 함)
+const RETENTION_DAYS = parseInt(process.env.USER_ACTION_LOG_RETENTION_DAYS) || 180;
+
 const UserActionLogSchema = new mongoose.Schema({
-    userId: { type: mongoose.Schema.Types.ObjectId, ref: 'User', required: true },
+    // 로그인 실패(login_failed)는 사용자를 특정할 수 없을 수 있으므로 userId 없이 저장
+    userId: {
+        type: mongoose.Schema.Types.ObjectId,
+        ref: 'User',
+        required: function () { return this.action !== 'login_failed'; }
+    },
     action: { type: String, required: true }, // 예: play, pause, stop, seek 등
     targetId: { type: mongoose.Schema.Types.ObjectId }, // 영화 등
     details: { type: String }, // 추가 정보
     timestamp: { type: Date, default: Date.now }
 });
 
+// 관리자 로그 조회(timestamp 내림차순) + TTL 겸용
+UserActionLogSchema.index({ timestamp: -1 }, { expireAfterSeconds: RETENTION_DAYS * 24 * 60 * 60 });
+
 module.exports = mongoose.model('UserActionLog', UserActionLogSchema);
@@ -1,16 +1,20 @@
 const express = require('express');
 const router = express.Router();
 const Actor = require('../models/Actor');
+const actorCache = require('../utils/actorCache');
 const { authMiddleware, requireAdmin } = require('../middleware/auth');
 
-// 모든 배우 가져오기
+// 모든 배우 가져오기 (?withCounts=true 이면 배우별 영화 수 포함)
 router.get('/', async (req, res) => {
     try {
-        const actors = await Actor.find();
-        const isKorean = (name) => /[\u3131-\u318E\uAC00-\uD7A3]/.test(name);
-        const koreanActors = actors.filter(a => isKorean(a.name)).sort((a, b) => a.name.localeCompare(b.name, 'ko-KR'));
-        const englishActors = actors.filter(a => !isKorean(a.name)).sort((a, b) => a.name.localeCompare(b.name, 'en'));
-        res.json([...koreanActors, ...englishActors]);
+        const { body, etag } = req.query.withCounts === 'true'
+            ? await actorCache.getListWithCounts()
+            : await actorCache.getList();
+        res.set('ETag', etag);
+        if (req.headers['if-none-match'] === etag) {
+            return res.status(304).end();
+        }
+        res.type('application/json').send(body);
     } catch (err) {
         res.status(500).json({ error: 'Failed to fetch actors' });
         console.log(err)
@@ -23,6 +27,7 @@ router.post('/', authMiddleware, requireAdmin, async (req, res) => {
     const actor = new Actor({ name });
     try {
         await actor.save();
+        actorCache.invalidate();
         res.status(201).json(actor);
     } catch (err) {
         res.status(500).json({ error: 'Failed to add actor' });
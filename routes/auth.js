@@ -1,7 +1,7 @@
 const express = require('express');
 const jwt = require('jsonwebtoken');
 const User = require('../models/User');
-const UserActionLog = require('../models/UserActionLog');
+const actionLogBuffer = require('../utils/actionLogBuffer');
 require('dotenv').config();
 
 const JWT_SECRET = process.env.JWT_SECRET;
@@ -23,7 +23,7 @@ router.post('/login', async (req, res) => {
             return res.status(401).json({ error: 'Invalid username or password' });
         }
         
-        await UserActionLog.create({
+        actionLogBuffer.log({
             userId: user._id,
             action: 'login',
             details: 'login successful',
@@ -34,9 +34,8 @@ router.post('/login', async (req, res) => {
         res.json({ accessToken, refreshToken });
     } catch (err) {
         res.status(500).json({ error: 'Login failed' });
-        await UserActionLog.create({
-            userId: null,
-            action: 'login',
+        actionLogBuffer.log({
+            action: 'login_failed',
             details: `login failed: ${username}`
         });
     }
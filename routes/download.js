@@ -5,6 +5,14 @@ const fs = require('fs');
 const ffmpeg = require('fluent-ffmpeg');
 const { authMiddleware } = require('../middleware/auth');
 
+const HLS_ROOT = path.join(__dirname, '..', 'hls');
+
+// playlist 안의 "hls/..." 경로를 렌디션 폴더 기준 상대 경로로 변환
+function relativeToRendition(hlsPath, hlsRelative) {
+    const target = path.join(HLS_ROOT, ...hlsRelative.split('/'));
+    return path.relative(hlsPath, target).split(path.sep).join('/');
+}
+
 router.get('/', authMiddleware, (req, res) => {
     const videoPath = req.query.file;
     const resolution = req.query.resolution || '1080p'; // 기본값
@@ -37,15 +45,14 @@ router.get('/', authMiddleware, (req, res) => {
 
     // ffmpeg가 로컬 파일을 읽을 때 m3u8 내부의 경로가 'hls/...' 로 되어있으면
     // m3u8 파일 위치 기준 상대 경로로 인식하여 파일을 찾지 못하는 문제가 발생함.
-    // 따라서 다운로드용 임시 m3u8 파일을 생성하여 경로를 파일명만 남기도록 수정함.
+    // 따라서 다운로드용 임시 m3u8 파일을 생성하여 경로를 렌디션 폴더 기준 상대 경로로 수정함.
+    // (공유 오디오 트랙 "hls/<이름>_audio/a0/audio.m3u8" 처럼 다른 폴더를 가리키는 URI 도 포함)
     const tempM3u8Path = path.join(hlsPath, 'download.m3u8');
     try {
         let m3u8Content = fs.readFileSync(m3u8Path, 'utf8');
-        // "hls/폴더명/" 패턴을 제거하여 파일명만 남김
-        const prefixToRemove = `hls/${folderName}/`;
-        // 정규식으로 모든 발생 패턴 제거
-        const regex = new RegExp(prefixToRemove.replace(/[.*+?^${}()|[\]\\]/g, '\\$&'), 'g');
-        m3u8Content = m3u8Content.replace(regex, '');
+        m3u8Content = m3u8Content
+            .replace(/URI="hls\/([^"]+)"/g, (match, rest) => `URI="${relativeToRendition(hlsPath, rest)}"`)
+            .replace(/^hls\/(.+)$/gm, (match, rest) => relativeToRendition(hlsPath, rest.trim()));
         
         // EVENT 타입을 VOD로 변경 (다운로드 최적화: ffmpeg가 스트림 끝을 명확히 인지하도록 함)
         m3u8Content = m3u8Content.replace('#EXT-X-PLAYLIST-TYPE:EVENT', '#EXT-X-PLAYLIST-TYPE:VOD');
@@ -73,6 +80,8 @@ router.get('/', authMiddleware, (req, res) => {
             '-probesize', '20000000'        // 20MB (분석 데이터 크기 제한)
         ])
         .outputOptions([
+            '-map', '0:v:0',           // 비디오 한 개
+            '-map', '0:a?',            // 오디오는 공유 오디오 그룹의 모든 언어 트랙 포함 (없으면 생략)
             '-c', 'copy',              // 비디오/오디오 코덱 복사 (매우 빠름)
             '-bsf:a', 'aac_adtstoasc', // TS -> MP4 변환 시 오디오 필터 필수
             '-movflags', 'frag_keyframe+empty_moov' // 스트리밍 전송을 위한 Fragmented MP4 설정
@@ -1,23 +1,28 @@
 const express = require('express');
 const router = express.Router();
+const mongoose = require('mongoose');
 const UserActionLog = require('../models/UserActionLog');
+const UserActionDaily = require('../models/UserActionDaily');
+const actionLogBuffer = require('../utils/actionLogBuffer');
 const { authMiddleware, requireAdmin } = require('../middleware/auth');
 
 // 로그 저장 API (/api/user-action-log)
-router.post('/user-action-log', authMiddleware, async (req, res) => {
+router.post('/user-action-log', authMiddleware, (req, res) => {
     const { action, targetId, details } = req.body;
-    try {
-        const log = new UserActionLog({
-            userId: req.userId,
-            action,
-            targetId,
-            details
-        });
-        await log.save();
-        res.json({ success: true });
-    } catch (err) {
-        res.status(500).json({ error: '로그 저장 실패', details: err.message });
+    if (!action) {
+        return res.status(400).json({ error: 'action이 필요합니다.' });
+    }
+    if (targetId && !mongoose.Types.ObjectId.isValid(targetId)) {
+        return res.status(400).json({ error: 'targetId가 올바르지 않습니다.' });
     }
+    // 저장은 actionLogBuffer 가 모아서 insertMany
+    actionLogBuffer.log({
+        userId: req.userId,
+        action,
+        targetId,
+        details
+    });
+    res.json({ success: true });
 });
 
 // 로그인/조회/재생 로그 전체 조회 (관리자만) (/api/admin/user-action-logs)
@@ -33,4 +38,28 @@ router.get('/admin/user-action-logs', authMiddleware, requireAdmin, async (req,
     }
 });
 
+// 일별 조회/재생 횟수 (관리자만) (/api/admin/user-action-stats?days=30)
+// 원본 로그 대신 UserActionDaily 롤업을 읽음
+router.get('/admin/user-action-stats', authMiddleware, requireAdmin, async (req, res) => {
+    const days = Math.min(parseInt(req.query.days) || 30, 365);
+    const since = new Date();
+    since.setDate(since.getDate() - days + 1);
+    const pad = (n) => String(n).padStart(2, '0');
+    const sinceDay = `${since.getFullYear()}-${pad(since.getMonth() + 1)}-${pad(since.getDate())}`;
+
+    try {
+        const rows = await UserActionDaily.find({ day: { $gte: sinceDay }, action: { $in: ['view', 'play'] } })
+            .sort({ day: 1 })
+            .lean();
+        const byDay = new Map();
+        for (const row of rows) {
+            if (!byDay.has(row.day)) byDay.set(row.day, { day: row.day, view: 0, play: 0 });
+            byDay.get(row.day)[row.action] = row.count;
+        }
+        res.json(Array.from(byDay.values()));
+    } catch (err) {
+        res.status(500).json({ error: '통계 조회 실패', details: err.message });
+    }
+});
+
 module.exports = router;
\ No newline at end of file
@@ -1,11 +1,15 @@
 const express = require('express');
 const router = express.Router();
+const mongoose = require('mongoose');
 const Movie = require('../models/Movie');
-const UserActionLog = require('../models/UserActionLog');
 const { authMiddleware, requireAdmin } = require('../middleware/auth');
 const upload = require('../middleware/upload');
 const { downloadContents, transformSubtituteTrailerUrl, resolveAvailableTrailerUrlFromPlaylist } = require('../utils/downloader');
 const { handleHLSDownload } = require('../utils/ffmpeg');
+const countCache = require('../utils/countCache');
+const actorCache = require('../utils/actorCache');
+const actionLogBuffer = require('../utils/actionLogBuffer');
+const mediaIndex = require('../utils/mediaIndex');
 const fs = require('fs');
 const path = require('path');
 
@@ -39,7 +43,7 @@ router.post('/', authMiddleware, requireAdmin, cpUpload, async (req, res) => {
                             if (ep.video && ep.video[q]) {
                                 const ext = path.extname(ep.video[q]);
                                 const vttPath = ep.video[q].replace(ext, '.vtt');
-                                if (fs.existsSync(path.join(__dirname, '..', vttPath))) {
+                                if (mediaIndex.exists(vttPath)) {
                                     ep.sub = vttPath;
                                     break;
                                 }
@@ -128,7 +132,7 @@ router.post('/', authMiddleware, requireAdmin, cpUpload, async (req, res) => {
         for (const q of checkOrder) {
             if (mainMovieObj[q]) {
                 const vttPath = mainMovieObj[q].replace('.mp4', '.vtt');
-                if (fs.existsSync(path.join(__dirname, '..', vttPath))) {
+                if (mediaIndex.exists(vttPath)) {
                     mainMovieSubPath = vttPath;
                     break;
                 }
@@ -153,6 +157,8 @@ router.post('/', authMiddleware, requireAdmin, cpUpload, async (req, res) => {
             episodes: episodesArr
         });
         await movie.save();
+        countCache.invalidate();
+        actorCache.invalidateCounts();
     
         res.status(201).send(movie);
     } catch(err) {
@@ -168,6 +174,8 @@ router.delete('/:id', authMiddleware, requireAdmin, async (req, res) => {
         if (!movie) {
             return res.status(404).json({ error: 'Movie not found' });
         }
+        countCache.invalidate();
+        actorCache.invalidateCounts();
         
         const rootDir = path.join(__dirname, '..');
 
@@ -193,102 +201,81 @@ router.delete('/:id', authMiddleware, requireAdmin, async (req, res) => {
     }
 });
 
+const escapeRegex = (str) => str.replace(/[.*+?^${}()|[\]\\]/g, '\\$&');
+
+// 목록 커서: 마지막 항목의 (releaseDate, _id) 를 base64url JSON 으로 전달
+const encodeCursor = (movie) => Buffer.from(JSON.stringify({
+    r: movie.releaseDate ? movie.releaseDate.toISOString() : null,
+    i: movie._id.toString()
+})).toString('base64url');
+
+// 해석할 수 없는 커서면 null
+const decodeCursor = (cursor) => {
+    try {
+        const { r, i } = JSON.parse(Buffer.from(cursor, 'base64url').toString('utf8'));
+        if (typeof i !== 'string' || !mongoose.Types.ObjectId.isValid(i)) return null;
+        const releaseDate = r ? new Date(r) : null;
+        if (releaseDate && isNaN(releaseDate.getTime())) return null;
+        return { releaseDate, id: new mongoose.Types.ObjectId(i) };
+    } catch {
+        return null;
+    }
+};
+
+// sort 방향에 맞춰 "커서 다음" 조건 생성
+// MongoDB 정렬에서 releaseDate 가 null/없는 문서는 날짜보다 앞(오름차순 맨 앞, 내림차순 맨 뒤)에 오지만
+// $gt/$lt 비교는 타입이 다른 값을 건너뛰므로 null 구간을 따로 조건에 넣어야 한다
+const keysetCondition = (sort, after) => {
+    const op = sort._id === 1 ? '$gt' : '$lt';
+    if (sort.releaseDate === undefined) {
+        return { _id: { [op]: after.id } };
+    }
+    const sameDate = { releaseDate: after.releaseDate, _id: { [op]: after.id } };
+    if (after.releaseDate === null) {
+        // 오름차순: 남은 null 다음에 날짜 있는 문서 전부 / 내림차순: 남은 null 만
+        return op === '$gt' ? { $or: [sameDate, { releaseDate: { $ne: null } }] } : sameDate;
+    }
+    const beyond = [{ releaseDate: { [op]: after.releaseDate } }, sameDate];
+    if (op === '$lt') {
+        beyond.push({ releaseDate: null });  // 내림차순은 날짜 없는 문서가 맨 뒤에 옴
+    }
+    return { $or: beyond };
+};
+
 // 모든 영화 정보를 가져오는 API
 router.get('/', authMiddleware, async (req, res) => {
-    const { serialNumber, actor, owned, subscriptExist, category, sortOrder, page, pageSize } = req.query;
+    const { serialNumber, serialMatch, actor, owned, subscriptExist, category, sortOrder, page, pageSize, cursor } = req.query;
     const filter = {};
 
-    if (serialNumber) {
-        const regex = new RegExp(serialNumber, 'i');
-        filter.serialNumber = regex;
+    // 품번 검색: 입력값을 serialKey 규칙(대문자, '-'/공백 제거)으로 정규화해 인덱스로 조회
+    const serialKey = serialNumber ? Movie.normalizeSerial(serialNumber) : '';
+    if (serialKey) {
+        if (serialMatch === 'prefix') {
+            filter.serialKey = { $gte: serialKey, $lt: serialKey + '\uffff' };
+        } else if (serialKey.length >= Movie.SERIAL_GRAM) {
+            filter.serialGrams = { $all: Movie.serialGrams(serialKey) };
+            filter.serialKey = new RegExp(escapeRegex(serialKey));
+        } else {
+            // 3글자 미만은 gram 이 없으므로 serialKey 인덱스만 훑음
+            filter.serialKey = new RegExp(escapeRegex(serialKey));
+        }
     }
     if (actor) {
         filter.actor = actor;
     }
     if (owned) {
+        // availableQualities / hasWebCopy 는 Movie 저장 시 mainMovie 에서 계산되는 인덱스용 필드
         if (owned === "false") {
             filter.plexRegistered = false;
-            filter.$or = [
-                { mainMovie: { $exists: false } },
-                { mainMovie: null },
-                { $expr: {
-                    $eq: [
-                        {
-                            $size: {
-                                $filter: {
-                                    input: { $objectToArray: "$mainMovie" },
-                                    as: "mm",
-                                    cond: { $or: [
-                                        { $eq: [ { $ifNull: ["$$mm.v", null] }, null ] },
-                                        { $eq: [ { $ifNull: ["$$mm.v", ""] }, "" ] },
-                                        { $eq: [ { $ifNull: ["$$mm.v", false] }, false ] }
-                                    ] }
-                                }
-                            }
-                        },
-                        { $size: { $objectToArray: "$mainMovie" } }
-                    ]
-                } }
-            ];
-        } else {
-            if (owned === "plex") {
-                filter.plexRegistered = true;
-            }
-            if (owned === "web") {
-                filter.$and = filter.$and || [];
-                filter.$and.push({ mainMovie: { $exists: true } });
-                filter.$and.push({ $expr: { $gt: [ { $size: { $objectToArray: "$mainMovie" } }, 0 ] } });
-            }
-            if (owned === "web4k") {
-                filter.$and = filter.$and || [];
-                filter.$and.push({ mainMovie: { $exists: true } });
-                filter.$and.push({
-                    $expr: {
-                        $gt: [
-                            {
-                                $size: {
-                                    $filter: {
-                                        input: { $objectToArray: "$mainMovie" },
-                                        as: "mm",
-                                        cond: {
-                                            $and: [
-                                                { $in: [ { $toLower: "$$mm.k" }, ["4k", "2160p"] ] },
-                                                { $ne: [ { $ifNull: ["$$mm.v", ""] }, "" ] }
-                                            ]
-                                        }
-                                    }
-                                }
-                            },
-                            0
-                        ]
-                    }
-                });
-            }
-            if (owned === "web1080p") {
-                filter.$and = filter.$and || [];
-                filter.$and.push({ mainMovie: { $exists: true } });
-                filter.$and.push({
-                    $expr: {
-                        $gt: [
-                            {
-                                $size: {
-                                    $filter: {
-                                        input: { $objectToArray: "$mainMovie" },
-                                        as: "mm",
-                                        cond: {
-                                            $and: [
-                                                { $eq: [ { $toLower: "$$mm.k" }, "1080p" ] },
-                                                { $ne: [ { $ifNull: ["$$mm.v", ""] }, "" ] }
-                                            ]
-                                        }
-                                    }
-                                }
-                            },
-                            0
-                        ]
-                    }
-                });
-            }
+            filter.hasWebCopy = false;
+        } else if (owned === "plex") {
+            filter.plexRegistered = true;
+        } else if (owned === "web") {
+            filter.hasWebCopy = true;
+        } else if (owned === "web4k") {
+            filter.availableQualities = { $in: ['4k', '2160p'] };
+        } else if (owned === "web1080p") {
+            filter.availableQualities = '1080p';
         }
     }
    
@@ -304,20 +291,41 @@ router.get('/', authMiddleware, async (req, res) => {
     }
 
     try {
-        let sort = { releaseDate: -1 };
+        // 정렬 키: (releaseDate, _id) 또는 _id. _id 를 보조 키로 두어 같은 날짜끼리도 순서가 고정되게 함
+        let sort = { releaseDate: -1, _id: -1 };
         if (sortOrder === 'asc') {
-            sort = { releaseDate: 1 };
+            sort = { releaseDate: 1, _id: 1 };
         } else if (sortOrder === 'createdAsc') {
             sort = { _id: 1 };
         } else if (sortOrder === 'createdDesc') {
             sort = { _id: -1 };
         }
-        const totalCount = await Movie.countDocuments(filter);
-        const movies = await Movie.find(filter)
-            .sort(sort)
-            .skip((page - 1) * pageSize)
-            .limit(parseInt(pageSize));
-        res.json({ movies, totalCount });
+
+        const countKey = JSON.stringify({ serialKey, serialMatch, actor, owned, subscriptExist, category });
+        const totalCount = await countCache.getCount(countKey, () => Movie.countDocuments(filter));
+
+        const limit = parseInt(pageSize) || 0;
+        let query;
+        if (cursor !== undefined) {
+            // 커서 모드: 마지막으로 받은 항목 다음부터 (skip 없이 인덱스 범위 조회)
+            // 빈 커서는 첫 페이지, 해석할 수 없는 커서는 1페이지로 되돌리지 않고 400
+            if (cursor) {
+                const after = decodeCursor(cursor);
+                if (!after) {
+                    return res.status(400).json({ error: 'Invalid cursor' });
+                }
+                filter.$and = [keysetCondition(sort, after)];
+            }
+            query = Movie.find(filter).sort(sort);
+        } else {
+            // 기존 page 방식 (구버전 클라이언트 호환)
+            query = Movie.find(filter).sort(sort).skip((page - 1) * pageSize);
+        }
+        const movies = await query.limit(limit);
+
+        const last = movies[movies.length - 1];
+        const nextCursor = limit > 0 && movies.length === limit ? encodeCursor(last) : null;
+        res.json({ movies, totalCount, nextCursor });
     } catch (err) {
         res.status(500).json({ error: 'Failed to fetch movies' });
         console.log(err);
@@ -333,13 +341,12 @@ router.get('/:id', authMiddleware, async (req, res) => {
         }
         res.json(movie);
 
-        const log = new UserActionLog({ 
+        actionLogBuffer.log({
             userId: req.userId,
             action: 'view',
             targetId: movie._id,
             details: `Viewed movie: ${movie.serialNumber}(${movie.actor}) ${movie.title}`,
         });
-        await log.save();
         console.log(`User ${req.userId} viewed movie: ${movie.title}`);
 
     } catch (err) {
@@ -376,7 +383,7 @@ router.put('/:id', authMiddleware, requireAdmin, putUpload, async (req, res) =>
                             if (ep.video && ep.video[q]) {
                                 const ext = path.extname(ep.video[q]);
                                 const vttPath = ep.video[q].replace(ext, '.vtt');
-                                if (fs.existsSync(path.join(__dirname, '..', vttPath))) {
+                                if (mediaIndex.exists(vttPath)) {
                                     ep.sub = vttPath;
                                     break;
                                 }
@@ -415,7 +422,7 @@ router.put('/:id', authMiddleware, requireAdmin, putUpload, async (req, res) =>
         for (const q of checkOrder) {
             if (mainMovieObj[q]) {
                 const vttPath = mainMovieObj[q].replace('.mp4', '.vtt');
-                if (fs.existsSync(path.join(__dirname, '..', vttPath))) {
+                if (mediaIndex.exists(vttPath)) {
                     mainMovieSubPath = vttPath;
                     break;
                 }
@@ -444,6 +451,8 @@ router.put('/:id', authMiddleware, requireAdmin, putUpload, async (req, res) =>
         if (!updatedMovie) {
             return res.status(404).json({ message: 'Movie not found' });
         }
+        countCache.invalidate();
+        actorCache.invalidateCounts();
         res.json(updatedMovie);
     } catch (err) {
         res.status(500).json({ error: 'Failed to update movie' });
@@ -4,13 +4,36 @@ const ffmpeg = require('fluent-ffmpeg');
 const fs = require('fs');
 const fs_extra = require('fs-extra');
 const path = require('path');
-const { execSync } = require('child_process');
+const { probeMedia, singleFileOptions, finalizePlaylist } = require('../utils/ffmpeg');
+const mediaIndex = require('../utils/mediaIndex');
 
-// /api/stream
-router.get('/', (req, res) => {
-    const videoPath = req.query.file;
-    const resolution = req.query.resolution;
-    
+// 재생 시작 가능으로 판단할 최소 세그먼트 수
+const MIN_READY_SEGMENTS = parseInt(process.env.HLS_MIN_READY_SEGMENTS) || 3;
+// 완료된 작업 정보를 progress 조회용으로 남겨두는 시간
+const JOB_RETENTION_MS = 10 * 60 * 1000;
+
+// 진행 중인 트랜스코딩 작업 (key: hls 폴더명)
+const jobs = new Map();
+
+// 오디오 트랙을 화질별 폴더마다 넣지 않고 <이름>_audio/a<n>/ 에 한 번만 만들어 모든 화질이 공유
+// master.m3u8 에 #EXT-X-MEDIA:TYPE=AUDIO 그룹으로 등록되므로 다국어 트랙 선택도 가능
+const SHARED_AUDIO = process.env.HLS_SHARED_AUDIO === 'true';
+// 세그먼트 파일 수백 개 대신 렌디션당 미디어 파일 하나 + #EXT-X-BYTERANGE 로 출력
+// (기존 폴더 변환은 simple_scripts/hls_single_file.py)
+const SINGLE_FILE = process.env.HLS_SINGLE_FILE === 'true';
+
+// 진행 중인 공유 오디오 작업 (key: 오디오 폴더명)
+const audioJobs = new Map();
+
+const LANGUAGE_NAMES = {
+    ko: 'Korean', kor: 'Korean',
+    en: 'English', eng: 'English',
+    ja: 'Japanese', jpn: 'Japanese',
+    zh: 'Chinese', zho: 'Chinese', chi: 'Chinese'
+};
+
+// /api/stream 과 /api/download 가 같은 규칙으로 hls 폴더를 찾음
+function resolveHlsFolder(videoPath, resolution) {
     let relativeDir = path.dirname(videoPath).replace(/\\/g, '/');
     if (relativeDir === '.') relativeDir = '';
 
@@ -23,14 +46,215 @@ router.get('/', (req, res) => {
 
     const filenameBase = path.basename(videoPath, path.extname(videoPath));
     const folderName = relativeDir ? `${relativeDir}/${filenameBase}_${resolution}` : `${filenameBase}_${resolution}`;
+    const audioFolder = relativeDir ? `${relativeDir}/${filenameBase}_audio` : `${filenameBase}_audio`;
     const hlsPath = path.join(__dirname, '..', 'hls', ...folderName.split('/'));
-    
-    fs_extra.ensureDirSync(hlsPath);
+    return { folderName, audioFolder, hlsPath };
+}
+
+// playlist 와 같은 폴더에 세그먼트 파일들 또는 단일 미디어 파일로 출력
+function segmentOptions(playlistPath) {
+    return SINGLE_FILE
+        ? singleFileOptions(playlistPath)
+        : ['-hls_segment_filename', path.join(path.dirname(playlistPath), 'segment_%03d.ts')];
+}
+
+const playlistFinished = (playlistPath) => {
+    try {
+        return fs.readFileSync(playlistPath, 'utf8').includes('#EXT-X-ENDLIST');
+    } catch {
+        return false;
+    }
+};
+
+// 원본의 오디오 트랙을 트랙마다 한 번씩만 HLS 로 만든다. 이미 AAC 면 재인코딩 없이 복사.
+// 같은 원본의 다른 화질 요청은 진행 중인 작업(또는 완료된 결과)을 그대로 사용한다.
+const sharedAudioPlaylist = (audioFolder, i) =>
+    path.join(__dirname, '..', 'hls', ...audioFolder.split('/'), `a${i}`, 'audio.m3u8');
+
+function ensureSharedAudio(videoPath, audioFolder, audioStreams) {
+    if (audioJobs.has(audioFolder)) {
+        return audioJobs.get(audioFolder);
+    }
+    const tracks = audioStreams.map((stream, i) => ({
+        ...stream,
+        playlist: sharedAudioPlaylist(audioFolder, i)
+    }));
+    if (tracks.every(t => playlistFinished(t.playlist))) {
+        return Promise.resolve(tracks);
+    }
+
+    const job = new Promise((resolve, reject) => {
+        const command = ffmpeg(videoPath);
+        tracks.forEach(t => {
+            fs_extra.ensureDirSync(path.dirname(t.playlist));
+            const codecOptions = t.codec === 'aac'
+                ? ['-c:a', 'copy']
+                : ['-c:a', 'aac', '-b:a', t.channels > 2 ? '384k' : '192k'];
+            command.output(t.playlist).outputOptions([
+                '-map', `0:${t.index}`,
+                ...codecOptions,
+                '-f', 'hls',
+                '-hls_time', '10',
+                '-hls_playlist_type', 'event',
+                ...segmentOptions(t.playlist)
+            ]);
+        });
+        command
+            .on('start', () => console.log(`공유 오디오 트랙 ${tracks.length}개 생성 시작: ${audioFolder}`))
+            .on('end', () => {
+                Promise.all(tracks.map(t => finalizePlaylist(t.playlist))).then(() => resolve(tracks), reject);
+            })
+            .on('error', reject)
+            .run();
+    });
+    audioJobs.set(audioFolder, job);
+    job.catch(() => {}).finally(() => audioJobs.delete(audioFolder));
+    return job;
+}
+
+// playlist 의 따옴표 문자열 값에는 '"' 와 줄바꿈이 들어갈 수 없음
+const quotedValue = (value) => String(value).replace(/"/g, "'").replace(/[\r\n]/g, ' ');
+
+function audioMediaLines(audioFolder, audioStreams) {
+    const usedNames = new Set();
+    return audioStreams.map((stream, i) => {
+        let name = stream.title || LANGUAGE_NAMES[stream.language] || `Audio ${i + 1}`;
+        if (usedNames.has(name)) name = `${name} (${i + 1})`;
+        usedNames.add(name);
+        return `#EXT-X-MEDIA:TYPE=AUDIO,GROUP-ID="aud",NAME="${quotedValue(name)}",LANGUAGE="${quotedValue(stream.language)}",` +
+            `DEFAULT=${i === 0 ? 'YES' : 'NO'},AUTOSELECT=YES,CHANNELS="${stream.channels}",` +
+            `URI="hls/${audioFolder}/a${i}/audio.m3u8"\n`;
+    }).join('');
+}
+
+// 실패한 작업의 playlist 를 지워서 다음 /api/stream 요청이 깨진 master 를 보내지 않고 다시 트랜스코딩하게 함
+// (master 는 재생을 빨리 시작할 수 있도록 ffmpeg 실행 전에 미리 써 둔다)
+async function discardPlaylists(hlsPath) {
+    await Promise.all(['master.m3u8', 'video.m3u8'].map(name =>
+        fs.promises.unlink(path.join(hlsPath, name)).catch(() => {})
+    ));
+}
+
+const parseTimemark = (timemark) => {
+    const parts = String(timemark || '0').split(':').map(parseFloat);
+    return parts.reduce((acc, v) => acc * 60 + (v || 0), 0);
+};
+
+// playlist 에 기록된(=완성된) 세그먼트 수
+async function countPlaylistSegments(playlistPath) {
+    try {
+        const content = await fs.promises.readFile(playlistPath, 'utf8');
+        return (content.match(/#EXTINF:/g) || []).length;
+    } catch {
+        return 0;
+    }
+}
+
+const countReadySegments = (job) => countPlaylistSegments(path.join(job.hlsPath, job.mediaPlaylist));
+
+// 공유 오디오 모드: master 가 가리키는 오디오 playlist 가 모두 세그먼트를 하나 이상 가져야 재생 가능
+async function sharedAudioReady(job) {
+    if (job.audioDone || job.audioPlaylists.length === 0) return true;
+    const counts = await Promise.all(job.audioPlaylists.map(countPlaylistSegments));
+    return counts.every(n => n > 0);
+}
+
+async function jobStatus(job) {
+    const segmentsReady = await countReadySegments(job);
+    const audioReady = await sharedAudioReady(job);
+    return {
+        jobId: job.folderName,
+        status: job.status,
+        ready: job.status === 'done' || (job.masterWritten && segmentsReady >= MIN_READY_SEGMENTS && audioReady),
+        encodedSeconds: Math.round(job.encodedSeconds * 10) / 10,
+        duration: job.duration,
+        segmentsReady,
+        minSegments: MIN_READY_SEGMENTS,
+        playlistUrl: `hls/${job.folderName}/master.m3u8`,
+        error: job.error
+    };
+}
+
+// /api/stream
+// master.m3u8 가 이미 있으면 그대로 전송하고, 없으면 트랜스코딩을 시작한 뒤 작업 핸들을 바로 반환한다(202).
+// 클라이언트는 /api/stream/progress 로 ready 를 확인한 뒤 playlistUrl 로 재생을 시작하면 된다.
+router.get('/', async (req, res) => {
+    const videoPath = req.query.file;
+    const resolution = req.query.resolution;
+    if (!videoPath || !resolution) {
+        return res.status(400).json({ error: 'file and resolution are required' });
+    }
+
+    const { folderName, audioFolder, hlsPath } = resolveHlsFolder(videoPath, resolution);
+
+    const running = jobs.get(folderName);
+    if (running && running.status === 'running') {
+        return res.status(202).json(await jobStatus(running));
+    }
 
     if (fs.existsSync(path.join(hlsPath, 'master.m3u8'))) {
       return res.sendFile(path.join(hlsPath, 'master.m3u8'));
-    } 
+    }
+
+    if (!fs.existsSync(videoPath)) {
+        return res.status(404).json({ error: 'Source video not found' });
+    }
+
+    fs_extra.ensureDirSync(hlsPath);
+
+    const job = {
+        folderName,
+        audioFolder,
+        hlsPath,
+        status: 'running',
+        encodedSeconds: 0,
+        duration: 0,
+        mediaPlaylist: 'master.m3u8',
+        masterWritten: false,
+        audioPlaylists: [],
+        audioDone: false,
+        error: null
+    };
+    jobs.set(folderName, job);
+    res.status(202).json(await jobStatus(job));
+
+    try {
+        await startTranscode(job, videoPath, resolution);
+    } catch (err) {
+        console.error('HLS 트랜스코딩 준비 오류:', err);
+        await discardPlaylists(hlsPath);
+        job.status = 'error';
+        job.error = err.message;
+        setTimeout(() => jobs.delete(folderName), JOB_RETENTION_MS).unref();
+    }
+});
+
+// /api/stream/progress?file=...&resolution=...
+router.get('/progress', async (req, res) => {
+    const videoPath = req.query.file;
+    const resolution = req.query.resolution;
+    if (!videoPath || !resolution) {
+        return res.status(400).json({ error: 'file and resolution are required' });
+    }
+
+    const { folderName, hlsPath } = resolveHlsFolder(videoPath, resolution);
+    const job = jobs.get(folderName);
+    if (job) {
+        return res.json(await jobStatus(job));
+    }
+    if (fs.existsSync(path.join(hlsPath, 'master.m3u8'))) {
+        return res.json({
+            jobId: folderName,
+            status: 'done',
+            ready: true,
+            playlistUrl: `hls/${folderName}/master.m3u8`
+        });
+    }
+    res.status(404).json({ error: 'No transcode job for this file' });
+});
 
+async function startTranscode(job, videoPath, resolution) {
+    const { folderName, hlsPath } = job;
     console.log("ffmpeg start");
 
         let scaleValue = 1080;
@@ -49,14 +273,12 @@ router.get('/', (req, res) => {
             }
         }
 
+        // 자막 탐색은 미디어 인덱스 조회 (인덱스가 오래됐으면 existsSync 로 대체)
+        const subtitleFiles = mediaIndex.findSubtitles(videoPath);
         const foundSubtitles = [];
-        const dir = path.dirname(videoPath);
-        const ext = path.extname(videoPath);
-        const baseName = path.basename(videoPath, ext);
 
-        const defaultVttPath = videoPath.replace(ext, '.vtt');
-        if (fs.existsSync(defaultVttPath)) {
-            foundSubtitles.push({ lang: 'ko', name: 'Korean', file: defaultVttPath, isDefault: true });
+        if (subtitleFiles.ko) {
+            foundSubtitles.push({ lang: 'ko', name: 'Korean', file: subtitleFiles.ko, isDefault: true });
         }
 
         const supportedLangs = [
@@ -66,65 +288,72 @@ router.get('/', (req, res) => {
         ];
 
         supportedLangs.forEach(l => {
-            const langVttPath = path.join(dir, `${baseName}.${l.code}.vtt`);
-            if (fs.existsSync(langVttPath)) {
-                foundSubtitles.push({ lang: l.code, name: l.name, file: langVttPath, isDefault: false });
+            if (subtitleFiles[l.code]) {
+                foundSubtitles.push({ lang: l.code, name: l.name, file: subtitleFiles[l.code], isDefault: false });
             }
         });
 
         const hasSubtitle = foundSubtitles.length > 0;
-        
+
+        // 원본 정보는 한 번만 (비동기로) probe
+        let duration = 0;
+        let startPts = 0;
+        let audioStreams = [];
+        try {
+            const info = await probeMedia(videoPath);
+            duration = info.duration;
+            startPts = Math.floor(info.startTime * 90000);
+            if (SHARED_AUDIO) audioStreams = info.audioStreams;
+        } catch (probeErr) {
+            console.error("Failed to probe video info:", probeErr);
+        }
+        job.duration = duration;
+
         const command = ffmpeg(videoPath);
-        
+
         const outputOptions = [
             '-vf', `scale=-1:${scaleValue}`,
             '-c:v', encoder,
             '-crf', '20',
             '-preset', 'veryfast',
+            // 세그먼트 경계(10초)마다 키프레임을 강제해 모든 세그먼트가 정확히 10초로 잘리도록 함
+            '-force_key_frames', 'expr:gte(t,n_forced*10)',
             '-hls_time', '10',
-            '-hls_playlist_type', 'event',
-            '-hls_segment_filename', path.join(hlsPath, 'segment_%03d.ts')
+            '-hls_playlist_type', 'event'
         ];
 
-        if (hasSubtitle) {
+        // 공유 오디오 모드: 비디오는 -an 으로 인코딩하고 오디오는 별도 작업으로 한 번만 생성
+        let audioReady = Promise.resolve();
+        let audioLines = '';
+        if (audioStreams.length > 0) {
+            audioReady = ensureSharedAudio(videoPath, job.audioFolder, audioStreams);
+            audioReady.then(() => { job.audioDone = true; }, () => {});
+            job.audioPlaylists = audioStreams.map((_, i) => sharedAudioPlaylist(job.audioFolder, i));
+            audioLines = audioMediaLines(job.audioFolder, audioStreams);
+            outputOptions.push('-an');
+        }
+
+        if (hasSubtitle || audioLines) {
              outputOptions.push('-hls_base_url', '');
 
+             const subsDuration = duration || 7200;
              let subtitleMediaLines = '';
 
-             foundSubtitles.forEach(sub => {
+             for (const sub of foundSubtitles) {
                  const subsM3u8Name = `subs_${sub.lang}.m3u8`;
                  const subsVttName = `subs_${sub.lang}.vtt`;
-                 
+
                  const subsM3u8Path = path.join(hlsPath, subsM3u8Name);
                  const fullSubPath = path.join(hlsPath, subsVttName);
-                 
+
                  const cleanVttPath = sub.file.replace(/\\/g, '/');
 
                  try {
                      console.log(`Processing subtitles for ${sub.lang} (Single File Mode)...`);
-                     
-                     let duration = 0;
-                     let startPts = 0;
-
-                     try {
-                        const durationCmd = `ffprobe -v error -show_entries format=duration -of default=noprint_wrappers=1:nokey=1 "${videoPath}"`;
-                        const startTimeCmd = `ffprobe -v error -show_entries format=start_time -of default=noprint_wrappers=1:nokey=1 "${videoPath}"`;
-                        
-                        const durationStr = execSync(durationCmd).toString().trim();
-                        const startTimeStr = execSync(startTimeCmd).toString().trim();
-                        
-                        duration = parseFloat(durationStr) || 0;
-                        const startTime = parseFloat(startTimeStr) || 0;
-                        
-                        startPts = Math.floor(startTime * 90000);
-                     } catch (probeErr) {
-                         console.error("Failed to probe video info:", probeErr);
-                         duration = 7200;
-                     }
 
-                     let vttContent = fs.readFileSync(cleanVttPath, 'utf8');
+                     let vttContent = await fs.promises.readFile(cleanVttPath, 'utf8');
                      const lines = vttContent.split('\n');
-                     
+
                      if (lines.length > 0 && lines[0].trim().startsWith('WEBVTT')) {
                          const hasHeader = lines.some(l => l.includes('X-TIMESTAMP-MAP'));
                          if (!hasHeader) {
@@ -132,43 +361,52 @@ router.get('/', (req, res) => {
                               vttContent = lines.join('\n');
                          }
                      }
-                     
-                     fs.writeFileSync(fullSubPath, vttContent, 'utf8');
-                     
+
+                     await fs.promises.writeFile(fullSubPath, vttContent, 'utf8');
+
                      const m3u8Content = `#EXTM3U
-#EXT-X-TARGETDURATION:${Math.ceil(duration)}
+#EXT-X-TARGETDURATION:${Math.ceil(subsDuration)}
 #EXT-X-VERSION:3
 #EXT-X-MEDIA-SEQUENCE:0
 #EXT-X-PLAYLIST-TYPE:VOD
-#EXTINF:${duration},
+#EXTINF:${subsDuration},
 ${subsVttName}
 #EXT-X-ENDLIST`;
-        
-                     fs.writeFileSync(subsM3u8Path, m3u8Content, 'utf8');
-                     
+
+                     await fs.promises.writeFile(subsM3u8Path, m3u8Content, 'utf8');
+
                      subtitleMediaLines += `#EXT-X-MEDIA:TYPE=SUBTITLES,GROUP-ID="subs",NAME="${sub.name}",LANGUAGE="${sub.lang}",DEFAULT=${sub.isDefault?'YES':'NO'},AUTOSELECT=YES,URI="hls/${folderName}/${subsM3u8Name}"\n`;
 
                  } catch (e) {
                      console.error(`Subtitle processing failed for ${sub.lang}`, e);
                  }
-             });
+             }
 
              const bandwidth = (resolution === '4k' || resolution === '2160p') ? '20000000' : '10000000';
+             let groups = '';
+             if (audioLines) groups += ',AUDIO="aud"';
+             if (subtitleMediaLines) groups += ',SUBTITLES="subs"';
              const masterContent = `#EXTM3U
-${subtitleMediaLines}#EXT-X-STREAM-INF:BANDWIDTH=${bandwidth},RESOLUTION=${resolution === '720p' ? '1280x720' : '1920x1080'},SUBTITLES="subs"
+${audioLines}${subtitleMediaLines}#EXT-X-STREAM-INF:BANDWIDTH=${bandwidth},RESOLUTION=${resolution === '720p' ? '1280x720' : '1920x1080'}${groups}
 hls/${folderName}/video.m3u8`;
-             fs.writeFileSync(path.join(hlsPath, 'master.m3u8'), masterContent);
+             await fs.promises.writeFile(path.join(hlsPath, 'master.m3u8'), masterContent);
+             job.mediaPlaylist = 'video.m3u8';
+             job.masterWritten = true;
 
+             outputOptions.push(...segmentOptions(path.join(hlsPath, job.mediaPlaylist)));
              command.outputOptions(outputOptions);
              command.output(path.join(hlsPath, 'video.m3u8'));
-             
+
              command.on('start', () => {
-                console.log('HLS 트랜스코딩 시작 (Video Only mode for Multi-Subtitle support)');
+                console.log('HLS 트랜스코딩 시작 (Video Only mode for Multi-Subtitle / Shared Audio support)');
              });
 
         } else {
             outputOptions.push('-hls_base_url', `hls/${folderName}/`);
-            
+            // 자막이 없으면 ffmpeg 가 master.m3u8 을 직접 미디어 playlist 로 씀
+            job.masterWritten = true;
+
+            outputOptions.push(...segmentOptions(path.join(hlsPath, job.mediaPlaylist)));
             command.outputOptions(outputOptions);
             command.output(path.join(hlsPath, 'master.m3u8'))
                    .on('start', () => {
@@ -177,18 +415,42 @@ hls/${folderName}/video.m3u8`;
         }
 
         command
-            .on('end', () => {
+            .on('progress', (progress) => {
+                job.encodedSeconds = parseTimemark(progress.timemark);
+            })
+            .on('end', async () => {
                 console.log('HLS 트랜스코딩 완료');
+                try {
+                    await audioReady;
+                } catch (err) {
+                    // 오디오가 없으면 master 가 깨지므로 playlist 를 지우고 원본을 남겨 다시 만들 수 있게 함
+                    console.error('공유 오디오 트랜스코딩 오류:', err);
+                    await discardPlaylists(hlsPath);
+                    job.status = 'error';
+                    job.error = err.message;
+                    setTimeout(() => jobs.delete(folderName), JOB_RETENTION_MS).unref();
+                    return;
+                }
+                // 인코딩이 끝났으므로 EVENT playlist 를 VOD 로 마감
+                await finalizePlaylist(path.join(hlsPath, job.mediaPlaylist))
+                    .catch(err => console.error('playlist 마감 실패:', err));
+                job.status = 'done';
+                job.encodedSeconds = job.duration || job.encodedSeconds;
+                setTimeout(() => jobs.delete(folderName), JOB_RETENTION_MS).unref();
                 fs.unlinkSync(videoPath);
                 console.log(`${videoPath} : file removed`);
             })
             .on('stderr', (stderr) => {
                 console.log('stderr 로그:', stderr);
             })
-            .on('error', (err) => {
+            .on('error', async (err) => {
                 console.error('HLS 트랜스코딩 오류:', err);
+                await discardPlaylists(hlsPath);
+                job.status = 'error';
+                job.error = err.message;
+                setTimeout(() => jobs.delete(folderName), JOB_RETENTION_MS).unref();
             })
             .run();
-});
+}
 
-module.exports = router;
\ No newline at end of file
+module.exports = router;
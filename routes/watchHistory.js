@@ -1,6 +1,8 @@
 const express = require('express');
 const router = express.Router();
+const mongoose = require('mongoose');
 const WatchHistory = require('../models/WatchHistory');
+const watchHistoryBuffer = require('../utils/watchHistoryBuffer');
 const { authMiddleware, requireAdmin } = require('../middleware/auth');
 
 // 유저별 영화 시청 위치 조회 API (/api/watch-history)
@@ -14,14 +16,12 @@ router.get('/watch-history', authMiddleware, async (req, res) => {
     const epIdx = episodeIndex !== undefined ? parseInt(episodeIndex) : -1;
 
     try {
-        let query = { userId, movieId };
-        if (epIdx === -1) {
-            query.$or = [{ episodeIndex: -1 }, { episodeIndex: { $exists: false } }];
-        } else {
-            query.episodeIndex = epIdx;
+        const buffered = watchHistoryBuffer.peek(userId, movieId, epIdx);
+        if (buffered) {
+            return res.json({ lastWatchedTime: buffered.lastWatchedTime });
         }
 
-        const history = await WatchHistory.findOne(query);
+        const history = await WatchHistory.findOne({ userId, movieId, episodeIndex: epIdx });
         if (history) {
             res.json({ lastWatchedTime: history.lastWatchedTime });
         } else {
@@ -34,39 +34,26 @@ router.get('/watch-history', authMiddleware, async (req, res) => {
 });
 
 // 유저별 영화 시청 위치 저장/업데이트 API (/api/watch-history)
-router.post('/watch-history', authMiddleware, async (req, res) => {
+router.post('/watch-history', authMiddleware, (req, res) => {
     const userId = req.userId;
     const { movieId, lastWatchedTime, episodeIndex } = req.body;
     if (!movieId || typeof lastWatchedTime !== 'number') {
         return res.status(400).json({ error: 'movieId와 lastWatchedTime(Number)가 필요합니다.' });
     }
 
-    const epIdx = episodeIndex !== undefined ? parseInt(episodeIndex) : -1;
-
-    try {
-        let filter = { userId, movieId, episodeIndex: epIdx };
-        
-        if (epIdx === -1) {
-             const existing = await WatchHistory.findOne({ userId, movieId, episodeIndex: { $exists: false } });
-             if (existing) {
-                 existing.episodeIndex = -1;
-                 existing.lastWatchedTime = lastWatchedTime;
-                 existing.updatedAt = Date.now();
-                 await existing.save();
-                 return res.json({ success: true, lastWatchedTime: existing.lastWatchedTime });
-             }
-        }
+    if (!mongoose.Types.ObjectId.isValid(movieId)) {
+        return res.status(400).json({ error: 'movieId가 올바르지 않습니다.' });
+    }
 
-        const updated = await WatchHistory.findOneAndUpdate(
-            { userId, movieId, episodeIndex: epIdx },
-            { lastWatchedTime, updatedAt: Date.now() },
-            { upsert: true, new: true }
-        );
-        res.json({ success: true, lastWatchedTime: updated.lastWatchedTime });
-    } catch (err) {
-        res.status(500).json({ error: 'Failed to save watch history' });
-        console.log(err);
+    const epIdx = episodeIndex !== undefined ? parseInt(episodeIndex) : -1;
+    if (isNaN(epIdx)) {
+        return res.status(400).json({ error: 'episodeIndex가 올바르지 않습니다.' });
     }
+
+    // 실제 저장은 watchHistoryBuffer 가 모아서 주기적으로 bulkWrite 한다.
+    // (episodeIndex 가 없는 옛 기록은 migrate_watchhistory_episode_index.js 로 일괄 변환)
+    watchHistoryBuffer.record(userId, movieId, epIdx, lastWatchedTime);
+    res.json({ success: true, lastWatchedTime });
 });
 
 // 영화별 재생 위치(WatchHistory) 전체 조회 (관리자만) (/api/admin/watch-histories)
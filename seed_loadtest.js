@@ -0,0 +1,72 @@
+// seed_loadtest.js
+// 부하 테스트(simple_scripts/loadtest.py)용 계정과 영화 문서를 생성
+// 실수로 운영 DB에 넣지 않도록 MONGO_URI 를 반드시 지정해야 함
+//
+// 사용법: MONGO_URI=mongodb://127.0.0.1:27018/movies_loadtest node seed_loadtest.js
+//   LOADTEST_USERS (기본 20), LOADTEST_MOVIES (기본 200), LOADTEST_PASSWORD (기본 loadtest)
+
+const mongoose = require('mongoose');
+const bcrypt = require('bcryptjs');
+const User = require('./models/User');
+const Movie = require('./models/Movie');
+
+const MONGO_URI = process.env.MONGO_URI;
+const USER_COUNT = parseInt(process.env.LOADTEST_USERS) || 20;
+const MOVIE_COUNT = parseInt(process.env.LOADTEST_MOVIES) || 200;
+const PASSWORD = process.env.LOADTEST_PASSWORD || 'loadtest';
+
+const USER_PREFIX = 'loadtest';
+const SERIAL_PREFIX = 'LT-';
+// loadtest.py 가 만드는 fixture 경로와 같은 규칙
+const FIXTURE_DIR = 'hls/_loadtest';
+
+const pad = (n) => String(n).padStart(5, '0');
+
+async function seedLoadTest() {
+  if (!MONGO_URI) {
+    console.error('MONGO_URI 를 지정하세요. (운영 DB 보호를 위해 기본값 없음)');
+    process.exit(1);
+  }
+  await mongoose.connect(MONGO_URI);
+  try {
+    await Promise.all([
+      User.deleteMany({ username: new RegExp(`^${USER_PREFIX}\\d+$`) }),
+      Movie.deleteMany({ serialNumber: new RegExp(`^${SERIAL_PREFIX}`) })
+    ]);
+
+    // bcrypt 는 한 번만 계산하고 pre('save') 를 거치지 않도록 collection 에 직접 넣음
+    const hash = await bcrypt.hash(PASSWORD, 12);
+    const users = [];
+    for (let i = 0; i < USER_COUNT; i++) {
+      users.push({ username: `${USER_PREFIX}${i}`, password: hash, role: 'guest' });
+    }
+    await User.collection.insertMany(users, { ordered: false });
+
+    // insertMany 는 pre('save') 를 거치지 않으므로 파생 필드(serialKey, availableQualities 등)를 직접 계산
+    const movies = [];
+    const day = 24 * 60 * 60 * 1000;
+    for (let i = 0; i < MOVIE_COUNT; i++) {
+      const serialNumber = `${SERIAL_PREFIX}${pad(i)}`;
+      movies.push({
+        serialNumber,
+        title: `Load Test ${pad(i)}`,
+        image: 'uploads/loadtest.jpg',
+        mainMovie: { '1080p': `${FIXTURE_DIR}/${serialNumber}_1080p/master.m3u8` },
+        releaseDate: new Date(Date.UTC(2020, 0, 1) + i * day),
+        category: 'Movie',
+        ...Movie.computeAvailability({ '1080p': 'x' }),
+        ...Movie.computeSerialSearch(serialNumber)
+      });
+    }
+    await Movie.insertMany(movies, { ordered: false });
+
+    console.log(`계정 ${USER_COUNT}개, 영화 ${MOVIE_COUNT}개 생성 완료.`);
+  } catch (err) {
+    console.error('시드 오류:', err);
+    process.exitCode = 1;
+  } finally {
+    await mongoose.disconnect();
+  }
+}
+
+seedLoadTest();
@@ -1,13 +1,45 @@
 import os
+import json
 import subprocess
 import argparse
 from pathlib import Path
 
+from cuestore import read_vtt, write_vtt
+import encode_optimizer
+import hls_single_file
+
+# master 의 hls/... URI 와 폴더 규칙을 맞추기 위해 출력 경로에서 'hls' 아래 상대 경로를 구함
+# (예: D:/movie/hls/Show -> "Show", hls -> "", hls 밖이면 "")
+def hls_relative_dir(folder):
+    parts = Path(os.path.abspath(folder)).parts
+    if 'hls' not in parts:
+        return ''
+    idx = len(parts) - 1 - parts[::-1].index('hls')
+    return '/'.join(parts[idx + 1:])
+
+def hls_url_dir(output_folder, name):
+    rel = hls_relative_dir(output_folder)
+    return f"{rel}/{name}" if rel else name
+
+# 화질 사다리 (낮은 화질부터)
+RESOLUTIONS = ['720p', '1080p']
+
+LANGUAGE_NAMES = {
+    'ko': 'Korean', 'kor': 'Korean',
+    'en': 'English', 'eng': 'English',
+    'ja': 'Japanese', 'jpn': 'Japanese',
+    'zh': 'Chinese', 'zho': 'Chinese', 'chi': 'Chinese',
+}
+
 # 자막 처리 및 싱크 보정 함수
+# 같은 폴더에 다시 실행해도 자막 그룹은 하나만 남고 새 자막으로 바뀜
 def process_hls_subtitles(video_hls_dir, subtitle_file):
     print(f"Processing subtitles for {video_hls_dir}...")
     
-    # 1. VTT 변환 및 복사
+    # 1. VTT 변환 및 복사 (이전 자막 세그먼트는 개수가 다를 수 있으므로 먼저 삭제)
+    for filename in os.listdir(video_hls_dir):
+        if filename.startswith('sub_') and filename.endswith('.vtt'):
+            os.remove(os.path.join(video_hls_dir, filename))
     vtt_filename = "subtitles.vtt"
     vtt_path = os.path.join(video_hls_dir, vtt_filename)
     
@@ -25,36 +57,42 @@ def process_hls_subtitles(video_hls_dir, subtitle_file):
     subprocess.run(cmd_segment, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
     
     # 3. 비디오 시작 시간(PTS) 측정
-    start_pts = 0
-    try:
-        segment_0 = os.path.join(video_hls_dir, 'segment_000.ts')
-        if os.path.exists(segment_0):
-            cmd_probe = ['ffprobe', '-v', 'error', '-show_entries', 'format=start_time', '-of', 'default=noprint_wrappers=1:nokey=1', segment_0]
-            result = subprocess.run(cmd_probe, capture_output=True, text=True)
-            start_time = float(result.stdout.strip())
-            start_pts = int(start_time * 90000)
-            print(f"  Detected start PTS: {start_pts}")
-    except Exception as e:
-        print(f"  Warning: Could not probe start time ({e}). Assuming 0.")
+    # (segment_000.ts 또는 단일 파일 모드의 미디어 파일)
+    start_pts = hls_single_file.probe_start_pts(video_hls_dir)
+    if start_pts is None:
+        print("  Warning: Could not probe start time. Assuming 0.")
+        start_pts = 0
+    else:
+        print(f"  Detected start PTS: {start_pts}")
 
     # 4. 자막 세그먼트에 X-TIMESTAMP-MAP 적용
     for filename in os.listdir(video_hls_dir):
         if filename.startswith('sub_') and filename.endswith('.vtt'):
             file_path = os.path.join(video_hls_dir, filename)
-            with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-            
-            if lines and lines[0].strip() == 'WEBVTT':
-                if len(lines) > 1 and 'X-TIMESTAMP-MAP' not in lines[1]:
-                    lines.insert(1, f"X-TIMESTAMP-MAP=MPEGTS:{start_pts},LOCAL:00:00:00.000\n")
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        f.writelines(lines)
+            cues = read_vtt(file_path)
+            if not any(l.startswith('X-TIMESTAMP-MAP') for l in cues.header):
+                write_vtt(cues, file_path, timestamp_map=start_pts)
 
     # 5. Master Playlist 구성
     original_master = os.path.join(video_hls_dir, 'master.m3u8')
     video_playlist = os.path.join(video_hls_dir, 'video.m3u8')
     
-    if os.path.exists(original_master):
+    if os.path.exists(original_master) and os.path.exists(video_playlist):
+        # 공유 오디오 모드: master 가 이미 있으므로 자막 그룹만 추가
+        folder_name = hls_relative_dir(video_hls_dir) or os.path.basename(os.path.normpath(video_hls_dir))
+        with open(original_master, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        media_line = f'#EXT-X-MEDIA:TYPE=SUBTITLES,GROUP-ID="subs",NAME="Korean",DEFAULT=YES,AUTOSELECT=YES,URI="hls/{folder_name}/subs.m3u8",LANGUAGE="ko"'
+        new_lines = [lines[0], media_line]
+        for line in lines[1:]:
+            if line.startswith('#EXT-X-MEDIA:TYPE=SUBTITLES') and 'GROUP-ID="subs"' in line:
+                continue  # 이전에 추가한 자막 그룹은 새 줄로 교체
+            if line.startswith('#EXT-X-STREAM-INF') and 'SUBTITLES=' not in line:
+                line += ',SUBTITLES="subs"'
+            new_lines.append(line)
+        with open(original_master, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(new_lines) + '\n')
+    elif os.path.exists(original_master):
         os.rename(original_master, video_playlist)
         
         new_master_content = f"""#EXTM3U
@@ -67,35 +105,198 @@ video.m3u8
             
     print(f"  Subtitle integration completed for {video_hls_dir}")
 
+# 오디오 트랙 정보 (index, codec, channels, language, title)
+def probe_audio_streams(input_file):
+    cmd = [
+        'ffprobe', '-v', 'error', '-select_streams', 'a',
+        '-show_entries', 'stream=index,codec_name,channels:stream_tags=language,title',
+        '-of', 'json', input_file
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    streams = []
+    for s in json.loads(result.stdout or '{}').get('streams', []):
+        tags = s.get('tags') or {}
+        streams.append({
+            'index': s['index'],
+            'codec': s.get('codec_name'),
+            'channels': s.get('channels') or 2,
+            'language': tags.get('language', 'und'),
+            'title': tags.get('title', ''),
+        })
+    return streams
+
+# 재생 시간(초). 알 수 없으면 0
+def probe_duration(input_file):
+    cmd = ['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'json', input_file]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    return float(json.loads(result.stdout or '{}').get('format', {}).get('duration') or 0)
+
+def _playlist_finished(playlist):
+    if not os.path.exists(playlist):
+        return False
+    with open(playlist, 'r', encoding='utf-8', errors='ignore') as f:
+        return '#EXT-X-ENDLIST' in f.read()
+
+# 공유 오디오: 트랙마다 <이름>_audio/a<n>/audio.m3u8 을 한 번만 생성 (AAC 는 복사)
+# 같은 원본의 다른 해상도는 이미 만들어진 트랙을 그대로 사용한다.
+# quiet 면 ffmpeg 통계 출력을 끔 (series_batch 의 시즌 진행률과 섞이지 않도록)
+def encode_shared_audio(input_file, output_folder, base_name, streams, single_file=False, quiet=False):
+    audio_root = os.path.join(output_folder, f"{base_name}_audio")
+    playlists = [os.path.join(audio_root, f"a{i}", 'audio.m3u8') for i in range(len(streams))]
+    if all(_playlist_finished(p) for p in playlists):
+        print(f"  Shared audio already exists: {audio_root}")
+        return
+
+    cmd = ['ffmpeg', '-y', '-i', input_file]
+    for stream, playlist in zip(streams, playlists):
+        os.makedirs(os.path.dirname(playlist), exist_ok=True)
+        if stream['codec'] == 'aac':
+            codec = ['-c:a', 'copy']
+        else:
+            codec = ['-c:a', 'aac', '-b:a', '384k' if stream['channels'] > 2 else '192k']
+        if single_file:
+            segment_args = hls_single_file.single_file_args(playlist)
+        else:
+            segment_args = ['-hls_segment_filename', os.path.join(os.path.dirname(playlist), 'segment_%03d.ts')]
+        cmd += ['-map', f"0:{stream['index']}", *codec,
+                '-f', 'hls', '-hls_time', '10', '-hls_playlist_type', 'vod',
+                *segment_args, playlist]
+    print(f"  Encoding {len(streams)} shared audio track(s)...")
+    run_ffmpeg(cmd, quiet=quiet)
+    for playlist in playlists:
+        hls_single_file.finalize_playlist(playlist)  # 세그먼트 URL 버전 추가
+
+# playlist 의 따옴표 문자열 값에는 '"' 와 줄바꿈이 들어갈 수 없음 (routes/streaming.js 의 audioMediaLines 와 동일)
+def _quoted_value(value):
+    return str(value).replace('"', "'").replace('\r', ' ').replace('\n', ' ')
+
+def audio_media_lines(audio_key, streams):
+    lines, used = [], set()
+    for i, stream in enumerate(streams):
+        name = stream['title'] or LANGUAGE_NAMES.get(stream['language'], f"Audio {i + 1}")
+        if name in used:
+            name = f"{name} ({i + 1})"
+        used.add(name)
+        default = 'YES' if i == 0 else 'NO'
+        lines.append(
+            f'#EXT-X-MEDIA:TYPE=AUDIO,GROUP-ID="aud",NAME="{_quoted_value(name)}",LANGUAGE="{_quoted_value(stream["language"])}",'
+            f'DEFAULT={default},AUTOSELECT=YES,CHANNELS="{stream["channels"]}",'
+            f'URI="hls/{audio_key}_audio/a{i}/audio.m3u8"'
+        )
+    return lines
+
+def choose_rate_args(input_file, resolution):
+    """encode_optimizer 결정 로그에 같은 원본 기록이 있으면 재사용, 없으면 샘플 분석 후 기록.
+    한 번에 한 해상도만 만들므로 해상도 생략(recommended)은 적용하지 않는다."""
+    decision = encode_optimizer.find_decision(input_file, resolution)
+    if decision is None:
+        print(f"Analyzing {input_file} for per-title CRF ({resolution})...")
+        decision = encode_optimizer.optimize(input_file, rungs=[resolution])
+        encode_optimizer.log_decision(decision)
+    rung = decision['rungs'].get(resolution)
+    if rung is None:
+        # 원본 해상도가 더 낮아 분석에서 제외된 경우
+        rung = next(iter(decision['rungs'].values()))
+    print(f"  CRF {rung['crf']}, maxrate {rung['maxrateKbps']}kbps ({decision['metric']} {rung['quality']})")
+    return encode_optimizer.rate_args(rung), rung['maxrateKbps'] * 1000
+
+# ffmpeg 실행. progress 가 있으면 -progress 출력을 읽어 인코딩된 시간(초)을 콜백으로 전달
+# quiet 면 진행률 없이 통계 출력만 끔 (오류는 그대로 출력)
+def run_ffmpeg(cmd, progress=None, quiet=False):
+    if progress is None:
+        if quiet:
+            cmd = [cmd[0], '-nostats', '-loglevel', 'error', *cmd[1:]]
+        subprocess.run(cmd, check=True)
+        return
+    cmd = [cmd[0], '-nostats', '-loglevel', 'error', '-progress', 'pipe:1', *cmd[1:]]
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True) as proc:
+        for line in proc.stdout:
+            if line.startswith('out_time_us='):
+                try:
+                    progress(int(line.split('=', 1)[1]) / 1_000_000)
+                except ValueError:
+                    pass
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
+
 # HLS 트랜스코딩 함수
-def transcode_to_hls(input_file, output_folder, resolution="720p"):
+# audio_streams / rate 를 넘기면 probe 와 CRF 결정을 건너뜀 (series_batch.py 가 시즌 단위로 한 번만 계산)
+# 성공하면 True
+def transcode_to_hls(input_file, output_folder, resolution="720p", shared_audio=False, optimize=False,
+                     single_file=False, audio_streams=None, rate=None, progress=None):
     # 입력 파일의 이름 및 확장자 제거
     base_name = Path(input_file).stem
+    folder_name = f"{base_name}_{resolution}"
+    # master 안의 URI 용 (hls/ 아래 하위 폴더 포함)
+    url_folder = hls_url_dir(output_folder, folder_name)
     # HLS 파일이 저장될 경로 설정
-    hls_output_path = os.path.join(output_folder, f"{base_name}_{resolution}")
+    hls_output_path = os.path.join(output_folder, folder_name)
+
+    rate_args, bandwidth = ['-crf', '20'], 2000000
+    if rate is not None:
+        rate_args, bandwidth = rate
+    elif optimize:
+        try:
+            rate_args, bandwidth = choose_rate_args(input_file, resolution)
+        except (subprocess.CalledProcessError, RuntimeError, ValueError) as e:
+            print(f"  Warning: Per-title analysis failed ({e}). Using CRF 20.")
 
     # 출력 폴더가 없으면 생성
     os.makedirs(hls_output_path, exist_ok=True)
 
-    # FFmpeg 명령어
+    # FFmpeg 명령어 (리스트 인자이므로 경로에 따옴표를 붙이지 않음)
     ffmpeg_cmd = [
-        'ffmpeg', '-i', f'"{input_file}"',
+        'ffmpeg', '-i', input_file,
         '-vf', f"scale=-1:{720 if resolution == '720p' else 1080}",  # 해상도 설정
         '-c:v', 'libx264', 
-        '-crf', '20',
+        *rate_args,
         '-preset', 'veryfast',
+        *encode_optimizer.keyframe_args(10),  # 세그먼트 경계(10초)마다 키프레임 강제
         '-hls_time', '10',  # 10초 간격으로 세그먼트 생성
         '-hls_playlist_type', 'event',
-        '-hls_segment_filename', os.path.join(hls_output_path, 'segment_%03d.ts'),
-        '-hls_base_url', f'"hls/{base_name}_{resolution}/"',
-        os.path.join(hls_output_path, 'master.m3u8')  # 최종 출력 파일
     ]
 
+    if not shared_audio:
+        audio_streams = []
+    elif audio_streams is None:
+        try:
+            audio_streams = probe_audio_streams(input_file)
+        except (subprocess.CalledProcessError, ValueError) as e:
+            print(f"  Warning: Could not probe audio streams ({e}). Muxing audio into the variant.")
+            audio_streams = []
+
+    # 공유 오디오면 비디오만 video.m3u8 로 인코딩하고 master 에서 오디오 그룹을 참조
+    media_playlist = os.path.join(hls_output_path, 'video.m3u8' if audio_streams else 'master.m3u8')
+    if single_file:
+        # 세그먼트 파일 대신 렌디션당 미디어 파일 하나 + #EXT-X-BYTERANGE
+        ffmpeg_cmd += hls_single_file.single_file_args(media_playlist)
+    else:
+        ffmpeg_cmd += ['-hls_segment_filename', os.path.join(hls_output_path, 'segment_%03d.ts')]
+
+    if audio_streams:
+        ffmpeg_cmd += ['-an', media_playlist]
+    else:
+        ffmpeg_cmd += ['-hls_base_url', f"hls/{url_folder}/", media_playlist]
+
     # FFmpeg 실행
     try:
+        if audio_streams:
+            encode_shared_audio(input_file, output_folder, base_name, audio_streams, single_file,
+                                quiet=progress is not None)
+
         print(f"Transcoding {input_file} to HLS ({resolution})...")
-        subprocess.run(ffmpeg_cmd, check=True)
+        run_ffmpeg(ffmpeg_cmd, progress)
+        # 인코딩이 끝났으므로 EVENT playlist 를 VOD 로 마감 (세그먼트 URL 에 버전 추가)
+        hls_single_file.finalize_playlist(media_playlist)
         print(f"Completed: {input_file}")
+
+        if audio_streams:
+            width = '1280x720' if resolution == '720p' else '1920x1080'
+            master = ['#EXTM3U', *audio_media_lines(hls_url_dir(output_folder, base_name), audio_streams),
+                      f'#EXT-X-STREAM-INF:BANDWIDTH={bandwidth},RESOLUTION={width},AUDIO="aud"',
+                      f'hls/{url_folder}/video.m3u8']
+            with open(os.path.join(hls_output_path, 'master.m3u8'), 'w', encoding='utf-8') as f:
+                f.write('\n'.join(master) + '\n')
         
         # 자막 파일 확인 및 처리
         base_path = os.path.splitext(input_file)[0]
@@ -104,13 +305,16 @@ def transcode_to_hls(input_file, output_folder, resolution="720p"):
             if os.path.exists(sub_path):
                 process_hls_subtitles(hls_output_path, sub_path)
                 break
+        return True
                 
     except subprocess.CalledProcessError as e:
         print(f"Error transcoding {input_file}: {e}")
+        return False
+
 def ConvertSubscription(input_file, output_folder):
     base_name = Path(input_file).stem
 
-    command = f'ffmpeg -i "{input_file}" "{os.path.join(output_folder,base_name+".vtt")}"'
+    command = ['ffmpeg', '-i', input_file, os.path.join(output_folder, base_name + ".vtt")]
 
         # FFmpeg 실행
     try:
@@ -122,14 +326,15 @@ def ConvertSubscription(input_file, output_folder):
     pass
 
 # 폴더 내 모든 파일에 대해 HLS 트랜스코딩
-def transcode_folder(input_folder, output_folder, resolution="720p"):
+def transcode_folder(input_folder, output_folder, resolution="720p", shared_audio=False, optimize=False,
+                     single_file=False):
     # 입력 폴더에서 비디오 파일을 찾음 (mp4 확장자 기준으로 검색)
   
     for root, dirs, files in os.walk(input_folder):
         for file_name in files:
             input_file = os.path.join(root, file_name)
             if os.path.isfile(input_file) and file_name.endswith(('.mp4', '.mkv', '.avi', '.mov')):
-                transcode_to_hls(input_file, output_folder, resolution)
+                transcode_to_hls(input_file, output_folder, resolution, shared_audio, optimize, single_file)
             elif os.path.isfile(input_file) and file_name.endswith(('.smi','.srt')):
                 ConvertSubscription(input_file, output_folder)
 
@@ -138,9 +343,12 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="HLS 트랜스코딩 프로그램")
     parser.add_argument("input_folder", help="입력 비디오 파일이 있는 폴더 경로")
     parser.add_argument("output_folder", help="HLS 파일을 저장할 폴더 경로")
-    parser.add_argument("--resolution", default="720p", choices=["720p", "1080p"], help="출력 해상도 (기본값: 720p)")
+    parser.add_argument("--resolution", default="720p", choices=RESOLUTIONS, help="출력 해상도 (기본값: 720p)")
+    parser.add_argument("--shared-audio", action="store_true", help="오디오 트랙을 <이름>_audio/ 에 한 번만 만들고 모든 해상도가 공유")
+    parser.add_argument("--optimize", action="store_true", help="샘플 구간 분석으로 작품별 CRF/최대 비트레이트를 결정 (encode_optimizer.py)")
+    parser.add_argument("--single-file", action="store_true", help="세그먼트 파일 대신 렌디션당 미디어 파일 하나(#EXT-X-BYTERANGE)로 출력")
     
     args = parser.parse_args()
 
     # 입력 폴더의 모든 파일에 대해 트랜스코딩 수행
-    transcode_folder(args.input_folder, args.output_folder, args.resolution)
+    transcode_folder(args.input_folder, args.output_folder, args.resolution, args.shared_audio, args.optimize, args.single_file)
@@ -2,10 +2,13 @@ import os
 import sys
 import subprocess
 
-def convert_files(base_name):
-    # 현재 스크립트가 있는 폴더
-    folder = os.path.dirname(os.path.abspath(__file__))
-    files = os.listdir(folder)
+import media_index
+
+def convert_files(base_name, folder=None):
+    # 기본: 현재 스크립트가 있는 폴더
+    folder = folder or os.path.dirname(os.path.abspath(__file__))
+    # uploads/ 아래 폴더면 미디어 인덱스를, 아니면 scandir 한 번으로 목록을 얻음
+    files = media_index.list_files(folder, media_index.load_index())
     
     # 대상 파일 찾기
     matched_files = [f for f in files if base_name in f]
@@ -48,7 +51,7 @@ def convert_files(base_name):
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python MF.py <base_filename>")
+        print("Usage: python MF.py <base_filename> [folder]")
         sys.exit(1)
     base_name = sys.argv[1]
-    convert_files(base_name)
+    convert_files(base_name, sys.argv[2] if len(sys.argv) > 2 else None)
@@ -4,6 +4,11 @@ import subprocess
 import sys
 import math
 
+import hls_single_file
+import media_index
+from cuestore import read_vtt, write_vtt
+from hls_layout import RENDITION_RE
+
 # Configuration
 UPLOADS_DIR = 'uploads'
 HLS_DIR = 'hls'
@@ -14,37 +19,36 @@ def get_resolution(dirname):
     if '4k' in dirname or '2160p' in dirname: return '3840x2160'
     return '1920x1080' # Default
 
-def process_directory(dirname):
+SUPPORTED_LANGS = [
+    {'code': 'ko', 'name': 'Korean'},
+    {'code': 'en', 'name': 'English'},
+    {'code': 'ja', 'name': 'Japanese'},
+    {'code': 'zh', 'name': 'Chinese'}
+]
+
+def process_directory(dirname, source):
     dir_path = os.path.join(HLS_DIR, dirname)
     if not os.path.isdir(dir_path): return
 
     # Extract filename (remove resolution suffix)
     # Format: name_resolution
-    match = re.match(r'(.+)_(1080p|720p|4k|2160p)$', dirname)
+    match = RENDITION_RE.match(dirname)
     if not match: return
     
     filename = match.group(1)
     resolution_str = match.group(2)
     
-    # Find subtitles
+    # Find subtitles from the media index
+    # (filename.vtt = Korean default, filename.lang.vtt = additional languages)
     found_subtitles = []
-    
-    # 1. Default Korean (filename.vtt)
-    default_vtt_path = os.path.join(UPLOADS_DIR, filename + '.vtt')
-    if os.path.exists(default_vtt_path):
-        found_subtitles.append({'lang': 'ko', 'name': 'Korean', 'file': default_vtt_path, 'isDefault': True})
-    
-    # 2. Additional languages (filename.lang.vtt)
-    supported_langs = [
-        {'code': 'en', 'name': 'English'},
-        {'code': 'ja', 'name': 'Japanese'},
-        {'code': 'zh', 'name': 'Chinese'}
-    ]
-    
-    for l in supported_langs:
-        lang_vtt_path = os.path.join(UPLOADS_DIR, f"{filename}.{l['code']}.vtt")
-        if os.path.exists(lang_vtt_path):
-            found_subtitles.append({'lang': l['code'], 'name': l['name'], 'file': lang_vtt_path, 'isDefault': False})
+    for l in SUPPORTED_LANGS:
+        sub = source['subtitles'].get(l['code'])
+        if sub:
+            found_subtitles.append({
+                'lang': l['code'], 'name': l['name'],
+                'file': os.path.join(media_index.ROOT_DIR, sub['path']),
+                'isDefault': l['code'] == 'ko'
+            })
             
     if not found_subtitles:
         print(f"No subtitles found for {dirname}")
@@ -70,32 +74,24 @@ def process_directory(dirname):
 
     print(f"Processing {dirname}...")
     
-    # Get video duration and start time from segment_000.ts (more accurate for HLS)
+    # Get video duration and start time from the first segment (more accurate for HLS)
+    # (segment_000.ts, or the single media file in byte-range mode)
     duration = 0
     start_pts = 0
     
     try:
-        segment_0 = os.path.join(dir_path, 'segment_000.ts')
-        if os.path.exists(segment_0):
+        if hls_single_file.first_segment(dir_path):
             # Get Start Time
-            cmd_start = ['ffprobe', '-v', 'error', '-show_entries', 'format=start_time', '-of', 'default=noprint_wrappers=1:nokey=1', segment_0]
-            result_start = subprocess.run(cmd_start, capture_output=True, text=True)
-            try:
-                start_time = float(result_start.stdout.strip())
-                start_pts = int(start_time * 90000)
-            except ValueError:
-                print(f"Could not parse start time from segment_000.ts for {dirname}")
+            start_pts = hls_single_file.probe_start_pts(dir_path)
+            if start_pts is None:
+                print(f"Could not parse start time from the first segment for {dirname}")
                 start_pts = 0
             
             # Get Duration
             # Try to find original video file
-            original_video_extensions = ['.mp4', '.mkv', '.avi', '.mov']
             original_video_path = None
-            for ext in original_video_extensions:
-                p = os.path.join(UPLOADS_DIR, filename + ext)
-                if os.path.exists(p):
-                    original_video_path = p
-                    break
+            if source['videos']:
+                original_video_path = os.path.join(media_index.ROOT_DIR, source['videos'][0]['path'])
             
             if original_video_path:
                 cmd_dur = ['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=noprint_wrappers=1:nokey=1', original_video_path]
@@ -121,7 +117,7 @@ def process_directory(dirname):
             print(f"Detected start PTS: {start_pts}, Duration: {duration}")
             
         else:
-            print("segment_000.ts not found, cannot sync subtitles accurately.")
+            print("First segment not found, cannot sync subtitles accurately.")
             return
 
     except Exception as e:
@@ -140,21 +136,8 @@ def process_directory(dirname):
         try:
             print(f"Processing subtitles for {sub['lang']}...")
             
-            # 1. Read VTT and add Header
-            with open(sub['file'], 'r', encoding='utf-8') as f:
-                vtt_content = f.read()
-            
-            lines = vtt_content.split('\n')
-            if lines and lines[0].strip().startswith('WEBVTT'):
-                # Remove existing header if any
-                lines = [l for l in lines if not l.startswith('X-TIMESTAMP-MAP')]
-                # Insert new header
-                lines.insert(1, f"X-TIMESTAMP-MAP=MPEGTS:{start_pts},LOCAL:00:00:00.000")
-                vtt_content = '\n'.join(lines)
-            
-            # 2. Write modified VTT
-            with open(full_sub_path, 'w', encoding='utf-8') as f:
-                f.write(vtt_content)
+            # 1-2. Read VTT and write it with a fresh X-TIMESTAMP-MAP header
+            write_vtt(read_vtt(sub['file']), full_sub_path, timestamp_map=start_pts)
                 
             # 3. Create subs m3u8 (Single Segment)
             m3u8_content = f"""#EXTM3U
@@ -239,14 +222,13 @@ def main():
         print(f"Error: {HLS_DIR} directory not found.")
         return
 
-    for dirname in os.listdir(HLS_DIR):
-        if target_name:
-            # Check if this directory matches the target name
-            match = re.match(r'(.+)_(1080p|720p|4k|2160p)$', dirname)
-            if match and match.group(1) == target_name:
-                process_directory(dirname)
-        else:
-            process_directory(dirname)
+    # uploads/, hls/ 를 폴더마다 다시 뒤지지 않도록 미디어 인덱스를 갱신해서 사용
+    index = media_index.refresh()
+    for key, source in sorted(index['sources'].items()):
+        if target_name and target_name not in (key, os.path.basename(key)):
+            continue
+        for rendition in source['renditions'].values():
+            process_directory(rendition['folder'][len('hls/'):], source)
 
 if __name__ == '__main__':
     main()
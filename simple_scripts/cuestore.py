@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+자막 큐 저장소 및 SMI/SRT/VTT 입출력 공용 모듈.
+
+CueStore 는 큐를 dict 목록 대신 시작/종료 시각(ms) 정수 배열 두 개와 텍스트 목록으로
+보관합니다. 배치 작업에서 수십만 개의 큐를 다뤄도 메모리가 작고, shift/scale/clip 은
+numpy 가 있으면 배열 전체에 대해 한 번에 수행됩니다(없으면 순수 Python 으로 동작).
+
+쓰기는 파일 하나를 문자열 하나로 만들어 한 번에 기록합니다.
+
+사용 예:
+  from cuestore import read_file, write_vtt
+  tracks = read_file(Path("movie.smi"))      # {'ko': CueStore, 'en': CueStore}
+  write_vtt(tracks['ko'].shift(1500), Path("movie.vtt"))
+"""
+
+import html
+import re
+from array import array
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+LANG_CODES = ('ko', 'en', 'ja', 'zh')
+
+# -----------------------------
+# 인코딩 판별
+# -----------------------------
+DEFAULT_CANDIDATES = [
+    "cp949",      # 한국어 ANSI 추정
+    "euc-kr",     # EUC-KR
+    "utf-8",      # UTF-8 (BOM 없음)
+    "utf-8-sig",  # UTF-8 BOM
+    "latin-1",    # 마지막 안전망
+]
+
+def detect_encoding(file_path: Path, candidates: List[str]) -> Tuple[str, str]:
+    """
+    파일을 읽어 디코딩에 성공한 (인코딩명, 디코딩된 문자열)을 반환.
+    """
+    data = file_path.read_bytes()
+    if data.startswith(b"\xef\xbb\xbf"):
+        return "utf-8-sig", data.decode("utf-8-sig")
+
+    for enc in candidates:
+        try:
+            text = data.decode(enc)
+            return enc, text
+        except UnicodeDecodeError:
+            continue
+
+    return "latin-1", data.decode("latin-1", errors="replace")
+
+# -----------------------------
+# 큐 저장소
+# -----------------------------
+class CueStore:
+    """시작/종료 시각(ms) 병렬 배열 + 텍스트 테이블."""
+
+    __slots__ = ('starts', 'ends', 'texts', 'settings', 'ids', 'notes', 'header', 'trailer')
+
+    def __init__(self):
+        self.starts = array('q')
+        self.ends = array('q')
+        self.texts: List[str] = []
+        self.settings: List[str] = []   # VTT 큐 설정 (예: "align:start"), 없으면 ''
+        self.ids: List[str] = []        # VTT 큐 ID, 없으면 '' (SRT 번호는 쓸 때 다시 매김)
+        self.notes: List[str] = []      # 큐 바로 앞의 VTT NOTE 블록들, 없으면 ''
+        self.header: List[str] = []     # VTT 헤더 줄 (WEBVTT 다음 줄들, STYLE 블록 등)
+        self.trailer: List[str] = []    # 마지막 큐 뒤의 NOTE 블록
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def __iter__(self) -> Iterator[Tuple[int, int, str]]:
+        return zip(self.starts, self.ends, self.texts)
+
+    def append(self, start: int, end: int, text: str, setting: str = '',
+               cue_id: str = '', note: str = '') -> None:
+        self.starts.append(start)
+        self.ends.append(end)
+        self.texts.append(text)
+        self.settings.append(setting)
+        self.ids.append(cue_id)
+        self.notes.append(note)
+
+    # --- 일괄 시간 연산 (in-place, self 반환) ---
+    def _apply(self, fn) -> 'CueStore':
+        if np is not None and len(self):
+            for arr in (self.starts, self.ends):
+                view = np.frombuffer(arr, dtype=np.int64)
+                view[:] = fn(view)
+        else:
+            for name in ('starts', 'ends'):
+                setattr(self, name, array('q', (fn(v) for v in getattr(self, name))))
+        return self
+
+    def shift(self, ms: int) -> 'CueStore':
+        """모든 큐를 ms 만큼 이동."""
+        return self._apply(lambda v: v + int(ms))
+
+    def scale(self, factor: float, origin: int = 0) -> 'CueStore':
+        """origin 기준으로 시간축을 factor 배 (프레임레이트/배속 차이 보정)."""
+        if np is not None:
+            return self._apply(lambda v: np.rint(origin + (v - origin) * factor).astype(np.int64))
+        return self._apply(lambda v: int(round(origin + (v - origin) * factor)))
+
+    def clip(self, lo: int = 0, hi: Optional[int] = None) -> 'CueStore':
+        """[lo, hi] 범위로 자르고 길이가 0 이하가 된 큐는 제거."""
+        upper = hi if hi is not None else max(self.ends, default=lo)
+        self._apply(lambda v: (np.clip(v, lo, upper) if np is not None else min(max(v, lo), upper)))
+        keep = [i for i, (s, e) in enumerate(zip(self.starts, self.ends)) if e > s]
+        if len(keep) != len(self):
+            self._take(keep)
+        return self
+
+    def sort(self) -> 'CueStore':
+        order = sorted(range(len(self)), key=self.starts.__getitem__)
+        self._take(order)
+        return self
+
+    def _take(self, indices: List[int]) -> None:
+        self.starts = array('q', (self.starts[i] for i in indices))
+        self.ends = array('q', (self.ends[i] for i in indices))
+        self.texts = [self.texts[i] for i in indices]
+        self.settings = [self.settings[i] for i in indices]
+        self.ids = [self.ids[i] for i in indices]
+        self.notes = [self.notes[i] for i in indices]
+
+# -----------------------------
+# 시간 형식
+# -----------------------------
+def ms_to_timestamp(ms: int, separator: str = '.') -> str:
+    """밀리초를 HH:MM:SS.mmm (VTT) 또는 HH:MM:SS,mmm (SRT) 형식으로 변환"""
+    seconds, milliseconds = divmod(ms, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02}:{minutes:02}:{seconds:02}{separator}{milliseconds:03}"
+
+TIMING_RE = re.compile(
+    r'(?:(\d+):)?(\d{1,2}):(\d{2})[.,](\d{1,3})\s*-->\s*(?:(\d+):)?(\d{1,2}):(\d{2})[.,](\d{1,3})(.*)'
+)
+
+def _to_ms(h, m, s, ms) -> int:
+    return ((int(h or 0) * 60 + int(m)) * 60 + int(s)) * 1000 + int(ms.ljust(3, '0'))
+
+# -----------------------------
+# SMI
+# -----------------------------
+def clean_smi_text(text: str) -> str:
+    """SMI 텍스트 정제: 태그 제거, 엔티티 변환, 줄바꿈 정리"""
+    if not text:
+        return ""
+
+    # 1. <br>을 임시 마커로 변경 (공백을 둬서 붙어있는 텍스트 분리 방지)
+    text = re.sub(r'<br\s*/?>', ' __BR__ ', text, flags=re.IGNORECASE)
+
+    # 2. 기타 태그 제거
+    text = re.sub(r'<[^>]+>', '', text)
+
+    # 3. HTML 엔티티 디코딩 (&nbsp; 등)
+    text = html.unescape(text)
+
+    # 4. 모든 공백(줄바꿈, 탭 포함)을 단일 공백으로 치환 (HTML 렌더링 규칙)
+    #    SMI 파일 내의 소스 줄바꿈은 실제 줄바꿈이 아닌 공백으로 처리되어야 함
+    text = re.sub(r'\s+', ' ', text)
+
+    # 5. 마커를 실제 줄바꿈으로 복원
+    text = text.replace(' __BR__ ', '\n').replace('__BR__', '\n')
+
+    # 6. 각 줄의 앞뒤 공백 제거 및 빈 줄 제거 (연속된 줄바꿈 방지)
+    lines = [line.strip() for line in text.split('\n')]
+    text = '\n'.join([l for l in lines if l])
+
+    return text.strip()
+
+def parse_smi(content: str) -> Dict[str, CueStore]:
+    """
+    SMI 내용을 파싱하여 언어별 큐 저장소를 반환.
+    반환: { 'ko': CueStore, 'en': CueStore, ... }
+    """
+
+    # 1. 언어 클래스 매핑 (CSS 스타일 파싱)
+    # 기본 매핑
+    lang_map = {
+        'KRCC': 'ko', 'KORCC': 'ko', 'KO': 'ko', 'KOREAN': 'ko',
+        'ENCC': 'en', 'ENGCC': 'en', 'EN': 'en', 'ENGLISH': 'en',
+        'JACC': 'ja', 'JPCC': 'ja', 'JP': 'ja', 'JAPANESE': 'ja',
+        'CHCC': 'zh', 'CNCC': 'zh',
+    }
+    class_map = {}
+
+    style_match = re.search(r'<STYLE[^>]*>(.*?)</STYLE>', content, re.IGNORECASE | re.DOTALL)
+    if style_match:
+        style_content = style_match.group(1)
+        for match in re.finditer(r'\.(\w+)\s*\{([^}]+)\}', style_content):
+            cls_name = match.group(1).upper()
+            props = match.group(2)
+
+            # lang: ko-KR 찾기
+            lang_match = re.search(r'lang:\s*([a-zA-Z-]+)', props, re.IGNORECASE)
+            if lang_match:
+                code = lang_match.group(1).split('-')[0].lower()
+                # 언어 코드 정규화 (kr -> ko, kor -> ko 등)
+                if code in ['kr', 'kor', 'korean', 'korea']: code = 'ko'
+                elif code in ['eng', 'english']: code = 'en'
+                elif code in ['jp', 'jap', 'japanese', 'japan']: code = 'ja'
+                elif code in ['ch', 'chn', 'chinese', 'china']: code = 'zh'
+
+                class_map[cls_name] = code
+            elif cls_name in lang_map:
+                class_map[cls_name] = lang_map[cls_name]
+
+    # 클래스가 명시되지 않은 경우를 대비해 기본값 설정
+    if not class_map:
+        # KRCC, ENCC가 본문에만 있을 수도 있으므로 기본 매핑 추가
+        class_map.update(lang_map)
+
+    # 2. Sync 파싱
+    # <SYNC Start=1000> ...
+    fragments = re.split(r'<SYNC', content, flags=re.IGNORECASE)
+
+    # 언어별 (start_time, text) 리스트
+    # tracks_raw['ko'] = [ (1000, "Hello"), (2000, "&nbsp;"), ... ]
+    tracks_raw = {}
+
+    for fragment in fragments[1:]: # 첫 번째는 헤더 부분이므로 스킵
+        match = re.match(r'\s*Start\s*=\s*(\d+)[^>]*>(.*)', fragment, re.IGNORECASE | re.DOTALL)
+        if not match:
+            continue
+
+        start_ms = int(match.group(1))
+        body = match.group(2)
+
+        # <P Class=KRCC> 텍스트 추출
+        # <P> 태그로 분리
+        p_parts = re.split(r'<P', body, flags=re.IGNORECASE)
+
+        # P 태그가 없는 경우 (단일 언어 또는 잘못된 포맷)
+        # 본문 전체를 'default' 또는 'ko'로 간주
+        if len(p_parts) == 1 and p_parts[0].strip():
+             text = clean_smi_text(p_parts[0])
+             lang = 'ko' # 기본값 한국어
+             if lang not in tracks_raw: tracks_raw[lang] = []
+             tracks_raw[lang].append((start_ms, text))
+             continue
+
+        for part in p_parts:
+            part = part.strip()
+            if not part: continue
+
+            # Class 확인
+            cls_match = re.match(r'\s*Class\s*=\s*(\w+)[^>]*>(.*)', part, re.IGNORECASE | re.DOTALL)
+            if cls_match:
+                cls_name = cls_match.group(1).upper()
+                raw_text = cls_match.group(2)
+                lang = class_map.get(cls_name, 'ko') # 알 수 없는 클래스는 한국어로 가정
+            else:
+                # Class 속성이 없는 P 태그 -> 기본 언어(ko)
+                if part.startswith('>'): # <P>Text 형태
+                    raw_text = part[1:]
+                else:
+                    raw_text = part
+                lang = 'ko'
+
+            text = clean_smi_text(raw_text)
+            if lang not in tracks_raw: tracks_raw[lang] = []
+            tracks_raw[lang].append((start_ms, text))
+
+    # 3. 큐 생성 (Start, End, Text)
+    final_tracks = {}
+
+    for lang, events in tracks_raw.items():
+        store = CueStore()
+        # 시간순 정렬
+        events.sort(key=lambda x: x[0])
+
+        for i in range(len(events)):
+            start, text = events[i]
+
+            # 텍스트가 없거나 공백(&nbsp; 변환됨)이면 자막이 없는 구간(종료점)으로 간주
+            if not text:
+                continue
+
+            # 종료 시간 결정: 다음 이벤트의 시작 시간
+            if i < len(events) - 1:
+                end = events[i+1][0]
+            else:
+                end = start + 3000 # 마지막 자막은 3초 유지
+
+            # 유효하지 않은 구간 스킵
+            if end <= start:
+                continue
+
+            store.append(start, end, text)
+
+        if len(store):
+            final_tracks[lang] = store
+
+    return final_tracks
+
+# -----------------------------
+# SRT / VTT
+# -----------------------------
+def parse_timed_text(content: str) -> CueStore:
+    """
+    SRT 또는 VTT 내용을 파싱. VTT 헤더와 STYLE/REGION 블록은 store.header 에,
+    큐 ID 와 NOTE 블록은 store.ids / store.notes (마지막 큐 뒤는 store.trailer) 에 보관해
+    format_vtt 로 다시 쓸 때 그대로 남도록 함.
+    """
+    store = CueStore()
+    is_vtt = False
+    pending_notes: List[str] = []
+    blocks = re.split(r'\n[ \t]*\n', content.replace('\r\n', '\n').replace('\r', '\n'))
+    for n, block in enumerate(blocks):
+        lines = block.strip('\n').split('\n')
+        if not lines or not lines[0].strip():
+            continue
+        if n == 0 and lines[0].lstrip('\ufeff').startswith('WEBVTT'):
+            is_vtt = True
+            store.header.extend(l for l in lines[1:] if l.strip())
+            continue
+        if is_vtt and re.match(r'NOTE(\s|$)', lines[0]):
+            pending_notes.append('\n'.join(lines))
+            continue
+        # 큐 번호(SRT) 또는 큐 ID(VTT)는 타이밍 줄 앞에 한 줄까지 허용
+        for i, line in enumerate(lines[:2]):
+            m = TIMING_RE.match(line.strip())
+            if m:
+                g = m.groups()
+                cue_id = lines[0] if is_vtt and i == 1 else ''
+                store.append(_to_ms(*g[:4]), _to_ms(*g[4:8]), '\n'.join(lines[i + 1:]), g[8].strip(),
+                             cue_id, '\n\n'.join(pending_notes))
+                pending_notes = []
+                break
+        else:
+            if not len(store) and lines[0].startswith(('STYLE', 'REGION')):
+                store.header.append('\n' + '\n'.join(lines))
+    store.trailer = pending_notes
+    return store
+
+def track_lang(path: Path) -> str:
+    """name.en.vtt -> 'en', name.vtt -> 'ko' (smiToVtt 파일명 규칙)"""
+    lang = Path(path.stem).suffix[1:]
+    return lang if lang in LANG_CODES else 'ko'
+
+def read_file(path: Path, candidates: Optional[List[str]] = None) -> Dict[str, CueStore]:
+    """확장자에 따라 SMI/SRT/VTT 를 읽어 언어별 CueStore 를 반환."""
+    _, content = detect_encoding(path, candidates or DEFAULT_CANDIDATES)
+    if path.suffix.lower() == '.smi':
+        return parse_smi(content)
+    store = parse_timed_text(content)
+    return {track_lang(path): store} if len(store) else {}
+
+def read_vtt(path: Path) -> CueStore:
+    return parse_timed_text(Path(path).read_text(encoding='utf-8-sig'))
+
+# -----------------------------
+# 쓰기 (파일당 한 번의 write)
+# -----------------------------
+def format_srt(store: CueStore) -> str:
+    parts = []
+    for i, (start, end, text) in enumerate(store, 1):
+        parts.append(f"{i}\n{ms_to_timestamp(start, ',')} --> {ms_to_timestamp(end, ',')}\n{text}\n\n")
+    return ''.join(parts)
+
+def format_vtt(store: CueStore, timestamp_map: Optional[int] = None) -> str:
+    """timestamp_map 이 주어지면 X-TIMESTAMP-MAP 헤더를 해당 MPEGTS 값으로 교체."""
+    header = [l for l in store.header if timestamp_map is None or not l.startswith('X-TIMESTAMP-MAP')]
+    if timestamp_map is not None:
+        header.insert(0, f"X-TIMESTAMP-MAP=MPEGTS:{timestamp_map},LOCAL:00:00:00.000")
+    parts = ["WEBVTT\n"]
+    parts.extend(f"{l}\n" for l in header)
+    parts.append("\n")
+    for start, end, text, setting, cue_id, note in zip(store.starts, store.ends, store.texts,
+                                                       store.settings, store.ids, store.notes):
+        if note:
+            parts.append(f"{note}\n\n")
+        timing = f"{ms_to_timestamp(start)} --> {ms_to_timestamp(end)}"
+        if setting:
+            timing += ' ' + setting
+        if cue_id:
+            timing = f"{cue_id}\n{timing}"
+        parts.append(f"{timing}\n{text}\n\n")
+    parts.extend(f"{note}\n\n" for note in store.trailer)
+    return ''.join(parts)
+
+def write_srt(store: CueStore, path: Path) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(format_srt(store))
+
+def write_vtt(store: CueStore, path: Path, timestamp_map: Optional[int] = None) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(format_vtt(store, timestamp_map))
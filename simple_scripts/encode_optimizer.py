@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+작품별(per-title) 인코딩 설정을 고르는 사전 분석 스크립트.
+
+고정 -crf 20 은 단순한 영상에는 비트레이트가 과하고, 노이즈(그레인)가 많은 영화에는 부족합니다.
+이 스크립트는 영상 곳곳에서 짧은 샘플 구간을 뽑아 후보 CRF 로 인코딩해 보고,
+ffmpeg 의 품질 지표(ssim, 또는 libvmaf 가 있으면 vmaf)와 크기를 측정해
+목표 품질을 만족하는 가장 높은 CRF(= 가장 작은 용량)를 해상도별로 고릅니다.
+
+결정 내용(후보별 크기/품질 포함)은 JSON Lines 로컬 로그(encode_decisions.jsonl)에 남겨
+나중에 검토할 수 있고, LocalTranscoding.py --optimize 는 같은 원본이면 이 로그를 재사용합니다.
+
+해상도 사다리:
+  CRF 선택용 품질은 원본을 각 인코딩 해상도로 줄여 비교하므로 해상도 사이의 손실은 반영되지 않습니다.
+  그래서 여러 해상도를 함께 분석하면 해상도별로 고른 CRF 의 샘플을 원본 해상도로 키워 한 번 더 측정하고
+  (sourceQuality), 위 해상도가 비트레이트를 MIN_RUNG_STEP 배 미만만 더 쓰면서 원본 기준 품질이 같거나 높으면
+  아래 해상도를 recommended=False(생략 가능)로 표시합니다. 가장 높은 해상도는 항상 유지합니다.
+  series_batch.py --optimize 는 위 해상도도 만드는 경우에만 이렇게 표시된 해상도를 생략합니다. (redundant_rungs)
+
+세그먼트 경계 정렬:
+  keyframe_args() 는 -force_key_frames expr:gte(t,n_forced*10) 을 반환합니다.
+  HLS 세그먼트가 정확히 10초 경계에서 잘리므로 탐색/시작 속도가 일정해집니다.
+
+사용법:
+  python encode_optimizer.py movie.mp4 [--rungs 1080p 720p] [--metric vmaf] [--target 93]
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DECISION_LOG = os.path.join(ROOT_DIR, 'encode_decisions.jsonl')
+
+SEGMENT_SECONDS = 10
+RUNG_HEIGHTS = {'2160p': 2160, '4k': 2160, '1080p': 1080, '720p': 720}
+DEFAULT_CRFS = [18, 20, 22, 24, 26, 28]
+DEFAULT_TARGETS = {'ssim': 17.0, 'vmaf': 93.0}  # ssim 은 dB (17dB ≈ SSIM 0.98)
+# 위 해상도의 예상 비트레이트가 아래 해상도보다 이 비율 미만만 높고 원본 기준 품질이 같거나 높으면
+# 아래 해상도는 아낄 대역폭이 거의 없으므로 '생략 가능'으로 표시
+MIN_RUNG_STEP = 1.2
+
+SSIM_RE = re.compile(r'All:([\d.]+) \(([\d.]+|inf)\)')
+VMAF_RE = re.compile(r'VMAF score[:=]\s*([\d.]+)')
+
+
+# -----------------------------
+# ffmpeg 옵션
+# -----------------------------
+def keyframe_args(segment_seconds: int = SEGMENT_SECONDS) -> List[str]:
+    """세그먼트 경계마다 키프레임을 강제하는 ffmpeg 옵션."""
+    return ['-force_key_frames', f'expr:gte(t,n_forced*{segment_seconds})']
+
+
+def rate_args(rung: dict) -> List[str]:
+    """결정된 CRF + 최대 비트레이트 제한 (VBV)."""
+    maxrate = int(rung['maxrateKbps'])
+    return ['-crf', str(rung['crf']), '-maxrate', f'{maxrate}k', '-bufsize', f'{maxrate * 2}k']
+
+
+# -----------------------------
+# 측정
+# -----------------------------
+def probe(input_file: str) -> dict:
+    cmd = [
+        'ffprobe', '-v', 'error', '-select_streams', 'v:0',
+        '-show_entries', 'stream=width,height:format=duration', '-of', 'json', input_file
+    ]
+    info = json.loads(subprocess.run(cmd, capture_output=True, text=True, check=True).stdout)
+    stream = (info.get('streams') or [{}])[0]
+    return {
+        'duration': float(info.get('format', {}).get('duration') or 0),
+        'width': int(stream.get('width') or 0),
+        'height': int(stream.get('height') or 0),
+    }
+
+
+def sample_windows(duration: float, count: int, length: float) -> List[float]:
+    """앞뒤 5%(오프닝/엔딩 크레딧)를 제외한 구간에 고르게 분포한 샘플 시작 시각."""
+    if duration <= length:
+        return [0.0]
+    start, end = duration * 0.05, duration * 0.95 - length
+    if end <= start:
+        return [max(0.0, (duration - length) / 2)]
+    step = (end - start) / max(count - 1, 1)
+    return [round(start + i * step, 3) for i in range(count)]
+
+
+def encode_sample(input_file: str, start: float, length: float, height: int, crf: int,
+                  encoder: str, preset: str, out_path: str) -> int:
+    cmd = [
+        'ffmpeg', '-y', '-v', 'error', '-ss', str(start), '-t', str(length), '-i', input_file,
+        '-vf', f'scale=-2:{height}', '-c:v', encoder, '-preset', preset, '-crf', str(crf),
+        *keyframe_args(), '-an', '-f', 'mp4', out_path
+    ]
+    subprocess.run(cmd, check=True)
+    return os.path.getsize(out_path)
+
+
+def measure_quality(input_file: str, start: float, length: float, encoded: str, metric: str,
+                    source_resolution: bool = False) -> float:
+    """원본 구간을 인코딩 결과 해상도로 맞춘 뒤 비교. ssim 은 dB, vmaf 는 0~100.
+    source_resolution 이면 반대로 인코딩 결과를 원본 해상도로 키워 비교 (해상도 사이 비교용)."""
+    compare = 'ssim' if metric == 'ssim' else 'libvmaf'
+    if source_resolution:
+        graph = f'[0:v][1:v]scale2ref=flags=bicubic[dist][ref];[dist][ref]{compare}'
+    else:
+        graph = f'[1:v][0:v]scale2ref=flags=bicubic[ref][dist];[dist][ref]{compare}'
+    cmd = [
+        'ffmpeg', '-v', 'info', '-nostats', '-i', encoded,
+        '-ss', str(start), '-t', str(length), '-i', input_file,
+        '-lavfi', graph, '-f', 'null', '-'
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if metric == 'ssim':
+        match = SSIM_RE.search(result.stderr)
+        if match:
+            return 100.0 if match.group(2) == 'inf' else float(match.group(2))
+    else:
+        match = VMAF_RE.search(result.stderr)
+        if match:
+            return float(match.group(1))
+    raise RuntimeError(f"{metric} 측정 실패 (ffmpeg 빌드에 필터가 있는지 확인): {result.stderr[-300:]}")
+
+
+# -----------------------------
+# 결정
+# -----------------------------
+def optimize(input_file: str, rungs: Optional[List[str]] = None, crfs: Optional[List[int]] = None,
+             metric: str = 'ssim', target: Optional[float] = None, windows: int = 4,
+             window_seconds: float = 8, encoder: str = 'libx264', preset: str = 'veryfast',
+             workers: int = 2) -> dict:
+    if encoder not in ('libx264', 'libx265'):
+        raise ValueError("CRF 분석은 libx264/libx265 에서만 의미가 있습니다.")
+    crfs = sorted(crfs or DEFAULT_CRFS)
+    target = DEFAULT_TARGETS[metric] if target is None else target
+    info = probe(input_file)
+    starts = sample_windows(info['duration'], windows, window_seconds)
+
+    rungs = rungs or ['1080p', '720p']
+    # 원본보다 큰 해상도는 만들지 않음 (약간의 여유 허용)
+    rungs = [r for r in rungs if RUNG_HEIGHTS[r] <= info['height'] * 1.05] or [rungs[-1]]
+
+    decision = {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'source': os.path.abspath(input_file),
+        'size': os.path.getsize(input_file),
+        'mtime': os.path.getmtime(input_file),
+        'duration': info['duration'],
+        'sourceHeight': info['height'],
+        'metric': metric,
+        'target': target,
+        'encoder': encoder,
+        'preset': preset,
+        'windows': starts,
+        'windowSeconds': window_seconds,
+        'keyframeInterval': SEGMENT_SECONDS,
+        'rungs': {},
+    }
+
+    with tempfile.TemporaryDirectory(prefix='encode_opt_') as tmp, ThreadPoolExecutor(max_workers=workers) as pool:
+        def run(rung, crf, i, start):
+            out = os.path.join(tmp, f'{rung}_{crf}_{i}.mp4')
+            size = encode_sample(input_file, start, window_seconds, RUNG_HEIGHTS[rung], crf, encoder, preset, out)
+            quality = measure_quality(input_file, start, window_seconds, out, metric)
+            os.remove(out)
+            return rung, crf, size, quality
+
+        jobs = [pool.submit(run, rung, crf, i, start)
+                for rung in rungs for crf in crfs for i, start in enumerate(starts)]
+        samples: Dict[tuple, list] = {}
+        for job in jobs:
+            rung, crf, size, quality = job.result()
+            samples.setdefault((rung, crf), []).append((size, quality))
+
+    for rung in rungs:
+        candidates = []
+        for crf in crfs:
+            results = samples[(rung, crf)]
+            kbps = [size * 8 / window_seconds / 1000 for size, _ in results]
+            qualities = [q for _, q in results]
+            candidates.append({
+                'crf': crf,
+                'kbps': round(sum(kbps) / len(kbps)),
+                'peakKbps': round(max(kbps)),
+                'qualityMin': round(min(qualities), 3),
+                'qualityMean': round(sum(qualities) / len(qualities), 3),
+            })
+        # 가장 나쁜 샘플도 목표 품질을 넘는 CRF 중 가장 큰 값. 없으면 가장 낮은 CRF.
+        passing = [c for c in candidates if c['qualityMin'] >= target]
+        chosen = max(passing, key=lambda c: c['crf']) if passing else candidates[0]
+        decision['rungs'][rung] = {
+            'crf': chosen['crf'],
+            'kbps': chosen['kbps'],
+            'maxrateKbps': round(chosen['peakKbps'] * 1.5),
+            'quality': chosen['qualityMin'],
+            'meetsTarget': bool(passing),
+            'candidates': candidates,
+        }
+
+    ordered = sorted(decision['rungs'], key=lambda r: RUNG_HEIGHTS[r])
+    for rung in ordered:
+        decision['rungs'][rung]['recommended'] = True
+    if len(ordered) < 2:
+        return decision
+
+    # 해상도 사이 비교: 고른 CRF 의 샘플을 원본 해상도 기준으로 다시 측정
+    with tempfile.TemporaryDirectory(prefix='encode_opt_') as tmp, ThreadPoolExecutor(max_workers=workers) as pool:
+        def run_source(rung, i, start):
+            out = os.path.join(tmp, f'{rung}_src_{i}.mp4')
+            encode_sample(input_file, start, window_seconds, RUNG_HEIGHTS[rung],
+                          decision['rungs'][rung]['crf'], encoder, preset, out)
+            quality = measure_quality(input_file, start, window_seconds, out, metric, source_resolution=True)
+            os.remove(out)
+            return rung, quality
+
+        jobs = [pool.submit(run_source, rung, i, start) for rung in ordered for i, start in enumerate(starts)]
+        source_quality: Dict[str, list] = {}
+        for job in jobs:
+            rung, quality = job.result()
+            source_quality.setdefault(rung, []).append(quality)
+    for rung, qualities in source_quality.items():
+        decision['rungs'][rung]['sourceQuality'] = round(min(qualities), 3)
+
+    # 위 해상도가 비트를 거의 더 쓰지 않으면서 원본 기준 품질이 같거나 높으면 아래 해상도는 생략 가능
+    for lower, upper in zip(ordered, ordered[1:]):
+        lo, up = decision['rungs'][lower], decision['rungs'][upper]
+        lo['recommended'] = not (up['kbps'] < lo['kbps'] * MIN_RUNG_STEP
+                                 and up['sourceQuality'] >= lo['sourceQuality'])
+    return decision
+
+
+def redundant_rungs(decision: dict) -> List[str]:
+    """바로 위 해상도 대비 아낄 대역폭이 거의 없어(recommended=False) 생략할 수 있는 아래 해상도."""
+    return [name for name, rung in decision['rungs'].items() if not rung.get('recommended', True)]
+
+
+# -----------------------------
+# 결정 로그
+# -----------------------------
+def log_decision(decision: dict, path: str = DECISION_LOG) -> None:
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(decision, ensure_ascii=False) + '\n')
+
+
+def find_decision(input_file: str, rung: str, path: str = DECISION_LOG) -> Optional[dict]:
+    """같은 원본(경로/크기/수정시각)에 대해 해당 해상도를 결정한 가장 최근 기록."""
+    if not os.path.exists(path):
+        return None
+    source = os.path.abspath(input_file)
+    size, mtime = os.path.getsize(input_file), os.path.getmtime(input_file)
+    found = None
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if (entry.get('source') == source and entry.get('size') == size
+                    and entry.get('mtime') == mtime and rung in entry.get('rungs', {})):
+                found = entry
+    return found
+
+
+def print_decision(decision: dict) -> None:
+    print(f"{decision['source']} ({decision['duration']:.0f}초, 샘플 {len(decision['windows'])}개 x "
+          f"{decision['windowSeconds']}초, {decision['metric']} 목표 {decision['target']})")
+    for name, rung in decision['rungs'].items():
+        flag = '' if rung['meetsTarget'] else '  (목표 미달: 최저 CRF 사용)'
+        if not rung.get('recommended', True):
+            flag += '  (위 해상도와 비트레이트 차이 적음: 생략 가능)'
+        source = f", 원본 기준 {rung['sourceQuality']}" if 'sourceQuality' in rung else ''
+        print(f"  {name:>6}: CRF {rung['crf']}, 약 {rung['kbps']}kbps, maxrate {rung['maxrateKbps']}kbps, "
+              f"{decision['metric']} {rung['quality']}{source}{flag}")
+        for c in rung['candidates']:
+            print(f"          crf {c['crf']:>2}: {c['kbps']:>6}kbps  min {c['qualityMin']:>7}  mean {c['qualityMean']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="작품별 CRF / 해상도 사다리 사전 분석")
+    parser.add_argument("input", help="원본 영상")
+    parser.add_argument("--rungs", nargs='+', default=['1080p', '720p'], choices=sorted(RUNG_HEIGHTS),
+                        help="분석할 해상도 (기본: 1080p 720p)")
+    parser.add_argument("--crfs", nargs='+', type=int, default=DEFAULT_CRFS, help="후보 CRF 목록")
+    parser.add_argument("--metric", choices=['ssim', 'vmaf'], default='ssim', help="품질 지표 (vmaf 는 libvmaf 필요)")
+    parser.add_argument("--target", type=float, help="목표 품질 (기본: ssim 17dB / vmaf 93)")
+    parser.add_argument("--windows", type=int, default=4, help="샘플 구간 수 (기본: 4)")
+    parser.add_argument("--window-seconds", type=float, default=8, help="샘플 구간 길이(초, 기본: 8)")
+    parser.add_argument("--encoder", default='libx264', choices=['libx264', 'libx265'])
+    parser.add_argument("--preset", default='veryfast')
+    parser.add_argument("--workers", type=int, default=2, help="동시 샘플 인코딩 수 (기본: 2)")
+    parser.add_argument("--log", default=DECISION_LOG, help="결정 로그 경로 (JSON Lines)")
+    args = parser.parse_args()
+
+    try:
+        decision = optimize(args.input, args.rungs, args.crfs, args.metric, args.target, args.windows,
+                            args.window_seconds, args.encoder, args.preset, args.workers)
+    except (subprocess.CalledProcessError, RuntimeError, ValueError) as e:
+        print(f"오류: {e}", file=sys.stderr)
+        sys.exit(1)
+    log_decision(decision, args.log)
+    print_decision(decision)
+    print(f"결정 기록: {args.log}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+hls/ 폴더를 영구 저장소가 아닌 캐시로 관리하는 스크립트.
+
+기능:
+  1) Movie 카탈로그(mainMovie, episodes[].video)에서 참조 인덱스 생성
+  2) 어떤 영화에서도 참조하지 않는 렌디션 폴더(orphan) 삭제
+  3) 용량 제한(--quota-gb)을 넘으면 가장 오래 시청되지 않은 렌디션부터 삭제(LRU)
+
+주의:
+  - 기본은 보고만 하며, 실제 삭제는 --apply 를 지정해야 수행됩니다.
+  - 제거된 렌디션은 /api/stream 요청 시 원본에서 다시 생성됩니다.
+    따라서 uploads/ 에 원본이 없는 렌디션은 LRU 제거 대상에서 제외합니다.
+  - 트랜스코딩 중인 폴더(#EXT-X-ENDLIST 없음 + 최근 수정)는 건드리지 않습니다.
+  - 공유 오디오 폴더(<이름>_audio)는 같은 키의 비디오 렌디션이 모두 제거될 때 함께 제거합니다.
+  - pymongo 가 필요합니다. (pip install pymongo)
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+try:
+    from pymongo import MongoClient
+except ImportError:  # pragma: no cover - optional dependency
+    MongoClient = None
+
+from hls_layout import (AUDIO_GROUP_RE, DEFAULT_MONGO_URI, HLS_DIR, RENDITION_RE, ROOT_DIR,
+                        has_endlist, is_finished, rendition_key)
+
+ACTIVE_GRACE_SECONDS = 30 * 60
+
+
+@dataclass
+class Rendition:
+    folder: str                  # hls/ 기준 상대 경로 (예: "series/ABC-123_1080p")
+    key: str                     # 참조 키 (예: "series/ABC-123")
+    size: int = 0
+    mtime: float = 0.0
+    last_access: float = 0.0
+    finished: bool = True
+    audio: bool = False          # 공유 오디오 그룹 폴더 (<이름>_audio/a<n>/audio.m3u8)
+    movie_ids: Set[str] = field(default_factory=set)
+    sources: Set[str] = field(default_factory=set)
+
+    @property
+    def referenced(self) -> bool:
+        return bool(self.movie_ids)
+
+    @property
+    def rebuildable(self) -> bool:
+        return any(os.path.exists(os.path.join(ROOT_DIR, s)) for s in self.sources)
+
+
+# -----------------------------
+# 참조 인덱스
+# -----------------------------
+def iter_video_paths(movie: dict):
+    for path in (movie.get('mainMovie') or {}).values():
+        if path:
+            yield path
+    for ep in movie.get('episodes') or []:
+        for path in (ep.get('video') or {}).values():
+            if path:
+                yield path
+
+
+def build_reference_index(db) -> Dict[str, dict]:
+    """
+    참조 키별 {movie_ids, sources, last_watched} 를 반환.
+    last_watched 는 WatchHistory.updatedAt 중 가장 최근 값(epoch 초).
+    """
+    watched: Dict[str, float] = {}
+    for row in db.watchhistories.aggregate([
+        {'$group': {'_id': '$movieId', 'last': {'$max': '$updatedAt'}}}
+    ]):
+        if row.get('last'):
+            watched[str(row['_id'])] = row['last'].timestamp()
+
+    index: Dict[str, dict] = {}
+    projection = {'mainMovie': 1, 'episodes.video': 1}
+    for movie in db.movies.find({}, projection):
+        movie_id = str(movie['_id'])
+        for video_path in iter_video_paths(movie):
+            entry = index.setdefault(rendition_key(video_path), {
+                'movie_ids': set(), 'sources': set(), 'last_watched': 0.0
+            })
+            entry['movie_ids'].add(movie_id)
+            entry['sources'].add(video_path)
+            entry['last_watched'] = max(entry['last_watched'], watched.get(movie_id, 0.0))
+    return index
+
+
+# -----------------------------
+# hls/ 스캔
+# -----------------------------
+def _audio_playlists(folder_path: str) -> List[str]:
+    playlists = []
+    with os.scandir(folder_path) as it:
+        for entry in it:
+            playlist = os.path.join(entry.path, 'audio.m3u8')
+            if entry.is_dir() and os.path.exists(playlist):
+                playlists.append(playlist)
+    return playlists
+
+
+def scan_renditions(hls_dir: str) -> List[Rendition]:
+    renditions = []
+    for root, dirs, files in os.walk(hls_dir):
+        rel = os.path.relpath(root, hls_dir).replace(os.sep, '/')
+        if rel == '.':
+            continue
+        match = RENDITION_RE.match(os.path.basename(root))
+        audio_match = AUDIO_GROUP_RE.match(os.path.basename(root))
+        if match and ('master.m3u8' in files or 'video.m3u8' in files):
+            audio_playlists = None
+        elif audio_match:
+            audio_playlists = _audio_playlists(root)
+            if not audio_playlists:
+                continue
+            match = audio_match
+        else:
+            continue
+
+        dirs[:] = []
+        rel_parent = os.path.dirname(rel)
+        key = f"{rel_parent}/{match.group(1)}" if rel_parent else match.group(1)
+        r = Rendition(folder=rel, key=key, audio=audio_playlists is not None)
+        for sub_root, _, sub_files in os.walk(root):
+            for name in sub_files:
+                st = os.stat(os.path.join(sub_root, name))
+                r.size += st.st_size
+                r.mtime = max(r.mtime, st.st_mtime)
+                r.last_access = max(r.last_access, st.st_atime, st.st_mtime)
+        if r.audio:
+            r.finished = all(has_endlist(p) for p in audio_playlists)
+        else:
+            r.finished = is_finished(root)
+        renditions.append(r)
+    return renditions
+
+
+# -----------------------------
+# 정리 계획
+# -----------------------------
+def plan(renditions: List[Rendition], index: Dict[str, dict], quota_bytes: Optional[int],
+         keep_orphans: bool = False):
+    now = time.time()
+    orphans, evictions, skipped = [], [], []
+
+    for r in renditions:
+        ref = index.get(r.key)
+        if ref:
+            r.movie_ids = ref['movie_ids']
+            r.sources = ref['sources']
+            r.last_access = max(r.last_access, ref['last_watched'])
+
+    # 아직 완료되지 않은 비디오 렌디션이 참조하는 공유 오디오는 orphan/LRU 어느 쪽으로도 지우지 않음
+    unfinished_keys = {r.key for r in renditions if not r.audio and not r.finished}
+
+    live = []
+    for r in renditions:
+        if not r.finished and now - r.mtime < ACTIVE_GRACE_SECONDS:
+            skipped.append((r, 'transcoding'))
+        elif r.audio and r.key in unfinished_keys:
+            skipped.append((r, 'video unfinished'))
+        elif not r.referenced and not keep_orphans:
+            orphans.append(r)
+        else:
+            live.append(r)
+
+    if quota_bytes is not None:
+        # 남겨두는 orphan(--keep-orphans)도 용량에 포함
+        total = sum(r.size for r in renditions) - sum(r.size for r in orphans)
+        for r in sorted(live, key=lambda x: x.last_access):
+            if total <= quota_bytes:
+                break
+            if r.audio or not r.referenced:
+                continue
+            if not r.rebuildable:
+                skipped.append((r, 'source missing'))
+                continue
+            evictions.append(r)
+            total -= r.size
+
+        # 공유 오디오는 남아 있는 비디오 렌디션이 없을 때만 제거
+        # (트랜스코딩 중이거나 건너뛴 렌디션도 남아 있는 것으로 봄)
+        removed = {id(r) for r in evictions + orphans}
+        remaining = {r.key for r in renditions if not r.audio and id(r) not in removed}
+        evictions += [r for r in live if r.audio and r.key not in remaining and r.rebuildable]
+
+    return orphans, evictions, skipped
+
+
+def human(size: float) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024:
+            return f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}TB"
+
+
+def remove(hls_dir: str, r: Rendition, apply: bool, reason: str) -> None:
+    stamp = time.strftime('%Y-%m-%d', time.localtime(r.last_access)) if r.last_access else '-'
+    print(f"  [{reason}] {r.folder} ({human(r.size)}, last access {stamp})")
+    if apply:
+        shutil.rmtree(os.path.join(hls_dir, *r.folder.split('/')), ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="hls/ 렌디션 캐시 정리 (orphan 삭제 + LRU 용량 제한)")
+    parser.add_argument("--hls_dir", default=HLS_DIR, help="HLS 루트 폴더 (기본: <repo>/hls)")
+    parser.add_argument("--mongo", default=DEFAULT_MONGO_URI, help="MongoDB URI")
+    parser.add_argument("--quota-gb", type=float, help="hls/ 최대 용량(GB). 지정하지 않으면 LRU 제거 안 함")
+    parser.add_argument("--keep-orphans", action="store_true", help="참조 없는 폴더를 삭제하지 않음")
+    parser.add_argument("--apply", action="store_true", help="실제로 삭제 (기본은 보고만 함)")
+    args = parser.parse_args()
+
+    if MongoClient is None:
+        print("pymongo 가 필요합니다: pip install pymongo", file=sys.stderr)
+        sys.exit(1)
+    if not os.path.isdir(args.hls_dir):
+        print(f"경로 없음: {args.hls_dir}", file=sys.stderr)
+        sys.exit(1)
+
+    client = MongoClient(args.mongo)
+    try:
+        index = build_reference_index(client.get_default_database())
+    finally:
+        client.close()
+
+    renditions = scan_renditions(args.hls_dir)
+    quota = int(args.quota_gb * 1024 ** 3) if args.quota_gb is not None else None
+    orphans, evictions, skipped = plan(renditions, index, quota, args.keep_orphans)
+
+    total = sum(r.size for r in renditions)
+    print(f"렌디션 {len(renditions)}개, 총 {human(total)} (참조 키 {len(index)}개)")
+
+    for r in orphans:
+        remove(args.hls_dir, r, args.apply, 'orphan')
+    for r in evictions:
+        remove(args.hls_dir, r, args.apply, 'lru')
+    for r, reason in skipped:
+        print(f"  [skip: {reason}] {r.folder}")
+
+    freed = sum(r.size for r in orphans) + sum(r.size for r in evictions)
+    verb = "삭제 완료" if args.apply else "삭제 예정 (--apply 로 실행)"
+    print(f"{verb}: {len(orphans) + len(evictions)}개, {human(freed)}")
+
+
+if __name__ == '__main__':
+    main()
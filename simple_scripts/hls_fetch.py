@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+원격 HLS(m3u8)를 받아 faststart MP4로 저장하는 스크립트.
+
+기능:
+  1) master playlist 이면 BANDWIDTH 가 가장 높은 variant 선택
+  2) 세그먼트를 여러 스레드에서 동시에 다운로드
+     - 스레드마다 keep-alive 연결을 재사용
+     - 실패 시 재시도(지수 백오프), 받다 만 세그먼트는 Range 요청으로 이어받기
+     - 단일 파일(#EXT-X-BYTERANGE) playlist 는 세그먼트마다 해당 범위만 Range 요청
+  3) 세그먼트를 이어붙인 뒤 ffmpeg -c copy 로 재인코딩 없이 MP4(+faststart) 생성
+  4) 암호화된(#EXT-X-KEY) playlist 는 키 처리를 ffmpeg 에 맡겨 URL 에서 바로 -c copy 로 받음
+
+작업 폴더는 출력 파일마다 따로 만들어지므로(<output>.parts) 동시에 여러 작업을 돌려도
+충돌하지 않습니다. 성공/실패와 관계없이 끝나면 지우며, --keep-parts 를 주면 실패 시 남겨 두어
+같은 출력으로 다시 실행할 때 받아둔 세그먼트를 이어서 사용합니다.
+
+사용법:
+  python hls_fetch.py <m3u8_url> <output.mp4> [--workers 8] [--retries 5] [--keep-parts]
+"""
+
+import argparse
+import http.client
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+USER_AGENT = 'Mozilla/5.0 (MovieAPI hls_fetch)'
+CHUNK_SIZE = 256 * 1024
+TIMEOUT = 30
+
+
+class FetchError(Exception):
+    pass
+
+
+class EncryptedPlaylist(FetchError):
+    """세그먼트가 암호화되어 있어 직접 이어붙일 수 없는 playlist."""
+
+
+# -----------------------------
+# keep-alive HTTP 클라이언트
+# -----------------------------
+class ConnectionPool:
+    """스레드별로 (scheme, host) 당 하나의 연결을 유지하며 재사용한다."""
+
+    def __init__(self, timeout: float = TIMEOUT):
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def _conn(self, scheme: str, netloc: str) -> http.client.HTTPConnection:
+        conns = getattr(self.local, 'conns', None)
+        if conns is None:
+            conns = self.local.conns = {}
+        key = (scheme, netloc)
+        if key not in conns:
+            cls = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+            conns[key] = cls(netloc, timeout=self.timeout)
+        return conns[key]
+
+    def _drop(self, scheme: str, netloc: str) -> None:
+        conn = self.local.conns.pop((scheme, netloc), None)
+        if conn:
+            conn.close()
+
+    def request(self, url: str, headers: Optional[dict] = None, redirects: int = 5) -> http.client.HTTPResponse:
+        parts = urlsplit(url)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        hdrs = {'User-Agent': USER_AGENT, 'Connection': 'keep-alive'}
+        hdrs.update(headers or {})
+
+        conn = self._conn(parts.scheme, parts.netloc)
+        try:
+            conn.request('GET', path, headers=hdrs)
+            resp = conn.getresponse()
+        except (http.client.HTTPException, OSError):
+            self._drop(parts.scheme, parts.netloc)
+            raise
+
+        if resp.status in (301, 302, 303, 307, 308) and redirects > 0:
+            location = resp.getheader('Location')
+            resp.read()
+            return self.request(urljoin(url, location), headers, redirects - 1)
+        return resp
+
+    def get_text(self, url: str) -> str:
+        resp = self.request(url)
+        body = resp.read()
+        if resp.status != 200:
+            raise FetchError(f"GET {url} -> {resp.status}")
+        return body.decode('utf-8', errors='replace')
+
+
+# -----------------------------
+# playlist 파싱
+# -----------------------------
+def parse_attributes(line: str) -> dict:
+    attrs = {}
+    for key, value in re.findall(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)', line.split(':', 1)[1]):
+        attrs[key] = value.strip('"')
+    return attrs
+
+
+def resolve_media_playlist(pool: ConnectionPool, url: str) -> Tuple[str, str]:
+    """master playlist 이면 최고 화질 variant 를 따라가서 (url, 내용)을 반환."""
+    text = pool.get_text(url)
+    if '#EXT-X-STREAM-INF' not in text:
+        return url, text
+
+    best, best_bw = None, -1
+    lines = [l.strip() for l in text.splitlines()]
+    for i, line in enumerate(lines):
+        if line.startswith('#EXT-X-STREAM-INF') and i + 1 < len(lines):
+            bw = int(parse_attributes(line).get('BANDWIDTH', '0') or 0)
+            if bw > best_bw:
+                best, best_bw = urljoin(url, lines[i + 1]), bw
+    if not best:
+        raise FetchError("variant playlist 를 찾을 수 없습니다.")
+    return resolve_media_playlist(pool, best)
+
+
+def parse_media_playlist(url: str, text: str) -> Tuple[Optional[str], List[Tuple[str, Optional[Tuple[int, int]]]]]:
+    """(init segment URL 또는 None, [(세그먼트 URL, (시작, 길이) 또는 None)])
+    단일 파일 모드(#EXT-X-BYTERANGE)면 세그먼트마다 같은 URL 의 바이트 범위를 가리킨다."""
+    init_url = None
+    segments = []
+    byterange, next_offset = None, 0
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('#EXT-X-KEY'):
+            if parse_attributes(line).get('METHOD', 'NONE') != 'NONE':
+                raise EncryptedPlaylist(parse_attributes(line).get('METHOD'))
+        elif line.startswith('#EXT-X-BYTERANGE'):
+            length, _, offset = line.split(':', 1)[1].partition('@')
+            start = int(offset) if offset else next_offset
+            byterange = (start, int(length))
+            next_offset = start + int(length)
+        elif line.startswith('#EXT-X-MAP'):
+            attrs = parse_attributes(line)
+            if 'BYTERANGE' in attrs:
+                raise FetchError("BYTERANGE init segment 는 지원하지 않습니다.")
+            init_url = urljoin(url, attrs['URI'])
+        elif not line.startswith('#'):
+            segments.append((urljoin(url, line), byterange))
+            byterange = None
+    if not segments:
+        raise FetchError("세그먼트가 없습니다.")
+    return init_url, segments
+
+
+# -----------------------------
+# 세그먼트 다운로드
+# -----------------------------
+def download(pool: ConnectionPool, url: str, dest: str, retries: int,
+             byterange: Optional[Tuple[int, int]] = None) -> int:
+    """dest 로 다운로드. .part 파일이 있으면 Range 요청으로 이어받는다.
+    byterange=(시작, 길이)면 그 범위만 받는다 (단일 파일 byte-range playlist)."""
+    if os.path.exists(dest):
+        return os.path.getsize(dest)
+
+    part = dest + '.part'
+    for attempt in range(retries + 1):
+        try:
+            offset = os.path.getsize(part) if os.path.exists(part) else 0
+            if byterange:
+                start, length = byterange
+                if offset >= length:
+                    break
+                headers = {'Range': f'bytes={start + offset}-{start + length - 1}'}
+            else:
+                headers = {'Range': f'bytes={offset}-'} if offset else {}
+            resp = pool.request(url, headers)
+
+            if resp.status == 416 and not byterange:
+                resp.read()
+                break
+            if resp.status not in (200, 206) or (byterange and resp.status != 206):
+                resp.read()
+                raise FetchError(f"GET {url} -> {resp.status}")
+
+            mode = 'ab' if resp.status == 206 else 'wb'
+            with open(part, mode) as f:
+                while True:
+                    chunk = resp.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+
+            length = resp.getheader('Content-Length')
+            expected = (offset if mode == 'ab' else 0) + int(length) if length else None
+            if expected is not None and os.path.getsize(part) < expected:
+                raise FetchError(f"불완전한 응답: {url}")
+            break
+        except (FetchError, http.client.HTTPException, OSError) as e:
+            if attempt == retries:
+                raise FetchError(f"{url} 다운로드 실패: {e}")
+            time.sleep(min(2 ** attempt * 0.5, 8))
+
+    os.replace(part, dest)
+    return os.path.getsize(dest)
+
+
+def concat_files(paths: List[str], dest: str) -> None:
+    with open(dest, 'wb') as out:
+        for p in paths:
+            with open(p, 'rb') as f:
+                shutil.copyfileobj(f, out, CHUNK_SIZE)
+
+
+def remux_to_mp4(joined: str, output: str, is_ts: bool) -> None:
+    tmp_output = output + '.tmp.mp4'
+    cmd = ['ffmpeg', '-y', '-hide_banner', '-loglevel', 'error', '-i', joined, '-c', 'copy']
+    if is_ts:
+        cmd += ['-bsf:a', 'aac_adtstoasc']
+    cmd += ['-movflags', '+faststart', tmp_output]
+    subprocess.run(cmd, check=True)
+    os.replace(tmp_output, output)
+
+
+def ffmpeg_download(media_url: str, output: str) -> None:
+    """ffmpeg 의 HLS demuxer 로 직접 받음 (AES-128 키 다운로드/복호화 포함, 동시 다운로드 없음)."""
+    tmp_output = output + '.tmp.mp4'
+    cmd = [
+        'ffmpeg', '-y', '-hide_banner', '-loglevel', 'error',
+        '-protocol_whitelist', 'file,http,https,tcp,tls,crypto',
+        '-i', media_url, '-c', 'copy', '-bsf:a', 'aac_adtstoasc', '-movflags', '+faststart', tmp_output
+    ]
+    try:
+        subprocess.run(cmd, check=True)
+    except subprocess.CalledProcessError:
+        if os.path.exists(tmp_output):
+            os.remove(tmp_output)
+        raise
+    os.replace(tmp_output, output)
+
+
+def fetch(url: str, output: str, workers: int = 8, retries: int = 5, keep_parts: bool = False) -> str:
+    """keep_parts=False 면 실패해도 작업 폴더(<output>.parts)를 지운다. (이어받으려면 True)"""
+    output = os.path.abspath(output)
+    work_dir = output + '.parts'
+    os.makedirs(work_dir, exist_ok=True)
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+
+    done = False
+    try:
+        _fetch_into(url, output, work_dir, workers, retries)
+        done = True
+    finally:
+        if done or not keep_parts:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    print(f"생성 완료: {output}")
+    return output
+
+
+def _fetch_into(url: str, output: str, work_dir: str, workers: int, retries: int) -> None:
+    pool = ConnectionPool()
+    media_url, text = resolve_media_playlist(pool, url)
+    try:
+        init_url, segments = parse_media_playlist(media_url, text)
+    except EncryptedPlaylist as e:
+        print(f"암호화된 playlist (METHOD={e}), ffmpeg 로 직접 다운로드: {media_url}")
+        ffmpeg_download(media_url, output)
+        return
+    print(f"세그먼트 {len(segments)}개 다운로드 시작 (workers={workers}): {media_url}")
+
+    targets = [(u, os.path.join(work_dir, f'seg_{i:05d}.bin'), r) for i, (u, r) in enumerate(segments)]
+    if init_url:
+        targets.insert(0, (init_url, os.path.join(work_dir, 'init.bin'), None))
+
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        sizes = list(executor.map(lambda t: download(pool, t[0], t[1], retries, t[2]), targets))
+    elapsed = max(time.time() - started, 1e-6)
+    print(f"다운로드 완료: {sum(sizes) / 1024 / 1024:.1f}MB, {elapsed:.1f}초")
+
+    joined = os.path.join(work_dir, 'joined.' + ('mp4' if init_url else 'ts'))
+    concat_files([dest for _, dest, _ in targets], joined)
+    remux_to_mp4(joined, output, is_ts=not init_url)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HLS를 동시 다운로드 후 재인코딩 없이 MP4로 저장")
+    parser.add_argument("url", help="m3u8 URL (master 또는 media playlist)")
+    parser.add_argument("output", help="출력 MP4 경로")
+    parser.add_argument("--workers", type=int, default=8, help="동시 다운로드 수 (기본: 8)")
+    parser.add_argument("--retries", type=int, default=5, help="세그먼트별 재시도 횟수 (기본: 5)")
+    parser.add_argument("--keep-parts", action="store_true", help="실패 시 받은 세그먼트를 남겨 같은 출력으로 다시 실행하면 이어받음")
+    args = parser.parse_args()
+
+    try:
+        fetch(args.url, args.output, args.workers, args.retries, args.keep_parts)
+    except (FetchError, subprocess.CalledProcessError, OSError) as e:
+        print(f"오류: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
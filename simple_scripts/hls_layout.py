@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+hls/ 폴더 규칙과 playlist 상태를 다루는 공용 헬퍼 (읽기 전용, 아무것도 지우거나 쓰지 않음).
+
+hls_cache.py(정리), media_index.py(인덱스), series_batch.py(일괄 트랜스코딩),
+add_subs_to_hls.py(자막) 가 같은 규칙을 쓰도록 한곳에 둡니다.
+
+  폴더 규칙: hls/<uploads 기준 상대 폴더>/<파일명>_<화질>     (RENDITION_RE)
+             hls/<uploads 기준 상대 폴더>/<파일명>_audio/a<n>  (AUDIO_GROUP_RE, 공유 오디오)
+"""
+
+import os
+import re
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HLS_DIR = os.path.join(ROOT_DIR, 'hls')
+DEFAULT_MONGO_URI = os.environ.get('MONGO_URI', 'mongodb://localhost:27017/movies')
+
+RENDITION_RE = re.compile(r'(.+)_(1080p|720p|4k|2160p)$')
+AUDIO_GROUP_RE = re.compile(r'(.+)_audio$')
+
+
+def rendition_key(video_path: str) -> str:
+    """routes/streaming.js 와 동일한 규칙으로 영상 경로를 hls/ 폴더 키로 변환."""
+    video_path = video_path.replace('\\', '/')
+    relative_dir = os.path.dirname(video_path)
+    if relative_dir == '.':
+        relative_dir = ''
+    relative_dir = re.sub(r'^(uploads|hls)(/|$)', '', relative_dir).lstrip('/')
+    base = os.path.splitext(os.path.basename(video_path))[0]
+    return f"{relative_dir}/{base}" if relative_dir else base
+
+
+def has_endlist(playlist: str) -> bool:
+    with open(playlist, 'r', encoding='utf-8', errors='ignore') as f:
+        return '#EXT-X-ENDLIST' in f.read()
+
+
+def is_finished(folder_path: str) -> bool:
+    """렌디션 폴더의 미디어 playlist(video.m3u8 또는 master.m3u8)가 완료(#EXT-X-ENDLIST)됐는지."""
+    for name in ('video.m3u8', 'master.m3u8'):
+        playlist = os.path.join(folder_path, name)
+        if os.path.exists(playlist) and has_endlist(playlist):
+            return True
+    return False
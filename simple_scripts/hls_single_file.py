@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+단일 파일(byte-range) HLS 도구.
+
+-hls_time 10 으로 만든 2시간짜리 영상은 화질마다 segment_NNN.ts 가 약 720개 생겨
+inode 수, os.walk 스캔, 백업/rsync 비용이 모두 커집니다.
+단일 파일 모드는 렌디션마다 미디어 파일 하나(<playlist 이름>.ts)만 두고
+playlist 에서 #EXT-X-BYTERANGE:<길이>@<오프셋> 으로 세그먼트를 가리킵니다.
+
+기존 hls/ 폴더 변환 (재인코딩 없음, 그 자리에서):
+  1) 완료된(#EXT-X-ENDLIST) 미디어 playlist 의 .ts 세그먼트를 순서대로 하나로 이어붙임
+     (MPEG-TS 는 패킷 단위 포맷이라 이어붙여도 유효한 스트림)
+  2) playlist 를 BYTERANGE 형식으로 다시 쓰고 VOD 로 고정
+  3) 새 playlist 로 원자적으로 교체. 기존 세그먼트는 이 단계에서 지우지 않음
+  중간에 중단돼도 기존 세그먼트는 그대로 있으므로 다시 실행하면 됩니다.
+
+기존 세그먼트 삭제 (--delete-segments, 나중에 다시 실행):
+  완료된 playlist 는 max-age=600 으로 캐시되고(middleware/hlsStatic.js), VOD playlist 는 플레이어가
+  재생 시작 때 한 번만 읽으므로 변환 직후 세그먼트를 지우면 이전 playlist 로 재생 중인 클라이언트가 깨집니다.
+  그래서 이미 변환된(BYTERANGE) 폴더에서 어떤 playlist 도 가리키지 않는 .ts 파일만,
+  playlist 를 바꾼 지 --grace-hours(기본 24시간) 이상 지난 경우에 지웁니다.
+  그 전까지는 폴더당 디스크를 두 배로 쓰니, 운영 중인 라이브러리는 변환 다음 날 한 번 더 실행하세요.
+  precompress_hls.py 가 만든 .gz/.br 은 원본보다 오래되어 자동으로 무시되니 필요하면 다시 실행하세요.
+
+다른 스크립트가 쓰는 헬퍼:
+  single_file_args(playlist)  ffmpeg 단일 파일 출력 옵션
+  finalize_playlist(playlist) 트랜스코딩이 끝난 EVENT playlist 를 VOD + ENDLIST 로 마감하고
+                              세그먼트 URI 에 인코딩별 ?v= 추가 (hlsStatic 이 immutable 로 캐시)
+  first_segment(folder)       첫 세그먼트가 들어있는 파일 (segment_000.ts 또는 단일 미디어 파일)
+  probe_start_pts(folder)     첫 세그먼트 시작 PTS (90kHz, 자막 X-TIMESTAMP-MAP 용)
+
+사용법:
+  python hls_single_file.py [--hls_dir hls] [--apply]                    # 변환 (세그먼트 유지)
+  python hls_single_file.py [--hls_dir hls] --apply --delete-segments    # 유예 시간이 지난 세그먼트 삭제
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import time
+from itertools import accumulate
+from typing import List, Optional, Tuple
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HLS_DIR = os.path.join(ROOT_DIR, 'hls')
+MEDIA_PLAYLISTS = ('video.m3u8', 'master.m3u8', 'audio.m3u8')
+CHUNK_SIZE = 1024 * 1024
+DEFAULT_GRACE_HOURS = 24
+
+
+# -----------------------------
+# 트랜스코딩 / 자막 스크립트용 헬퍼
+# -----------------------------
+def single_file_args(playlist: str) -> List[str]:
+    """playlist 옆에 <이름>.ts 하나로 출력하는 ffmpeg 옵션 (-hls_segment_filename 대신 사용)."""
+    media = os.path.splitext(playlist)[0] + '.ts'
+    return ['-hls_flags', 'single_file', '-hls_segment_filename', media]
+
+
+def segment_version() -> str:
+    """인코딩(변환)마다 다른 세그먼트 URL 버전. utils/ffmpeg.js 와 같은 형식 (ms, 36진수)."""
+    return _base36(int(time.time() * 1000))
+
+
+def _base36(n: int) -> str:
+    digits = '0123456789abcdefghijklmnopqrstuvwxyz'
+    out = ''
+    while True:
+        n, r = divmod(n, 36)
+        out = digits[r] + out
+        if n == 0:
+            return out
+
+
+def version_segment_uris(content: str, version: str) -> str:
+    """세그먼트 URI 에 ?v=<version> 추가 (이미 쿼리가 있으면 그대로)."""
+    lines = []
+    for line in content.split('\n'):
+        uri = line.strip()
+        if uri and not uri.startswith('#') and '?' not in uri:
+            line = f'{uri}?v={version}'
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def segment_file(uri: str) -> str:
+    """playlist URI 에서 폴더 안 파일명 (접두어, ?v= 제거)."""
+    return uri.split('?', 1)[0].rsplit('/', 1)[-1]
+
+
+def finalize_playlist(playlist: str) -> bool:
+    """EVENT playlist 를 VOD 로 바꾸고 ENDLIST 가 없으면 추가, 세그먼트 URI 에 버전 추가. 변경했으면 True."""
+    try:
+        with open(playlist, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except OSError:
+        return False
+    if '#EXTINF' not in content:
+        return False
+    updated = version_segment_uris(content, segment_version())
+    updated = updated.replace('#EXT-X-PLAYLIST-TYPE:EVENT', '#EXT-X-PLAYLIST-TYPE:VOD')
+    if '#EXT-X-PLAYLIST-TYPE' not in updated:
+        updated = updated.replace('#EXTM3U\n', '#EXTM3U\n#EXT-X-PLAYLIST-TYPE:VOD\n', 1)
+    if '#EXT-X-ENDLIST' not in updated:
+        updated = updated.rstrip('\n') + '\n#EXT-X-ENDLIST\n'
+    if updated == content:
+        return False
+    _write_atomic(playlist, updated)
+    return True
+
+
+def first_segment(folder: str) -> Optional[str]:
+    """첫 세그먼트가 들어있는 파일 경로. 단일 파일 모드면 미디어 파일 자체가 첫 세그먼트로 시작한다."""
+    segment_0 = os.path.join(folder, 'segment_000.ts')
+    if os.path.exists(segment_0):
+        return segment_0
+    for name in MEDIA_PLAYLISTS:
+        media = os.path.join(folder, os.path.splitext(name)[0] + '.ts')
+        if os.path.exists(media) and os.path.getsize(media) > 0:
+            return media
+    return None
+
+
+def probe_start_pts(folder: str) -> Optional[int]:
+    """첫 세그먼트의 start_time 을 90kHz PTS 로. 세그먼트가 없거나 실패하면 None."""
+    segment = first_segment(folder)
+    if segment is None:
+        return None
+    cmd = ['ffprobe', '-v', 'error', '-show_entries', 'format=start_time',
+           '-of', 'default=noprint_wrappers=1:nokey=1', segment]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    try:
+        return int(float(result.stdout.strip()) * 90000)
+    except ValueError:
+        return None
+
+
+def _write_atomic(path: str, text: str) -> None:
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+# -----------------------------
+# 기존 폴더 변환
+# -----------------------------
+def parse_segments(content: str) -> Optional[List[Tuple[int, str]]]:
+    """(줄 번호, 세그먼트 URI) 목록. 변환 대상이 아니면(master, byte-range, .ts 아님, 미완료) None."""
+    if ('#EXT-X-ENDLIST' not in content or '#EXT-X-STREAM-INF' in content
+            or '#EXT-X-BYTERANGE' in content or '#EXT-X-MAP' in content):
+        return None
+    segments = []
+    for i, line in enumerate(content.splitlines()):
+        line = line.strip()
+        if line and not line.startswith('#'):
+            if not segment_file(line).endswith('.ts'):
+                return None
+            segments.append((i, line))
+    return segments or None
+
+
+def convert_playlist(playlist: str, apply: bool) -> Optional[Tuple[int, int]]:
+    """변환했으면 (세그먼트 수, 바이트), 대상이 아니면 None."""
+    folder = os.path.dirname(playlist)
+    with open(playlist, 'r', encoding='utf-8') as f:
+        content = f.read()
+    segments = parse_segments(content)
+    if segments is None:
+        return None
+
+    # URI 접두어(hls_base_url)는 유지하고 파일명만 바꿈
+    prefixes = {uri[:len(uri) - len(uri.rsplit('/', 1)[-1])] for _, uri in segments}
+    paths = [os.path.join(folder, segment_file(uri)) for _, uri in segments]
+    missing = [p for p in paths if not os.path.exists(p)]
+    if len(prefixes) != 1 or missing:
+        print(f"  [skip] {playlist}: 세그먼트 경로가 폴더 밖이거나 없음 ({len(missing)}개 누락)")
+        return None
+
+    media_name = os.path.splitext(os.path.basename(playlist))[0] + '.ts'
+    media_path = os.path.join(folder, media_name)
+    if media_path in paths:
+        print(f"  [skip] {playlist}: 세그먼트 이름이 {media_name} 과 겹침")
+        return None
+    sizes = [os.path.getsize(p) for p in paths]
+    if not apply:
+        return len(paths), sum(sizes)
+
+    tmp_media = media_path + '.tmp'
+    with open(tmp_media, 'wb') as out:
+        for p in paths:
+            with open(p, 'rb') as f:
+                shutil.copyfileobj(f, out, CHUNK_SIZE)
+    if os.path.getsize(tmp_media) != sum(sizes):
+        os.remove(tmp_media)
+        raise OSError(f"{media_path}: 이어붙인 크기가 맞지 않음")
+    os.replace(tmp_media, media_path)
+
+    # 같은 URL 의 내용이 바뀌므로 새 버전을 붙임 (hlsStatic 의 immutable 캐시)
+    uri = f'{prefixes.pop()}{media_name}?v={segment_version()}'
+    segment_lines = {line_no: n for n, (line_no, _) in enumerate(segments)}
+    offsets = [0, *accumulate(sizes)]
+    out_lines = []
+    for i, line in enumerate(content.splitlines()):
+        if i in segment_lines:
+            n = segment_lines[i]
+            out_lines += [f'#EXT-X-BYTERANGE:{sizes[n]}@{offsets[n]}', uri]
+        elif line.startswith('#EXT-X-VERSION'):
+            out_lines.append('#EXT-X-VERSION:4')  # BYTERANGE 는 버전 4 이상
+        elif line.startswith('#EXT-X-PLAYLIST-TYPE'):
+            out_lines.append('#EXT-X-PLAYLIST-TYPE:VOD')
+        else:
+            out_lines.append(line)
+    if not any(l.startswith('#EXT-X-VERSION') for l in out_lines):
+        out_lines.insert(1, '#EXT-X-VERSION:4')
+    if not any(l.startswith('#EXT-X-PLAYLIST-TYPE') for l in out_lines):
+        out_lines.insert(1, '#EXT-X-PLAYLIST-TYPE:VOD')
+    _write_atomic(playlist, '\n'.join(out_lines) + '\n')
+    return len(paths), sum(sizes)
+
+
+def _playlist_uris(content: str) -> List[str]:
+    return [line.strip() for line in content.splitlines() if line.strip() and not line.startswith('#')]
+
+
+def stale_segments(folder: str) -> Tuple[List[str], float]:
+    """이미 byte-range 로 변환된 폴더에서 어떤 playlist 도 가리키지 않는 .ts 파일과, 가장 최근 변환 시각(mtime).
+    변환된 playlist 가 없으면 ([], 0)."""
+    referenced, converted_at = set(), 0.0
+    for name in os.listdir(folder):
+        if not name.endswith('.m3u8'):
+            continue
+        with open(os.path.join(folder, name), 'r', encoding='utf-8') as f:
+            content = f.read()
+        uris = [segment_file(uri) for uri in _playlist_uris(content)]
+        referenced.update(uris)
+        if ('#EXT-X-BYTERANGE' in content and '#EXT-X-ENDLIST' in content
+                and uris and all(os.path.exists(os.path.join(folder, u)) for u in uris)):
+            converted_at = max(converted_at, os.path.getmtime(os.path.join(folder, name)))
+    if not converted_at:
+        return [], 0.0
+    stale = sorted(os.path.join(folder, name) for name in os.listdir(folder)
+                   if name.endswith('.ts') and name not in referenced)
+    return stale, converted_at
+
+
+def iter_playlists(hls_dir: str):
+    for root, _, files in os.walk(hls_dir):
+        for name in sorted(files):
+            if name in MEDIA_PLAYLISTS:
+                yield os.path.join(root, name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="기존 HLS 세그먼트 폴더를 단일 파일(byte-range) 형식으로 변환")
+    parser.add_argument("--hls_dir", default=HLS_DIR, help="HLS 루트 폴더 (기본: <repo>/hls)")
+    parser.add_argument("--apply", action="store_true", help="실제로 변환 (기본은 보고만 함)")
+    parser.add_argument("--delete-segments", action="store_true",
+                        help="변환된 지 --grace-hours 이상 지난 폴더의 기존 세그먼트 삭제 (기본은 유지)")
+    parser.add_argument("--grace-hours", type=float, default=DEFAULT_GRACE_HOURS,
+                        help=f"변환 후 기존 세그먼트를 남겨둘 시간 (기본: {DEFAULT_GRACE_HOURS}, "
+                             "캐시된 이전 playlist 로 재생 중인 클라이언트용)")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.hls_dir):
+        print(f"경로 없음: {args.hls_dir}", file=sys.stderr)
+        sys.exit(1)
+
+    converted, files, total = 0, 0, 0
+    stale_count, stale_size, waiting = 0, 0, 0
+    checked = set()
+    deadline = time.time() - args.grace_hours * 3600
+    for playlist in iter_playlists(args.hls_dir):
+        try:
+            result = convert_playlist(playlist, args.apply)
+        except OSError as e:
+            print(f"  [error] {playlist}: {e}", file=sys.stderr)
+            continue
+        if result is None:
+            # 이미 변환된 폴더: 유예 시간이 지났으면 기존 세그먼트 정리
+            folder = os.path.dirname(playlist)
+            if not args.delete_segments or folder in checked:
+                continue
+            checked.add(folder)
+            stale, converted_at = stale_segments(folder)
+            if not stale:
+                continue
+            if converted_at > deadline:
+                waiting += len(stale)
+                continue
+            size = sum(os.path.getsize(p) for p in stale)
+            if args.apply:
+                for p in stale:
+                    os.remove(p)
+            stale_count += len(stale)
+            stale_size += size
+            print(f"  {os.path.relpath(folder, args.hls_dir)}: 기존 세그먼트 {len(stale)}개 ({size / 1024 / 1024:.1f}MB)")
+            continue
+        count, size = result
+        converted += 1
+        files += count
+        total += size
+        print(f"  {os.path.relpath(playlist, args.hls_dir)}: 세그먼트 {count}개 -> 1개 ({size / 1024 / 1024:.1f}MB)")
+
+    verb = "변환 완료" if args.apply else "변환 예정 (--apply 로 실행)"
+    print(f"{verb}: playlist {converted}개, 세그먼트 파일 {files}개 -> {converted}개")
+    if stale_count:
+        verb = "삭제 완료" if args.apply else "삭제 예정"
+        print(f"기존 세그먼트 {verb}: {stale_count}개 ({stale_size / 1024 / 1024:.1f}MB)")
+    if waiting:
+        print(f"유예 시간({args.grace_hours:g}시간)이 지나지 않아 남겨둔 세그먼트: {waiting}개")
+    elif converted and not args.delete_segments:
+        print(f"기존 세그먼트는 남아 있습니다. {args.grace_hours:g}시간 뒤 --apply --delete-segments 로 정리하세요.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,585 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+스트리밍 서버 부하 테스트 스크립트 (asyncio).
+
+가상 시청자(viewer)마다 실제 클라이언트와 같은 흐름을 재현합니다.
+  1) POST /api/auth/login
+  2) GET  /api/movies 를 cursor 로 몇 페이지 넘김
+  3) /api/hls 에서 master.m3u8 → variant playlist → 세그먼트를 재생 속도에 맞춰 요청
+     (처음 --buffer 개는 바로 받고, 이후는 세그먼트 길이마다 하나씩)
+  4) 재생 중 --tick 초마다 POST /api/watch-history
+끝나면 엔드포인트별 p50/p95/p99 지연시간과 처리량, 세그먼트 지연(stall) 횟수를 출력합니다.
+
+--spawn 을 주면 모두 로컬에서 실행됩니다.
+  - 임시 폴더에 mongod 를 띄우고 seed_loadtest.js 로 계정/영화를 만든 뒤
+  - 그 DB 를 바라보는 App.js 를 빈 포트로 실행
+  - <repo>/hls/_loadtest 에 가짜 HLS 트리(fixture)를 만들고 종료 시 그 폴더를 지움
+운영 DB 는 건드리지 않고, hls 폴더에는 _loadtest 하위만 쓰고 지웁니다 (나머지 내용은 그대로).
+기본 fixture 는 5개 x 15세그먼트 x 약 1MB (합계 약 75MB) 입니다.
+
+--spawn 없이 이미 떠 있는 서버를 대상으로 하면 fixture 를 만들지 않습니다.
+그 서버가 서빙하는 hls/_loadtest 에 fixture 가 없으면 --build-fixtures 로 만들거나
+이전 실행에서 --keep-fixtures 로 남겨 두세요.
+
+사용법:
+  python loadtest.py --spawn [--viewers 50] [--duration 120] [--speed 1.0]
+  python loadtest.py --base-url http://127.0.0.1:3001   (이미 seed 된 서버 대상)
+  python loadtest.py --base-url http://127.0.0.1:3001 --build-fixtures
+
+주의:
+  - aiohttp 가 있으면 사용하고, 없으면 asyncio 스트림 기반 HTTP/1.1 클라이언트로 동작합니다.
+  - --spawn 에는 mongod 와 node 가 필요합니다.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urljoin, urlsplit
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_NAME = '_loadtest'
+FIXTURE_DIR = os.path.join(ROOT_DIR, 'hls', FIXTURE_NAME)
+SERIAL_PREFIX = 'LT-'  # seed_loadtest.js 와 같은 규칙
+USER_PREFIX = 'loadtest'
+CHUNK_SIZE = 64 * 1024
+
+
+# -----------------------------
+# HTTP 클라이언트
+# -----------------------------
+class StreamClient:
+    """aiohttp 가 없을 때 쓰는 최소 HTTP/1.1 keep-alive 클라이언트 (시청자당 연결 1개)."""
+
+    def __init__(self, base_url: str):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.ssl = parts.scheme == 'https'
+        self.reader = None
+        self.writer = None
+
+    async def close(self) -> None:
+        if self.writer:
+            self.writer.close()
+            self.reader = self.writer = None
+
+    async def _read_body(self, headers: Dict[str, str], discard: bool) -> Tuple[bytes, int]:
+        chunks, total = [], 0
+
+        def take(data):
+            nonlocal total
+            total += len(data)
+            if not discard:
+                chunks.append(data)
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0].strip(), 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                take(await self.reader.readexactly(size))
+                await self.reader.readline()
+        elif 'content-length' in headers:
+            remaining = int(headers['content-length'])
+            while remaining:
+                data = await self.reader.readexactly(min(remaining, CHUNK_SIZE))
+                remaining -= len(data)
+                take(data)
+        else:
+            while True:
+                data = await self.reader.read(CHUNK_SIZE)
+                if not data:
+                    break
+                take(data)
+            await self.close()
+        return b''.join(chunks), total
+
+    async def _once(self, method, path, headers, body, discard):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl or None)
+        lines = [f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}', 'Connection: keep-alive']
+        lines += [f'{k}: {v}' for k, v in headers.items()]
+        if body is not None:
+            lines.append(f'Content-Length: {len(body)}')
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + (body or b''))
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError('connection closed')
+        status = int(status_line.split()[1])
+        resp_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            k, _, v = line.decode('latin-1').partition(':')
+            resp_headers[k.strip().lower()] = v.strip()
+        data, size = await self._read_body(resp_headers, discard)
+        if resp_headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, data, size
+
+    async def request(self, method: str, path: str, headers: Optional[dict] = None,
+                      body: Optional[bytes] = None, discard: bool = False) -> Tuple[int, bytes, int]:
+        headers = headers or {}
+        reused = self.writer is not None
+        try:
+            return await self._once(method, path, headers, body, discard)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            await self.close()
+            if not reused:
+                raise
+            # 서버 keep-alive 타임아웃으로 끊긴 연결이면 새 연결로 한 번 더
+            return await self._once(method, path, headers, body, discard)
+
+
+class AiohttpClient:
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip('/')
+        self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=1))
+
+    async def close(self) -> None:
+        await self.session.close()
+
+    async def request(self, method: str, path: str, headers: Optional[dict] = None,
+                      body: Optional[bytes] = None, discard: bool = False) -> Tuple[int, bytes, int]:
+        async with self.session.request(method, self.base_url + path, headers=headers, data=body) as resp:
+            if not discard:
+                data = await resp.read()
+                return resp.status, data, len(data)
+            total = 0
+            async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                total += len(chunk)
+            return resp.status, b'', total
+
+
+def make_client(base_url: str):
+    return AiohttpClient(base_url) if aiohttp is not None else StreamClient(base_url)
+
+
+# -----------------------------
+# 통계
+# -----------------------------
+class Stats:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.bytes: Dict[str, int] = defaultdict(int)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.stalls = 0
+        self.sessions = 0
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def record(self, name: str, seconds: float, nbytes: int, ok: bool) -> None:
+        self.latencies[name].append(seconds)
+        self.bytes[name] += nbytes
+        if not ok:
+            self.errors[name] += 1
+
+    def summary(self) -> dict:
+        elapsed = max((self.finished or time.perf_counter()) - self.started, 1e-6)
+        endpoints = {}
+        for name in sorted(self.latencies):
+            values = sorted(self.latencies[name])
+            endpoints[name] = {
+                'count': len(values),
+                'errors': self.errors[name],
+                'p50_ms': percentile(values, 50) * 1000,
+                'p95_ms': percentile(values, 95) * 1000,
+                'p99_ms': percentile(values, 99) * 1000,
+                'rps': len(values) / elapsed,
+                'mbps': self.bytes[name] * 8 / elapsed / 1e6,
+            }
+        return {'elapsed_s': elapsed, 'sessions': self.sessions, 'stalls': self.stalls, 'endpoints': endpoints}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def print_report(summary: dict) -> None:
+    print(f"\n경과 {summary['elapsed_s']:.1f}초, 재생 세션 {summary['sessions']}개, "
+          f"세그먼트 지연(stall) {summary['stalls']}회")
+    header = f"{'endpoint':<16}{'count':>8}{'err':>6}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'req/s':>9}{'Mbps':>9}"
+    print(header)
+    print('-' * len(header))
+    for name, e in summary['endpoints'].items():
+        print(f"{name:<16}{e['count']:>8}{e['errors']:>6}{e['p50_ms']:>10.1f}{e['p95_ms']:>10.1f}"
+              f"{e['p99_ms']:>10.1f}{e['rps']:>9.1f}{e['mbps']:>9.1f}")
+
+
+# -----------------------------
+# fixture HLS 트리
+# -----------------------------
+def fixture_serial(i: int) -> str:
+    return f"{SERIAL_PREFIX}{i:05d}"
+
+
+def build_fixtures(count: int, segments: int, segment_seconds: int, bitrate_kbps: int) -> None:
+    """hls/_loadtest/<serial>_1080p/ 에 routes/streaming.js 와 같은 구조의 playlist/세그먼트를 만든다."""
+    segment_bytes = bitrate_kbps * 1000 // 8 * segment_seconds
+    segment_bytes -= segment_bytes % 188
+    # TS 패킷 모양만 흉내 낸 더미 데이터 (sync byte 0x47 + 난수)
+    packet = bytearray(os.urandom(188))
+    packet[0] = 0x47
+    payload = bytes(packet) * (segment_bytes // 188)
+
+    for i in range(count):
+        serial = fixture_serial(i)
+        folder = f"{FIXTURE_NAME}/{serial}_1080p"
+        path = os.path.join(ROOT_DIR, 'hls', *folder.split('/'))
+        os.makedirs(path, exist_ok=True)
+
+        media = ['#EXTM3U', '#EXT-X-VERSION:3', f'#EXT-X-TARGETDURATION:{segment_seconds}',
+                 '#EXT-X-MEDIA-SEQUENCE:0', '#EXT-X-PLAYLIST-TYPE:VOD']
+        for n in range(segments):
+            name = f'segment_{n:03d}.ts'
+            media += [f'#EXTINF:{segment_seconds}.000000,', name]
+            seg_path = os.path.join(path, name)
+            if not os.path.exists(seg_path) or os.path.getsize(seg_path) != len(payload):
+                with open(seg_path, 'wb') as f:
+                    f.write(payload)
+        media.append('#EXT-X-ENDLIST')
+        with open(os.path.join(path, 'video.m3u8'), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(media) + '\n')
+
+        master = ['#EXTM3U',
+                  f'#EXT-X-STREAM-INF:BANDWIDTH={bitrate_kbps * 1000},RESOLUTION=1920x1080',
+                  f'hls/{folder}/video.m3u8']
+        with open(os.path.join(path, 'master.m3u8'), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(master) + '\n')
+
+
+def parse_media_playlist(text: str) -> List[Tuple[float, str, Optional[str]]]:
+    """(길이, URI, Range 헤더 또는 None). 단일 파일 모드(#EXT-X-BYTERANGE)는 Range 요청으로 받는다."""
+    segments, duration, byterange, next_offset = [], 0.0, None, 0
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith('#EXTINF:'):
+            duration = float(line[8:].split(',')[0])
+        elif line.startswith('#EXT-X-BYTERANGE:'):
+            length, _, offset = line[17:].partition('@')
+            start = int(offset) if offset else next_offset
+            next_offset = start + int(length)
+            byterange = f'bytes={start}-{next_offset - 1}'
+        elif line and not line.startswith('#'):
+            segments.append((duration, line, byterange))
+            byterange = None
+    return segments
+
+
+def first_variant(text: str) -> Optional[str]:
+    lines = [l.strip() for l in text.splitlines()]
+    for i, line in enumerate(lines):
+        if line.startswith('#EXT-X-STREAM-INF') and i + 1 < len(lines):
+            return lines[i + 1]
+    return None
+
+
+def playlist_url(uri: str, base: str) -> str:
+    """master 안의 'hls/...' 경로는 웹 클라이언트처럼 /api/ 기준으로, 그 외는 playlist 기준 상대경로로 해석."""
+    if uri.startswith('hls/'):
+        return '/api/' + uri
+    return urljoin(base, uri)
+
+
+# -----------------------------
+# 가상 시청자
+# -----------------------------
+class Viewer:
+    def __init__(self, idx: int, args, stats: Stats, deadline: float, fixture_serials: set):
+        self.idx = idx
+        self.args = args
+        self.stats = stats
+        self.deadline = deadline
+        self.fixture_serials = fixture_serials
+        self.client = make_client(args.base_url)
+        self.token = None
+        self.catalog: Dict[str, str] = {}  # serialNumber -> movie _id
+
+    async def call(self, name: str, method: str, path: str, payload=None, discard=False,
+                   auth=True, byterange: Optional[str] = None) -> Tuple[int, bytes]:
+        headers = {'Range': byterange} if byterange else {}
+        if auth and self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        body = None
+        if payload is not None:
+            body = json.dumps(payload).encode()
+            headers['Content-Type'] = 'application/json'
+        started = time.perf_counter()
+        try:
+            status, data, size = await self.client.request(method, path, headers, body, discard)
+        except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+            self.stats.record(name, time.perf_counter() - started, 0, False)
+            if self.args.verbose:
+                print(f"[viewer {self.idx}] {name} 실패: {e}", file=sys.stderr)
+            return 0, b''
+        self.stats.record(name, time.perf_counter() - started, size, 200 <= status < 400)
+        return status, data
+
+    def remaining(self) -> float:
+        return self.deadline - time.perf_counter()
+
+    async def login(self) -> bool:
+        status, data = await self.call('login', 'POST', '/api/auth/login', {
+            'username': f'{USER_PREFIX}{self.idx % self.args.users}',
+            'password': self.args.password,
+        }, auth=False)
+        if status != 200:
+            return False
+        self.token = json.loads(data)['accessToken']
+        return True
+
+    async def browse(self) -> None:
+        cursor = ''
+        for _ in range(self.args.pages):
+            query = urlencode({'pageSize': self.args.page_size, 'sortOrder': 'asc', 'cursor': cursor})
+            status, data = await self.call('movies', 'GET', f'/api/movies?{query}')
+            if status != 200:
+                return
+            body = json.loads(data)
+            for movie in body.get('movies', []):
+                self.catalog[movie['serialNumber']] = movie['_id']
+            cursor = body.get('nextCursor')
+            if not cursor:
+                return
+
+    async def play(self, serial: str) -> None:
+        movie_id = self.catalog[serial]
+        master_path = f'/api/hls/{FIXTURE_NAME}/{serial}_1080p/master.m3u8'
+        status, data = await self.call('master.m3u8', 'GET', master_path)
+        if status != 200:
+            return
+        variant = first_variant(data.decode('utf-8', 'replace'))
+        variant_path = playlist_url(variant, master_path) if variant else master_path
+        if variant:
+            status, data = await self.call('variant.m3u8', 'GET', variant_path)
+            if status != 200:
+                return
+        segments = parse_media_playlist(data.decode('utf-8', 'replace'))
+        self.stats.sessions += 1
+
+        speed = self.args.speed
+        buffer = max(1, self.args.buffer)
+        offsets = [0.0]  # 세그먼트 n 의 재생 시작 위치(초)
+        for duration, _, _ in segments:
+            offsets.append(offsets[-1] + duration)
+        next_tick = self.args.tick
+        playback_start = None
+        for n, (_, uri, byterange) in enumerate(segments):
+            if self.remaining() <= 0:
+                return
+            await self.call('segment', 'GET', urljoin(variant_path, uri), discard=True, byterange=byterange)
+            arrived = time.perf_counter()
+
+            if playback_start is None:
+                if n + 1 < buffer:
+                    continue  # 시작 버퍼는 바로 채움
+                playback_start = arrived
+            elif arrived > playback_start + offsets[n] / speed:
+                self.stats.stalls += 1  # 재생 위치가 이 세그먼트에 도달한 뒤에 도착
+
+            # 다음 세그먼트는 버퍼가 한 칸 빌 때(= n-buffer+1 번 세그먼트 재생이 끝날 때) 요청
+            played = offsets[n - buffer + 2] if n - buffer + 2 < len(offsets) else offsets[-1]
+            due = playback_start + played / speed
+            await asyncio.sleep(max(0.0, min(due - time.perf_counter(), self.remaining())))
+
+            while played >= next_tick:
+                await self.call('watch-history', 'POST', '/api/watch-history', {
+                    'movieId': movie_id, 'lastWatchedTime': int(next_tick)
+                })
+                next_tick += self.args.tick
+
+    async def run(self) -> None:
+        try:
+            if not await self.login():
+                return
+            while self.remaining() > 0:
+                await self.browse()
+                candidates = [s for s in self.catalog if s in self.fixture_serials]
+                if not candidates:
+                    print(f"[viewer {self.idx}] 재생할 fixture 영화가 목록에 없습니다.", file=sys.stderr)
+                    return
+                await self.play(random.choice(candidates))
+        finally:
+            await self.client.close()
+
+
+async def run_load(args, fixture_serials: set) -> Stats:
+    stats = Stats()
+    deadline = time.perf_counter() + args.duration
+    viewers = [Viewer(i, args, stats, deadline, fixture_serials) for i in range(args.viewers)]
+
+    async def start(viewer, delay):
+        await asyncio.sleep(delay)
+        await viewer.run()
+
+    ramp = args.ramp / max(args.viewers, 1)
+    await asyncio.gather(*(start(v, i * ramp) for i, v in enumerate(viewers)))
+    stats.finished = time.perf_counter()
+    return stats
+
+
+# -----------------------------
+# 로컬 mongod / App.js 실행
+# -----------------------------
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_port(port: int, proc: subprocess.Popen, timeout: float = 30) -> None:
+    end = time.time() + timeout
+    while time.time() < end:
+        if proc.poll() is not None:
+            raise RuntimeError(f"프로세스가 종료됨 (exit {proc.returncode}): {' '.join(proc.args)}")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"포트 {port} 대기 시간 초과")
+
+
+class LocalStack:
+    """임시 mongod + seed + App.js. 종료 시 프로세스와 임시 DB 폴더를 정리한다."""
+
+    def __init__(self, args):
+        self.args = args
+        self.procs: List[subprocess.Popen] = []
+        self.db_dir = None
+
+    def __enter__(self):
+        args = self.args
+        for binary in (args.mongod, args.node):
+            if shutil.which(binary) is None:
+                raise RuntimeError(f"{binary} 를 찾을 수 없습니다.")
+
+        self.db_dir = tempfile.mkdtemp(prefix='movieapi_loadtest_')
+        mongo_port = free_port()
+        log = subprocess.DEVNULL if not args.verbose else None
+        mongod = subprocess.Popen([args.mongod, '--dbpath', self.db_dir, '--port', str(mongo_port),
+                                   '--bind_ip', '127.0.0.1', '--quiet'], stdout=log, stderr=log)
+        self.procs.append(mongod)
+        wait_port(mongo_port, mongod)
+
+        env = dict(os.environ)
+        env.update({
+            'MONGO_URI': f'mongodb://127.0.0.1:{mongo_port}/movies_loadtest',
+            'LOADTEST_USERS': str(args.users),
+            'LOADTEST_MOVIES': str(args.movies),
+            'LOADTEST_PASSWORD': args.password,
+            'JWT_SECRET': env.get('JWT_SECRET') or os.urandom(16).hex(),
+            'JWT_REFRESH_SECRET': env.get('JWT_REFRESH_SECRET') or os.urandom(16).hex(),
+        })
+        print("테스트 DB seed 중...")
+        subprocess.run([args.node, 'seed_loadtest.js'], cwd=ROOT_DIR, env=env, check=True)
+
+        app_port = free_port()
+        env['PORT'] = str(app_port)
+        app = subprocess.Popen([args.node, 'App.js'], cwd=ROOT_DIR, env=env, stdout=log, stderr=log)
+        self.procs.append(app)
+        wait_port(app_port, app)
+        args.base_url = f'http://127.0.0.1:{app_port}'
+        print(f"서버 실행: {args.base_url} (mongod :{mongo_port})")
+        return self
+
+    def __exit__(self, *exc):
+        # App.js 는 SIGTERM 에 버퍼를 flush 하고 종료하므로 mongod 보다 먼저 내림
+        for proc in reversed(self.procs):
+            if proc.poll() is None:
+                proc.terminate()
+                try:
+                    proc.wait(timeout=15)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+        if self.db_dir:
+            shutil.rmtree(self.db_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="스트리밍/시청기록/목록 API 부하 테스트")
+    parser.add_argument("--spawn", action="store_true", help="임시 mongod + App.js 를 띄워 로컬에서만 실행")
+    parser.add_argument("--base-url", default="http://127.0.0.1:3001", help="대상 서버 (--spawn 이면 무시)")
+    parser.add_argument("--viewers", type=int, default=20, help="동시 시청자 수 (기본: 20)")
+    parser.add_argument("--duration", type=float, default=60, help="테스트 시간(초, 기본: 60)")
+    parser.add_argument("--ramp", type=float, default=10, help="시청자를 나눠 시작하는 시간(초, 기본: 10)")
+    parser.add_argument("--speed", type=float, default=1.0, help="재생 속도 배수 (기본: 1.0 = 실시간)")
+    parser.add_argument("--buffer", type=int, default=3, help="재생 시작 전 받는 세그먼트 수 (기본: 3)")
+    parser.add_argument("--tick", type=float, default=10, help="시청 위치 저장 주기(재생 초, 기본: 10)")
+    parser.add_argument("--pages", type=int, default=3, help="시청 전 넘겨볼 목록 페이지 수 (기본: 3)")
+    parser.add_argument("--page-size", type=int, default=20, help="목록 페이지 크기 (기본: 20)")
+    parser.add_argument("--users", type=int, help="seed 계정 수 (기본: --viewers)")
+    parser.add_argument("--movies", type=int, default=200, help="seed 영화 수 (기본: 200)")
+    parser.add_argument("--password", default="loadtest", help="seed 계정 비밀번호")
+    parser.add_argument("--fixtures", type=int, default=5, help="HLS fixture 를 만들 영화 수 (기본: 5)")
+    parser.add_argument("--segments", type=int, default=15, help="fixture 당 세그먼트 수 (기본: 15)")
+    parser.add_argument("--segment-seconds", type=int, default=4, help="세그먼트 길이(초, 기본: 4)")
+    parser.add_argument("--bitrate-kbps", type=int, default=2000, help="fixture 비트레이트 (기본: 2000)")
+    parser.add_argument("--build-fixtures", action="store_true",
+                        help="--spawn 없이도 hls/_loadtest 에 fixture 를 만듦 (--spawn 이면 항상 만듦)")
+    parser.add_argument("--keep-fixtures", action="store_true", help="종료 후 hls/_loadtest 를 지우지 않음")
+    parser.add_argument("--mongod", default="mongod", help="mongod 실행 파일")
+    parser.add_argument("--node", default="node", help="node 실행 파일")
+    parser.add_argument("--json", help="결과를 JSON 파일로 저장")
+    parser.add_argument("--verbose", action="store_true", help="서버 로그와 요청 오류 출력")
+    args = parser.parse_args()
+    args.users = args.users or args.viewers
+    args.fixtures = min(args.fixtures, args.movies)
+    if args.pages * args.page_size < args.fixtures:
+        print("경고: 넘겨보는 목록 범위가 fixture 수보다 작아 일부 fixture 만 재생됩니다.")
+
+    build = args.spawn or args.build_fixtures
+    if build:
+        print(f"fixture 생성: {args.fixtures}개 x {args.segments}세그먼트 ({FIXTURE_DIR})")
+        build_fixtures(args.fixtures, args.segments, args.segment_seconds, args.bitrate_kbps)
+    fixture_serials = {fixture_serial(i) for i in range(args.fixtures)}
+    if aiohttp is None:
+        print("aiohttp 가 없어 내장 HTTP 클라이언트를 사용합니다.")
+
+    try:
+        if args.spawn:
+            with LocalStack(args):
+                stats = asyncio.run(run_load(args, fixture_serials))
+        else:
+            stats = asyncio.run(run_load(args, fixture_serials))
+    except (RuntimeError, subprocess.CalledProcessError) as e:
+        print(f"오류: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if build and not args.keep_fixtures:
+            shutil.rmtree(FIXTURE_DIR, ignore_errors=True)
+
+    summary = stats.summary()
+    print_report(summary)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
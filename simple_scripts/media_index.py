@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+uploads/ 와 hls/ 를 한 번에 훑어 미디어 인덱스(media_index.json)를 만드는 스크립트.
+
+원본 영상마다 자막(언어별 .vtt), 원본 자막(.srt/.smi), HLS 렌디션(화질별 폴더)과
+크기/수정 시각을 정리해 두어, 라우트(utils/mediaIndex.js)와 스크립트가 경로마다
+existsSync / listdir 를 반복하지 않고 인덱스를 조회하도록 합니다.
+
+인덱스 구조:
+  dirs    : 폴더별 {mtime, files, subdirs} (렌디션 폴더는 {mtime, rendition} 요약만)
+  sources : 키(routes/streaming.js 의 hls 폴더 규칙, 예: "series/ABC-123") 별
+            {videos, subtitles: {lang: ...}, rawSubtitles, renditions: {resolution: ...}}
+
+증분 갱신:
+  폴더 mtime 이 이전 인덱스와 같으면 그 폴더는 다시 읽지 않고 이전 결과를 재사용합니다.
+  (파일 추가/삭제/이름 변경은 폴더 mtime 을 바꾸므로 감지됨)
+  같은 이름으로 내용만 덮어쓴 경우는 --full 로 전체를 다시 읽어야 크기/시각이 갱신됩니다.
+
+사용법:
+  python media_index.py [--full] [--watch 60] [--show series/ABC-123]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+from cuestore import LANG_CODES
+from hls_layout import RENDITION_RE, ROOT_DIR, rendition_key
+
+INDEX_PATH = os.environ.get('MEDIA_INDEX_PATH', os.path.join(ROOT_DIR, 'media_index.json'))
+SCAN_ROOTS = ('uploads', 'hls')
+INDEX_VERSION = 1
+
+VIDEO_EXTS = ('.mp4', '.mkv', '.avi', '.mov')
+SUBTITLE_EXTS = ('.vtt', '.srt', '.smi')
+PLAYLISTS = ('master.m3u8', 'video.m3u8')
+
+
+# -----------------------------
+# 폴더 스캔
+# -----------------------------
+def _is_media(name: str) -> bool:
+    return name.lower().endswith(VIDEO_EXTS + SUBTITLE_EXTS + ('.m3u8',))
+
+
+def _playlist_finished(path: str) -> bool:
+    try:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            return '#EXT-X-ENDLIST' in f.read()
+    except OSError:
+        return False
+
+
+def _read_dir(abs_dir: str, rel: str, mtime: float) -> dict:
+    files: Dict[str, list] = {}
+    subdirs: List[str] = []
+    names = []
+    total = 0
+    with os.scandir(abs_dir) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.name)
+                continue
+            names.append(entry.name)
+            if _is_media(entry.name):
+                st = entry.stat()
+                files[entry.name] = [st.st_size, st.st_mtime]
+                total += st.st_size
+
+    is_rendition = (rel.startswith('hls/') and RENDITION_RE.match(os.path.basename(rel))
+                    and any(p in files for p in PLAYLISTS))
+    if not is_rendition:
+        return {'mtime': mtime, 'files': files, 'subdirs': sorted(subdirs)}
+
+    # 렌디션 폴더는 세그먼트가 수천 개일 수 있으므로 요약만 저장
+    for name in names:
+        if name not in files:
+            total += os.stat(os.path.join(abs_dir, name)).st_size
+    playlists = [p for p in PLAYLISTS if p in files]
+    return {
+        'mtime': mtime,
+        'rendition': {
+            'size': total,
+            'files': len(names),
+            'playlists': playlists,
+            'subtitles': sorted(n for n in files if n.endswith('.vtt')),
+            'finished': any(_playlist_finished(os.path.join(abs_dir, p)) for p in playlists),
+        },
+    }
+
+
+def _scan_dir(root_dir: str, rel: str, prev_dirs: dict, dirs: dict, full: bool) -> None:
+    abs_dir = os.path.join(root_dir, *rel.split('/'))
+    try:
+        mtime = os.stat(abs_dir).st_mtime
+    except OSError:
+        return
+
+    prev = prev_dirs.get(rel)
+    if not full and prev and prev.get('mtime') == mtime:
+        entry = prev
+    else:
+        entry = _read_dir(abs_dir, rel, mtime)
+    dirs[rel] = entry
+    for name in entry.get('subdirs', []):
+        _scan_dir(root_dir, f"{rel}/{name}", prev_dirs, dirs, full)
+
+
+def _subtitle_lang(stem: str):
+    """'ABC.en' -> ('ABC', 'en'), 'ABC' -> ('ABC', 'ko')  (smiToVtt 출력 규칙)"""
+    base, ext = os.path.splitext(stem)
+    if ext[1:] in LANG_CODES:
+        return base, ext[1:]
+    return stem, 'ko'
+
+
+def build_sources(dirs: dict) -> Dict[str, dict]:
+    sources: Dict[str, dict] = {}
+
+    def source(key):
+        return sources.setdefault(key, {'videos': [], 'subtitles': {}, 'rawSubtitles': [], 'renditions': {}})
+
+    for rel in sorted(dirs):
+        entry = dirs[rel]
+        if 'rendition' in entry:
+            match = RENDITION_RE.match(os.path.basename(rel))
+            parent = os.path.dirname(rel)[len('hls'):].lstrip('/')
+            key = f"{parent}/{match.group(1)}" if parent else match.group(1)
+            source(key)['renditions'][match.group(2)] = dict(entry['rendition'], folder=rel, mtime=entry['mtime'])
+            continue
+
+        for name, (size, mtime) in sorted(entry['files'].items()):
+            path = f"{rel}/{name}"
+            stem, ext = os.path.splitext(name)
+            ext = ext.lower()
+            info = {'path': path, 'size': size, 'mtime': mtime}
+            if ext in VIDEO_EXTS:
+                source(rendition_key(path))['videos'].append(info)
+            elif ext == '.vtt':
+                base, lang = _subtitle_lang(stem)
+                source(rendition_key(f"{rel}/{base}{ext}"))['subtitles'][lang] = info
+            elif ext in SUBTITLE_EXTS:
+                base, _ = _subtitle_lang(stem)
+                source(rendition_key(f"{rel}/{base}{ext}"))['rawSubtitles'].append(info)
+    return sources
+
+
+def scan(root_dir: str = ROOT_DIR, previous: Optional[dict] = None, full: bool = False) -> dict:
+    prev_dirs = (previous or {}).get('dirs', {}) if (previous or {}).get('version') == INDEX_VERSION else {}
+    dirs: Dict[str, dict] = {}
+    for top in SCAN_ROOTS:
+        _scan_dir(root_dir, top, prev_dirs, dirs, full)
+    return {'version': INDEX_VERSION, 'generatedAt': time.time(), 'dirs': dirs, 'sources': build_sources(dirs)}
+
+
+# -----------------------------
+# 인덱스 파일
+# -----------------------------
+def load_index(path: str = INDEX_PATH) -> Optional[dict]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_index(index: dict, path: str = INDEX_PATH) -> None:
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp, path)
+
+
+def refresh(root_dir: str = ROOT_DIR, path: str = INDEX_PATH, full: bool = False) -> dict:
+    """이전 인덱스를 기준으로 바뀐 폴더만 다시 읽어 저장하고 새 인덱스를 반환."""
+    index = scan(root_dir, None if full else load_index(path), full)
+    save_index(index, path)
+    return index
+
+
+def list_files(folder: str, index: Optional[dict] = None, root_dir: str = ROOT_DIR) -> List[str]:
+    """
+    folder 의 미디어 파일 이름 목록.
+    인덱스에 있고 폴더 mtime 이 그대로면 인덱스를, 아니면 os.scandir 한 번으로 읽는다.
+    """
+    rel = os.path.relpath(os.path.abspath(folder), root_dir).replace(os.sep, '/')
+    entry = (index or {}).get('dirs', {}).get(rel)
+    if entry and 'files' in entry:
+        try:
+            if os.stat(folder).st_mtime == entry['mtime']:
+                return sorted(entry['files'])
+        except OSError:
+            pass
+    with os.scandir(folder) as it:
+        return sorted(e.name for e in it if e.is_file() and _is_media(e.name))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="uploads/, hls/ 미디어 인덱스 생성 (증분)")
+    parser.add_argument("--root", default=ROOT_DIR, help="프로젝트 루트 (기본: 스크립트 상위 폴더)")
+    parser.add_argument("--output", default=INDEX_PATH, help="인덱스 파일 경로 (기본: <root>/media_index.json)")
+    parser.add_argument("--full", action="store_true", help="이전 인덱스를 무시하고 전체를 다시 읽음")
+    parser.add_argument("--watch", type=float, help="지정한 초마다 반복 갱신")
+    parser.add_argument("--show", help="해당 키의 인덱스 항목 출력 (예: series/ABC-123)")
+    args = parser.parse_args()
+
+    if not any(os.path.isdir(os.path.join(args.root, top)) for top in SCAN_ROOTS):
+        print(f"uploads/, hls/ 폴더가 없습니다: {args.root}", file=sys.stderr)
+        sys.exit(1)
+
+    full = args.full
+    while True:
+        started = time.time()
+        index = refresh(args.root, args.output, full)
+        print(f"인덱스 갱신: 폴더 {len(index['dirs'])}개, 원본 {len(index['sources'])}개 "
+              f"({time.time() - started:.2f}초) → {args.output}")
+        if args.show:
+            print(json.dumps(index['sources'].get(args.show), ensure_ascii=False, indent=2))
+        if not args.watch:
+            break
+        full = False
+        time.sleep(args.watch)
+
+
+if __name__ == '__main__':
+    main()
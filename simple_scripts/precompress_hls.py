@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+hls/ 폴더의 playlist(.m3u8)와 자막(.vtt) 옆에 미리 압축한 .gz / .br 파일을 만드는 스크립트.
+
+서버(middleware/hlsStatic.js)는 클라이언트가 지원하고 압축본이 원본보다 최신이면
+압축본을 그대로 전송하므로 요청마다 압축하는 CPU 비용이 없습니다.
+
+주의:
+  - 트랜스코딩 중인(#EXT-X-ENDLIST 가 없는) 미디어 playlist 는 계속 바뀌므로 건너뜁니다.
+  - .br 생성에는 brotli 패키지가 필요합니다. (pip install brotli) 없으면 .gz 만 만듭니다.
+
+사용법:
+  python precompress_hls.py [--hls_dir ../hls] [--force]
+"""
+
+import argparse
+import gzip
+import os
+import sys
+from typing import Iterator
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HLS_DIR = os.path.join(ROOT_DIR, 'hls')
+TARGET_EXTS = ('.m3u8', '.vtt')
+MIN_SIZE = 1024
+
+
+def iter_targets(root: str) -> Iterator[os.DirEntry]:
+    with os.scandir(root) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_targets(entry.path)
+            elif entry.name.endswith(TARGET_EXTS):
+                yield entry
+
+
+def is_unfinished_playlist(data: bytes) -> bool:
+    return b'#EXT-X-STREAM-INF' not in data and b'#EXT-X-ENDLIST' not in data
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def compress_file(entry: os.DirEntry, force: bool) -> int:
+    """생성한 압축 파일 수를 반환."""
+    stat = entry.stat()
+    if stat.st_size < MIN_SIZE:
+        return 0
+
+    outputs = [('.gz', lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        outputs.append(('.br', lambda d: brotli.compress(d, quality=11)))
+
+    stale = [
+        (ext, fn) for ext, fn in outputs
+        if force or not os.path.exists(entry.path + ext) or os.path.getmtime(entry.path + ext) < stat.st_mtime
+    ]
+    if not stale:
+        return 0
+
+    with open(entry.path, 'rb') as f:
+        data = f.read()
+    if entry.name.endswith('.m3u8') and is_unfinished_playlist(data):
+        return 0
+
+    for ext, fn in stale:
+        write_atomic(entry.path + ext, fn(data))
+    return len(stale)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HLS playlist/자막 사전 압축 (.gz/.br)")
+    parser.add_argument("--hls_dir", default=HLS_DIR, help="HLS 루트 폴더 (기본: <repo>/hls)")
+    parser.add_argument("--force", action="store_true", help="최신 압축본이 있어도 다시 생성")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.hls_dir):
+        print(f"경로 없음: {args.hls_dir}", file=sys.stderr)
+        sys.exit(1)
+    if brotli is None:
+        print("brotli 패키지가 없어 .gz 만 생성합니다. (pip install brotli)")
+
+    files, written = 0, 0
+    for entry in iter_targets(args.hls_dir):
+        files += 1
+        try:
+            written += compress_file(entry, args.force)
+        except OSError as e:
+            print(f"오류 ({entry.path}): {e}", file=sys.stderr)
+
+    print(f"대상 {files}개 중 압축 파일 {written}개 생성 완료.")
+
+
+if __name__ == '__main__':
+    main()
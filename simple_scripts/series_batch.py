@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+시리즈(시즌) 단위 일괄 트랜스코딩 + 자막 처리 스크립트.
+
+LocalTranscoding / add_subs_to_hls 는 에피소드를 서로 무관한 파일로 보고 한 편씩
+probe -> ffmpeg 를 반복합니다. 이 스크립트는 시즌을 한 작업으로 처리합니다.
+
+입력:
+  - Movie _id : episodes[].video (화질별 경로) 와 episodes[].sub 를 사용 (pymongo 필요)
+                원본 영상은 미디어 인덱스(media_index.py)에서 같은 키로 찾습니다.
+  - 폴더      : 폴더 안의 영상 파일을 파일명 순서대로 에피소드로 간주
+
+처리:
+  1) 모든 에피소드를 한 번에(동시에) probe: 길이, 오디오 트랙
+  2) 인코더 설정을 시즌 전체가 공유
+     --optimize 면 가장 긴 에피소드 하나만 encode_optimizer 로 분석해 같은 CRF/maxrate 사용
+     바로 위 화질이 비트레이트를 거의 더 쓰지 않으면서 원본 기준 품질도 같거나 높아 생략 가능으로 나온
+     아래 화질(recommended=False)은, 위 화질도 만드는 에피소드에서 만들지 않음 (가장 높은 화질은 항상 생성)
+     (--all-rungs 로 모두 생성. 만들지 않은 화질은 재생 요청 시 /api/stream 이 실시간으로 만듦)
+  3) 에피소드를 --jobs 개씩 동시에 트랜스코딩 (한 에피소드의 화질들은 순서대로 처리해
+     공유 오디오 폴더를 두 작업이 동시에 만들지 않음), 진행률은 시즌 전체로 합산해 표시
+  4) 자막: 원본 옆의 같은 이름 자막은 LocalTranscoding 이 처리하고,
+     이름이 다른 episodes[].sub 가 있으면 그 자막으로 교체 (master 의 자막 그룹은 하나만 유지)
+  5) 에피소드별 결과/크기/소요 시간과 시즌 합계 요약 (--report 로 JSON 저장)
+
+이미 완료된(#EXT-X-ENDLIST) 렌디션은 건너뜁니다. (--force 로 다시 생성)
+
+사용법:
+  python series_batch.py <movie_id | folder> [--resolutions 1080p 720p] [--jobs 2]
+                         [--optimize [--all-rungs] | --crf 22] [--shared-audio] [--single-file]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from bson import ObjectId
+    from pymongo import MongoClient
+except ImportError:  # pragma: no cover - optional dependency
+    MongoClient = None
+
+import encode_optimizer
+import LocalTranscoding
+import media_index
+from hls_layout import DEFAULT_MONGO_URI, HLS_DIR, ROOT_DIR, is_finished, rendition_key
+
+RESOLUTIONS = ('1080p', '720p')  # LocalTranscoding 이 지원하는 화질
+PROGRESS_INTERVAL = 10
+
+
+@dataclass
+class Episode:
+    number: int
+    title: str
+    source: str                          # 원본 영상 절대 경로
+    key: str                             # hls/ 폴더 키 (예: "Show/S01E01")
+    resolutions: List[str]
+    subtitle: Optional[str] = None       # episodes[].sub (원본과 이름이 다를 때만)
+    duration: float = 0.0
+    audio_streams: list = field(default_factory=list)
+    results: Dict[str, str] = field(default_factory=dict)  # 화질 -> done / skipped / redundant / failed / missing
+    encoded: Dict[str, float] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    @property
+    def output_folder(self) -> str:
+        parent = os.path.dirname(self.key)
+        return os.path.join(HLS_DIR, *parent.split('/')) if parent else HLS_DIR
+
+    def hls_path(self, resolution: str) -> str:
+        return os.path.join(self.output_folder, f"{os.path.basename(self.key)}_{resolution}")
+
+
+# -----------------------------
+# 에피소드 목록
+# -----------------------------
+def _abs(path: str) -> str:
+    return path if os.path.isabs(path) else os.path.join(ROOT_DIR, path)
+
+
+def episodes_from_folder(folder: str, resolutions: List[str]) -> List[Episode]:
+    names = sorted(f for f in media_index.list_files(folder, media_index.load_index())
+                   if f.lower().endswith(media_index.VIDEO_EXTS))
+    episodes = []
+    for n, name in enumerate(names, 1):
+        source = os.path.abspath(os.path.join(folder, name))
+        rel = os.path.relpath(source, ROOT_DIR).replace(os.sep, '/')
+        key = rendition_key(rel) if not rel.startswith('..') else os.path.splitext(name)[0]
+        episodes.append(Episode(n, os.path.splitext(name)[0], source, key, list(resolutions)))
+    return episodes
+
+
+def episodes_from_movie(movie_id: str, resolutions: Optional[List[str]], mongo_uri: str) -> List[Episode]:
+    if not ObjectId.is_valid(movie_id):
+        raise ValueError(f"폴더도 Movie _id 도 아닙니다: {movie_id}")
+    client = MongoClient(mongo_uri)
+    try:
+        movie = client.get_default_database().movies.find_one(
+            {'_id': ObjectId(movie_id)}, {'title': 1, 'isSeries': 1, 'episodes': 1})
+    finally:
+        client.close()
+    if movie is None:
+        raise ValueError(f"영화를 찾을 수 없습니다: {movie_id}")
+    if not movie.get('episodes'):
+        raise ValueError(f"에피소드가 없습니다: {movie.get('title')}")
+
+    sources = media_index.refresh()['sources']
+    episodes = []
+    for n, ep in enumerate(movie['episodes'], 1):
+        paths = {q.lower(): p for q, p in (ep.get('video') or {}).items() if p}
+        wanted = list(resolutions) if resolutions else [q for q in RESOLUTIONS if q in paths]
+        source, key = None, None
+        for path in paths.values():
+            key = rendition_key(path)
+            if path.lower().endswith(media_index.VIDEO_EXTS) and os.path.exists(_abs(path)):
+                source = _abs(path)
+                break
+            videos = sources.get(key, {}).get('videos')
+            if videos:
+                source = _abs(videos[0]['path'])
+                break
+        if key is None:
+            print(f"  [{n}] {ep.get('title')}: video 경로가 없어 건너뜀")
+            continue
+
+        episode = Episode(n, ep.get('title') or key, source or '', key, wanted or list(RESOLUTIONS[:1]))
+        sub = ep.get('sub')
+        if sub and os.path.exists(_abs(sub)) and source \
+                and os.path.splitext(_abs(sub))[0] != os.path.splitext(source)[0]:
+            episode.subtitle = _abs(sub)
+        episodes.append(episode)
+    return episodes
+
+
+# -----------------------------
+# probe (시즌 전체 한 번)
+# -----------------------------
+def probe_episode(episode: Episode) -> None:
+    # 단일 파일 경로(LocalTranscoding.transcode_to_hls)와 같은 probe 를 사용
+    episode.duration = LocalTranscoding.probe_duration(episode.source)
+    episode.audio_streams = LocalTranscoding.probe_audio_streams(episode.source)
+
+
+def probe_all(episodes: List[Episode], workers: int) -> None:
+    def run(ep):
+        try:
+            probe_episode(ep)
+        except (subprocess.CalledProcessError, ValueError) as e:
+            print(f"  [{ep.number}] probe 실패 ({e}), 길이를 알 수 없음")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(run, [ep for ep in episodes if ep.source]))
+
+
+# -----------------------------
+# 공유 인코더 설정
+# -----------------------------
+def shared_rates(episodes: List[Episode], resolutions: List[str], optimize: bool,
+                 crf: Optional[int]) -> Tuple[Dict[str, tuple], List[str]]:
+    """(화질별 (rate_args, bandwidth), 생략 가능한 아래 화질 목록).
+    rates 가 비어 있으면 LocalTranscoding 기본값(CRF 20) 사용."""
+    if crf is not None:
+        return {r: (['-crf', str(crf)], 2000000) for r in resolutions}, []
+    if not optimize:
+        return {}, []
+    sample = max((ep for ep in episodes if ep.source), key=lambda ep: ep.duration, default=None)
+    if sample is None:
+        return {}, []
+    print(f"대표 에피소드 분석: {sample.title} ({sample.duration:.0f}초)")
+    try:
+        decision = encode_optimizer.optimize(sample.source, rungs=resolutions)
+    except (subprocess.CalledProcessError, RuntimeError, ValueError) as e:
+        print(f"  분석 실패 ({e}), 기본 CRF 사용")
+        return {}, []
+    encode_optimizer.log_decision(decision)
+    encode_optimizer.print_decision(decision)
+    rates = {}
+    for resolution in resolutions:
+        rung = decision['rungs'].get(resolution) or next(iter(decision['rungs'].values()))
+        rates[resolution] = (encode_optimizer.rate_args(rung), rung['maxrateKbps'] * 1000)
+    return rates, encode_optimizer.redundant_rungs(decision)
+
+
+def drop_redundant(episodes: List[Episode], redundant: List[str]) -> None:
+    """생략 가능한 아래 화질을, 바로 위 화질도 만드는 에피소드에서만 빼고 결과에 redundant 로 기록."""
+    for ep in episodes:
+        keep = []
+        for resolution in ep.resolutions:
+            upper = RESOLUTIONS.index(resolution) - 1  # RESOLUTIONS 는 높은 화질부터
+            if resolution in redundant and upper >= 0 and RESOLUTIONS[upper] in ep.resolutions:
+                ep.results[resolution] = 'redundant'
+            else:
+                keep.append(resolution)
+        ep.resolutions = keep
+
+
+# -----------------------------
+# 진행률
+# -----------------------------
+class Progress:
+    """에피소드 x 화질 작업의 인코딩 시간(초)을 합산해 시즌 전체 진행률을 주기적으로 출력."""
+
+    def __init__(self, episodes: List[Episode]):
+        self.episodes = episodes
+        self.total = sum(ep.duration * len(ep.resolutions) for ep in episodes) or 1.0
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+
+    def update(self, episode: Episode, resolution: str, seconds: float) -> None:
+        with self.lock:
+            episode.encoded[resolution] = min(seconds, episode.duration or seconds)
+
+    def line(self) -> str:
+        with self.lock:
+            done = sum(sum(ep.encoded.values()) for ep in self.episodes)
+            finished = sum(1 for ep in self.episodes for r in ep.resolutions
+                           if ep.results.get(r) not in (None, 'running'))
+        jobs = sum(len(ep.resolutions) for ep in self.episodes)
+        ratio = min(done / self.total, 1.0)
+        elapsed = time.time() - self.started
+        eta = f", 남은 시간 약 {_clock(elapsed / ratio - elapsed)}" if 0.01 < ratio < 1 else ''
+        return f"[시즌] {ratio * 100:5.1f}% ({finished}/{jobs} 작업 완료), 경과 {_clock(elapsed)}{eta}"
+
+    def _loop(self) -> None:
+        while not self.stop.wait(PROGRESS_INTERVAL):
+            print(self.line(), flush=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop.set()
+        self.thread.join()
+
+
+def _clock(seconds: float) -> str:
+    seconds = int(max(seconds, 0))
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+# -----------------------------
+# 처리
+# -----------------------------
+def process_episode(episode: Episode, rates: Dict[str, tuple], progress: Progress, args) -> None:
+    started = time.time()
+    for resolution in episode.resolutions:
+        hls_path = episode.hls_path(resolution)
+        if not args.force and os.path.isdir(hls_path) and is_finished(hls_path):
+            episode.results[resolution] = 'skipped'
+            progress.update(episode, resolution, episode.duration)
+            continue
+        if not episode.source:
+            episode.results[resolution] = 'missing'
+            continue
+
+        episode.results[resolution] = 'running'
+        ok = LocalTranscoding.transcode_to_hls(
+            episode.source, episode.output_folder, resolution,
+            shared_audio=args.shared_audio, single_file=args.single_file,
+            audio_streams=episode.audio_streams, rate=rates.get(resolution),
+            progress=lambda t, r=resolution: progress.update(episode, r, t))
+        if ok and episode.subtitle:
+            try:
+                LocalTranscoding.process_hls_subtitles(hls_path, episode.subtitle)
+            except subprocess.CalledProcessError as e:
+                print(f"  [{episode.number}] 자막 처리 실패: {e}")
+        episode.results[resolution] = 'done' if ok else 'failed'
+        progress.update(episode, resolution, episode.duration if ok else 0)
+    episode.elapsed = time.time() - started
+
+
+def folder_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+    return total
+
+
+def summarize(episodes: List[Episode], started: float) -> dict:
+    rows = []
+    for ep in episodes:
+        rows.append({
+            'episode': ep.number,
+            'title': ep.title,
+            'key': ep.key,
+            'source': ep.source,
+            'duration': round(ep.duration, 1),
+            'results': ep.results,
+            'size': sum(folder_size(ep.hls_path(r)) for r in ep.resolutions if os.path.isdir(ep.hls_path(r))),
+            'elapsed': round(ep.elapsed, 1),
+        })
+    counts: Dict[str, int] = {}
+    for ep in episodes:
+        for status in ep.results.values():
+            counts[status] = counts.get(status, 0) + 1
+    return {
+        'episodes': rows,
+        'counts': counts,
+        'duration': round(sum(ep.duration for ep in episodes), 1),
+        'size': sum(r['size'] for r in rows),
+        'elapsed': round(time.time() - started, 1),
+    }
+
+
+def print_summary(summary: dict) -> None:
+    print("\n시즌 요약")
+    for row in summary['episodes']:
+        results = ', '.join(f"{r} {s}" for r, s in row['results'].items()) or '-'
+        print(f"  {row['episode']:>3}. {row['title'][:40]:<40} {_clock(row['duration'])}  "
+              f"{row['size'] / 1024 ** 3:6.2f}GB  {_clock(row['elapsed'])}  {results}")
+    counts = ', '.join(f"{k} {v}" for k, v in sorted(summary['counts'].items()))
+    print(f"  합계: 에피소드 {len(summary['episodes'])}편, 재생 시간 {_clock(summary['duration'])}, "
+          f"{summary['size'] / 1024 ** 3:.2f}GB, 소요 {_clock(summary['elapsed'])} ({counts})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="시리즈(시즌) 단위 일괄 HLS 트랜스코딩 + 자막 처리")
+    parser.add_argument("target", help="Movie _id 또는 에피소드 영상이 있는 폴더")
+    parser.add_argument("--resolutions", nargs='+', choices=RESOLUTIONS,
+                        help="만들 화질 (기본: Movie 는 episodes[].video 의 화질, 폴더는 1080p)")
+    parser.add_argument("--jobs", type=int, default=2, help="동시에 처리할 에피소드 수 (기본: 2)")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--optimize", action="store_true", help="대표 에피소드 하나로 시즌 공통 CRF/maxrate 결정")
+    group.add_argument("--crf", type=int, help="시즌 공통 CRF")
+    parser.add_argument("--all-rungs", action="store_true",
+                        help="--optimize 에서 생략 가능으로 나온 아래 화질도 생성")
+    parser.add_argument("--shared-audio", action="store_true", help="오디오 트랙을 <이름>_audio/ 에 한 번만 생성")
+    parser.add_argument("--single-file", action="store_true", help="렌디션당 미디어 파일 하나(#EXT-X-BYTERANGE)로 출력")
+    parser.add_argument("--force", action="store_true", help="완료된 렌디션도 다시 생성")
+    parser.add_argument("--mongo", default=DEFAULT_MONGO_URI, help="MongoDB URI")
+    parser.add_argument("--report", help="요약을 JSON 으로 저장할 경로")
+    args = parser.parse_args()
+
+    started = time.time()
+    try:
+        if os.path.isdir(args.target):
+            episodes = episodes_from_folder(args.target, args.resolutions or ['1080p'])
+        else:
+            if MongoClient is None:
+                print("pymongo 가 필요합니다: pip install pymongo", file=sys.stderr)
+                sys.exit(1)
+            episodes = episodes_from_movie(args.target, args.resolutions, args.mongo)
+    except ValueError as e:
+        print(f"오류: {e}", file=sys.stderr)
+        sys.exit(1)
+    if not episodes:
+        print("처리할 에피소드가 없습니다.")
+        return
+
+    print(f"에피소드 {len(episodes)}편 probe 중...")
+    probe_all(episodes, max(args.jobs, 4))
+    resolutions = sorted({r for ep in episodes for r in ep.resolutions}, key=RESOLUTIONS.index)
+    rates, redundant = shared_rates(episodes, resolutions, args.optimize, args.crf)
+    if redundant and not args.all_rungs:
+        print(f"위 화질과 차이가 적어 생략하는 화질: {', '.join(redundant)} (--all-rungs 로 생성)")
+        drop_redundant(episodes, redundant)
+
+    with Progress(episodes) as progress, ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        for future in [pool.submit(process_episode, ep, rates, progress, args) for ep in episodes]:
+            future.result()
+        print(progress.line())
+
+    summary = summarize(episodes, started)
+    print_summary(summary)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"요약 저장: {args.report}")
+    if summary['counts'].get('failed') or summary['counts'].get('missing'):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+영상 오디오를 기준으로 자막 싱크(오프셋/드리프트)를 자동으로 맞추는 스크립트.
+
+X-TIMESTAMP-MAP 보정은 HLS 세그먼트 PTS 차이만 해결하므로, 다른 판본에 맞춰진
+.smi/.srt/.vtt 자막은 이 스크립트로 먼저 맞춘 뒤 사용합니다.
+
+동작:
+  1) ffmpeg 로 오디오를 8kHz mono PCM 으로 디코딩 (파이프로 스트리밍 처리)
+  2) 10ms 프레임 단위 에너지로 음성 구간 엔벨로프 계산 (numpy 벡터 연산)
+  3) 자막 큐의 on/off 타임라인과 FFT 교차상관 → 최적 오프셋
+  4) --drift 지정 시 구간별 오프셋을 구해 선형 드리프트(배속 차이)까지 추정
+  5) 보정된 VTT 저장
+
+사용법:
+  python subtitle_sync.py --video movie.mp4 --sub movie.smi [--drift] [--max-offset 120]
+
+주의:
+  - numpy 와 ffmpeg 가 필요합니다.
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+
+from cuestore import LANG_CODES, CueStore, read_file, write_vtt
+
+SAMPLE_RATE = 8000
+HOP_MS = 10
+HOP = SAMPLE_RATE * HOP_MS // 1000
+
+
+# -----------------------------
+# 오디오 → 음성 엔벨로프
+# -----------------------------
+def audio_envelope(video_path: str, chunk_seconds: int = 60) -> np.ndarray:
+    """HOP_MS 단위 프레임의 음성 활동도(0~1)를 반환."""
+    cmd = [
+        'ffmpeg', '-v', 'error', '-i', video_path,
+        '-vn', '-ac', '1', '-ar', str(SAMPLE_RATE), '-f', 's16le', '-'
+    ]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE)
+    chunk_bytes = SAMPLE_RATE * chunk_seconds * 2
+    energies = []
+    tail = b''
+    while True:
+        data = proc.stdout.read(chunk_bytes)
+        if not data:
+            break
+        data = tail + data
+        usable = len(data) // (HOP * 2) * (HOP * 2)
+        tail = data[usable:]
+        pcm = np.frombuffer(data[:usable], dtype=np.int16).astype(np.float32)
+        # 1차 차분(프리엠퍼시스)으로 저역 음악/효과음 비중을 줄임
+        pcm[1:] -= 0.97 * pcm[:-1]
+        energies.append((pcm.reshape(-1, HOP) ** 2).mean(axis=1))
+    if proc.wait() != 0:
+        raise RuntimeError(f"ffmpeg 오디오 디코딩 실패: {video_path}")
+    if not energies:
+        raise RuntimeError("오디오 스트림이 없습니다.")
+
+    log_e = np.log10(np.concatenate(energies) + 1.0)
+    lo, hi = np.percentile(log_e, [20, 90])
+    return np.clip((log_e - lo) / max(hi - lo, 1e-6), 0.0, 1.0)
+
+
+def cue_timeline(starts: np.ndarray, ends: np.ndarray, n_frames: int) -> np.ndarray:
+    """큐가 표시되는 프레임은 1, 나머지는 0."""
+    s = np.clip(starts // HOP_MS, 0, n_frames)
+    e = np.clip(ends // HOP_MS, 0, n_frames)
+    edges = np.zeros(n_frames + 1, dtype=np.int32)
+    np.add.at(edges, s, 1)
+    np.add.at(edges, e, -1)
+    return (np.cumsum(edges[:-1]) > 0).astype(np.float32)
+
+
+# -----------------------------
+# 교차상관
+# -----------------------------
+def best_lag(audio: np.ndarray, cues: np.ndarray, max_lag: int) -> Tuple[float, float]:
+    """
+    cues 를 lag 프레임만큼 늦췄을 때 audio 와 가장 잘 맞는 lag 와 신뢰도(z-score)를 반환.
+    lag 는 [-max_lag, max_lag] 범위에서 찾으며 포물선 보간으로 프레임 이하까지 추정.
+    """
+    a = audio - audio.mean()
+    b = cues - cues.mean()
+    n = 1 << int(np.ceil(np.log2(len(a) + len(b))))
+    corr = np.fft.irfft(np.fft.rfft(a, n) * np.conj(np.fft.rfft(b, n)), n)
+    # corr[k] = sum_t a[t + k] * b[t], 음수 lag 는 배열 끝쪽에 위치
+    window = np.concatenate([corr[-max_lag:], corr[:max_lag + 1]])
+    i = int(np.argmax(window))
+    lag = float(i - max_lag)
+    if 0 < i < len(window) - 1:
+        y0, y1, y2 = window[i - 1], window[i], window[i + 1]
+        denom = y0 - 2 * y1 + y2
+        if denom != 0:
+            lag += 0.5 * (y0 - y2) / denom
+    confidence = float((window[i] - window.mean()) / (window.std() + 1e-9))
+    return lag, confidence
+
+
+def estimate_offset(audio: np.ndarray, starts: np.ndarray, ends: np.ndarray, max_offset_s: float) -> Tuple[int, float]:
+    n = max(len(audio), int(ends.max() // HOP_MS) + 1)
+    audio = np.pad(audio, (0, n - len(audio)))
+    lag, confidence = best_lag(audio, cue_timeline(starts, ends, n), int(max_offset_s * 1000 / HOP_MS))
+    return int(round(lag * HOP_MS)), confidence
+
+
+def estimate_drift(audio: np.ndarray, starts: np.ndarray, ends: np.ndarray, base_offset_ms: int,
+                   window_s: float = 600, search_s: float = 10) -> Tuple[float, float]:
+    """
+    구간별 오프셋을 구해 offset(t) = a + b * t 를 가중 최소제곱으로 맞춘다.
+    반환: (a_ms, b)  — 보정 시각은 t + a + b * t
+    """
+    win = int(window_s * 1000)
+    centers, offsets, weights = [], [], []
+    for w_start in range(0, int(ends.max()), win // 2):
+        mask = (starts >= w_start) & (starts < w_start + win)
+        if mask.sum() < 20:
+            continue
+        # 기본 오프셋을 적용한 큐를 해당 구간 오디오와만 비교
+        s = starts[mask] + base_offset_ms
+        e = ends[mask] + base_offset_ms
+        lo = max(int((w_start + base_offset_ms) // HOP_MS) - int(search_s * 100), 0)
+        hi = min(int((w_start + win + base_offset_ms) // HOP_MS) + int(search_s * 100), len(audio))
+        if hi - lo <= 0:
+            continue
+        local = cue_timeline(s - lo * HOP_MS, e - lo * HOP_MS, hi - lo)
+        lag, conf = best_lag(audio[lo:hi], local, int(search_s * 1000 / HOP_MS))
+        if conf < 3:
+            continue
+        centers.append(w_start + win / 2)
+        offsets.append(base_offset_ms + lag * HOP_MS)
+        weights.append(conf)
+
+    if len(centers) < 3:
+        return float(base_offset_ms), 0.0
+    b, a = np.polyfit(np.array(centers), np.array(offsets), 1, w=np.sqrt(weights))
+    return float(a), float(b)
+
+
+# -----------------------------
+# 자막 입출력
+# -----------------------------
+def output_path(sub_path: Path, lang: str) -> Path:
+    """smiToVtt 와 같은 규칙: ko -> name.vtt, 그 외 -> name.<lang>.vtt"""
+    base = sub_path.stem
+    if Path(base).suffix[1:] in LANG_CODES:
+        base = Path(base).stem
+    suffix = '' if lang == 'ko' else f'.{lang}'
+    return sub_path.parent / f"{base}{suffix}.vtt"
+
+
+def apply_correction(cues: CueStore, a_ms: float, b: float) -> CueStore:
+    """t' = t + a + b * t"""
+    return cues.scale(1 + b).shift(int(round(a_ms))).clip(0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="오디오 기반 자막 싱크 자동 보정")
+    parser.add_argument("--video", required=True, help="영상 파일 경로")
+    parser.add_argument("--sub", required=True, help="자막 파일 경로 (.smi/.srt/.vtt)")
+    parser.add_argument("--max-offset", type=float, default=120, help="탐색할 최대 오프셋(초, 기본: 120)")
+    parser.add_argument("--drift", action="store_true", help="선형 드리프트(배속 차이)도 추정")
+    parser.add_argument("--lang", help="오프셋 추정에 사용할 트랙 (기본: ko 또는 첫 번째 트랙)")
+    parser.add_argument("--dry-run", action="store_true", help="추정만 하고 파일은 쓰지 않음")
+    args = parser.parse_args()
+
+    sub_path = Path(args.sub)
+    tracks = read_file(sub_path)
+    if not tracks:
+        print("자막 큐를 찾을 수 없습니다.", file=sys.stderr)
+        sys.exit(1)
+    ref_lang = args.lang or ('ko' if 'ko' in tracks else next(iter(tracks)))
+    ref = tracks[ref_lang]
+    starts = np.frombuffer(ref.starts, dtype=np.int64).copy()
+    ends = np.frombuffer(ref.ends, dtype=np.int64).copy()
+
+    print(f"오디오 분석 중: {args.video}")
+    audio = audio_envelope(args.video)
+    print(f"  - 길이 {len(audio) * HOP_MS / 1000:.0f}초, 기준 트랙 {ref_lang} ({len(ref)} cues)")
+
+    offset_ms, confidence = estimate_offset(audio, starts, ends, args.max_offset)
+    print(f"  - 오프셋 {offset_ms / 1000:+.3f}초 (신뢰도 {confidence:.1f})")
+    a_ms, b = float(offset_ms), 0.0
+    if args.drift:
+        a_ms, b = estimate_drift(audio, starts, ends, offset_ms)
+        print(f"  - 드리프트 보정: t' = t * {1 + b:.6f} {a_ms / 1000:+.3f}초")
+    if confidence < 3:
+        print("  - 경고: 신뢰도가 낮습니다. 결과를 확인하세요.")
+
+    if args.dry_run:
+        return
+    for lang, cues in tracks.items():
+        out = output_path(sub_path, lang)
+        write_vtt(apply_correction(cues, a_ms, b), out)
+        print(f"  - 저장: {out}")
+
+
+if __name__ == '__main__':
+    main()
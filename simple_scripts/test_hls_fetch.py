@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+hls_fetch.py 테스트: 스레드로 띄운 로컬 HTTP 서버가 생성한 playlist/세그먼트를 제공.
+
+실행:
+  python -m unittest test_hls_fetch   (simple_scripts/ 에서)
+  또는 python -m pytest simple_scripts/test_hls_fetch.py
+
+ffmpeg 가 필요한 MP4 변환(end-to-end) 테스트는 ffmpeg 가 없으면 건너뜁니다.
+"""
+
+import os
+import re
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import hls_fetch
+
+SEGMENT_COUNT = 4
+
+
+def ts_segment(n: int) -> bytes:
+    """188바이트 TS 패킷 모양(0x47 sync byte)의 세그먼트. 세그먼트마다 크기/내용이 다름."""
+    packet = bytes([0x47, n]) + bytes([n]) * 186
+    return packet * (20 + n)
+
+
+class FixtureServer:
+    """경로 -> 바이트 응답. Range 요청 지원, flaky 경로는 첫 응답을 중간에 끊는다."""
+
+    def __init__(self, files: dict, flaky: tuple = ()):
+        self.files = files
+        self.flaky = set(flaky)
+        self.requests = []  # (path, Range 헤더)
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server.requests.append((self.path, self.headers.get('Range')))
+                data = server.files.get(self.path)
+                if data is None:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                status, body = 200, data
+                match = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range') or '')
+                if match:
+                    start = int(match.group(1))
+                    end = int(match.group(2)) if match.group(2) else len(data) - 1
+                    if start >= len(data):
+                        self.send_response(416)
+                        self.send_header('Content-Length', '0')
+                        self.end_headers()
+                        return
+                    status, body = 206, data[start:end + 1]
+
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(body)))
+                if status == 206:
+                    self.send_header('Content-Range', f'bytes {start}-{start + len(body) - 1}/{len(data)}')
+                self.end_headers()
+                if self.path in server.flaky:
+                    # 첫 응답은 절반만 보내고 연결을 끊음 -> 클라이언트가 Range 로 이어받아야 함
+                    server.flaky.discard(self.path)
+                    self.wfile.write(body[:len(body) // 2])
+                    self.wfile.flush()
+                    self.close_connection = True
+                    return
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base(self) -> str:
+        return f'http://127.0.0.1:{self.httpd.server_port}'
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def segmented_fixture() -> dict:
+    media = ['#EXTM3U', '#EXT-X-VERSION:3', '#EXT-X-TARGETDURATION:10', '#EXT-X-PLAYLIST-TYPE:VOD']
+    files = {}
+    for n in range(SEGMENT_COUNT):
+        files[f'/hls/show_1080p/segment_{n:03d}.ts'] = ts_segment(n)
+        media += ['#EXTINF:10.000000,', f'segment_{n:03d}.ts']
+    media.append('#EXT-X-ENDLIST')
+    files['/hls/show_1080p/video.m3u8'] = '\n'.join(media).encode()
+    files['/hls/show_720p/video.m3u8'] = b'#EXTM3U\n#EXTINF:10,\nmissing.ts\n#EXT-X-ENDLIST\n'
+    files['/hls/show/master.m3u8'] = (
+        '#EXTM3U\n'
+        '#EXT-X-STREAM-INF:BANDWIDTH=1000000,RESOLUTION=1280x720\n../show_720p/video.m3u8\n'
+        '#EXT-X-STREAM-INF:BANDWIDTH=5000000,RESOLUTION=1920x1080\n../show_1080p/video.m3u8\n'
+    ).encode()
+    return files
+
+
+def byterange_fixture() -> dict:
+    segments = [ts_segment(n) for n in range(SEGMENT_COUNT)]
+    media = ['#EXTM3U', '#EXT-X-VERSION:4', '#EXT-X-TARGETDURATION:10', '#EXT-X-PLAYLIST-TYPE:VOD']
+    offset = 0
+    for n, seg in enumerate(segments):
+        # 두 번째 세그먼트는 오프셋 생략(직전 범위 다음부터) 형식
+        media += ['#EXTINF:10.000000,',
+                  f'#EXT-X-BYTERANGE:{len(seg)}' + ('' if n == 1 else f'@{offset}'), 'video.ts']
+        offset += len(seg)
+    media.append('#EXT-X-ENDLIST')
+    return {
+        '/hls/single_1080p/video.m3u8': '\n'.join(media).encode(),
+        '/hls/single_1080p/video.ts': b''.join(segments),
+    }
+
+
+class HlsFetchTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix='hls_fetch_test_')
+        self.pool = hls_fetch.ConnectionPool()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _download_all(self, server, playlist_path):
+        media_url, text = hls_fetch.resolve_media_playlist(self.pool, server.base + playlist_path)
+        init_url, segments = hls_fetch.parse_media_playlist(media_url, text)
+        self.assertIsNone(init_url)
+        paths = []
+        for i, (url, byterange) in enumerate(segments):
+            dest = os.path.join(self.tmp, f'seg_{i:05d}.bin')
+            hls_fetch.download(self.pool, url, dest, retries=2, byterange=byterange)
+            paths.append(dest)
+        return media_url, paths
+
+    def test_master_selects_highest_bandwidth(self):
+        with FixtureServer(segmented_fixture()) as server:
+            media_url, text = hls_fetch.resolve_media_playlist(self.pool, server.base + '/hls/show/master.m3u8')
+        self.assertEqual(media_url, server.base + '/hls/show_1080p/video.m3u8')
+        self.assertIn('segment_000.ts', text)
+
+    def test_downloads_and_concatenates_segments(self):
+        with FixtureServer(segmented_fixture()) as server:
+            _, paths = self._download_all(server, '/hls/show/master.m3u8')
+        joined = os.path.join(self.tmp, 'joined.ts')
+        hls_fetch.concat_files(paths, joined)
+        with open(joined, 'rb') as f:
+            self.assertEqual(f.read(), b''.join(ts_segment(n) for n in range(SEGMENT_COUNT)))
+
+    def test_resumes_interrupted_segment_with_range(self):
+        flaky = '/hls/show_1080p/segment_002.ts'
+        with FixtureServer(segmented_fixture(), flaky=(flaky,)) as server:
+            _, paths = self._download_all(server, '/hls/show_1080p/video.m3u8')
+            ranges = [r for p, r in server.requests if p == flaky]
+        half = len(ts_segment(2)) // 2
+        self.assertEqual(ranges, [None, f'bytes={half}-'])
+        with open(paths[2], 'rb') as f:
+            self.assertEqual(f.read(), ts_segment(2))
+        self.assertFalse(os.path.exists(paths[2] + '.part'))
+
+    def test_resumes_existing_part_file(self):
+        seg = ts_segment(1)
+        dest = os.path.join(self.tmp, 'seg.bin')
+        with open(dest + '.part', 'wb') as f:
+            f.write(seg[:100])
+        with FixtureServer(segmented_fixture()) as server:
+            hls_fetch.download(self.pool, server.base + '/hls/show_1080p/segment_001.ts', dest, retries=1)
+            self.assertEqual(server.requests[-1][1], 'bytes=100-')
+        with open(dest, 'rb') as f:
+            self.assertEqual(f.read(), seg)
+
+    def test_byterange_playlist(self):
+        with FixtureServer(byterange_fixture()) as server:
+            _, paths = self._download_all(server, '/hls/single_1080p/video.m3u8')
+            ranges = [r for p, r in server.requests if p.endswith('video.ts')]
+        self.assertEqual(len(ranges), SEGMENT_COUNT)
+        self.assertTrue(all(r and r.startswith('bytes=') for r in ranges))
+        for n, path in enumerate(paths):
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), ts_segment(n))
+
+    def test_encrypted_playlist_is_detected(self):
+        text = '#EXTM3U\n#EXT-X-KEY:METHOD=AES-128,URI="key.bin"\n#EXTINF:10,\nseg.ts\n#EXT-X-ENDLIST\n'
+        with self.assertRaises(hls_fetch.EncryptedPlaylist):
+            hls_fetch.parse_media_playlist('http://example/video.m3u8', text)
+
+    def test_failed_fetch_removes_work_dir(self):
+        output = os.path.join(self.tmp, 'out', 'trailer.mp4')
+        with FixtureServer(segmented_fixture()) as server:
+            with self.assertRaises(hls_fetch.FetchError):
+                hls_fetch.fetch(server.base + '/hls/show_720p/video.m3u8', output, workers=2, retries=0)
+        self.assertFalse(os.path.exists(output + '.parts'))
+        self.assertFalse(os.path.exists(output))
+
+    @unittest.skipUnless(shutil.which('ffmpeg'), 'ffmpeg 가 필요합니다')
+    def test_fetch_end_to_end(self):
+        # ffmpeg 로 실제 TS 세그먼트를 만들어 서버에 올린 뒤 MP4 로 받기
+        src = os.path.join(self.tmp, 'src')
+        os.makedirs(src)
+        hls_fetch.subprocess.run([
+            'ffmpeg', '-v', 'error', '-f', 'lavfi', '-i', 'testsrc=duration=4:size=160x120:rate=10',
+            '-c:v', 'libx264', '-g', '10', '-f', 'hls', '-hls_time', '1', '-hls_playlist_type', 'vod',
+            os.path.join(src, 'video.m3u8')
+        ], check=True)
+        files = {}
+        for name in os.listdir(src):
+            with open(os.path.join(src, name), 'rb') as f:
+                files[f'/hls/e2e_1080p/{name}'] = f.read()
+        output = os.path.join(self.tmp, 'e2e.mp4')
+        with FixtureServer(files) as server:
+            hls_fetch.fetch(server.base + '/hls/e2e_1080p/video.m3u8', output, workers=2)
+        self.assertGreater(os.path.getsize(output), 0)
+        self.assertFalse(os.path.exists(output + '.parts'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,21 +7,21 @@ import argparse
 import math
 import shutil
 
+from cuestore import read_vtt, write_vtt
+import hls_single_file
+
 def get_video_info(hls_folder):
     """HLS 세그먼트에서 비디오 시작 시간과 전체 길이를 가져옵니다."""
     start_pts = 0
     duration = 7200  # 기본값
 
     try:
-        segment_0 = os.path.join(hls_folder, 'segment_000.ts')
-        if os.path.exists(segment_0):
-            # ffprobe를 사용하여 시작 시간(PTS)을 가져옵니다.
-            cmd_start = ['ffprobe', '-v', 'error', '-show_entries', 'format=start_time', '-of', 'default=noprint_wrappers=1:nokey=1', segment_0]
-            result_start = subprocess.run(cmd_start, capture_output=True, text=True, check=True)
-            start_time = float(result_start.stdout.strip())
-            start_pts = int(start_time * 90000) # MPEG-TS 타임스케일
+        # 첫 세그먼트(segment_000.ts 또는 단일 파일 모드의 미디어 파일)의 시작 시간(PTS)
+        probed = hls_single_file.probe_start_pts(hls_folder)
+        if probed is not None:
+            start_pts = probed
         else:
-            print(f"경고: {segment_0} 파일을 찾을 수 없어 정확한 싱크를 맞출 수 없습니다.")
+            print(f"경고: {hls_folder} 에서 첫 세그먼트를 찾을 수 없어 정확한 싱크를 맞출 수 없습니다.")
 
         video_playlist = os.path.join(hls_folder, 'video.m3u8')
         if os.path.exists(video_playlist):
@@ -64,19 +64,10 @@ def update_subtitles(vtt_file, hls_folder, lang_code, lang_name):
     target_vtt_path = os.path.join(hls_folder, subs_vtt_name)
 
     try:
-        with open(vtt_file, 'r', encoding='utf-8') as f:
-            vtt_content = f.read()
-        
-        lines = vtt_content.split('\n')
-        # 기존 타임스탬프 맵 제거
-        lines = [l for l in lines if not l.startswith('X-TIMESTAMP-MAP')]
-        # 새로운 타임스탬프 맵 삽입
-        if lines and lines[0].strip().startswith('WEBVTT'):
-            lines.insert(1, f"X-TIMESTAMP-MAP=MPEGTS:{start_pts},LOCAL:00:00:00.000")
-        
-        with open(target_vtt_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(lines))
-        print(f"'{target_vtt_path}' 파일 생성 완료.")
+        # 기존 타임스탬프 맵은 새 값으로 교체됩니다.
+        cues = read_vtt(vtt_file)
+        write_vtt(cues, target_vtt_path, timestamp_map=start_pts)
+        print(f"'{target_vtt_path}' 파일 생성 완료. ({len(cues)} cues)")
 
     except Exception as e:
         print(f"VTT 파일 처리 중 오류 발생: {e}")
@@ -0,0 +1,76 @@
+const UserActionLog = require('../models/UserActionLog');
+const UserActionDaily = require('../models/UserActionDaily');
+
+// UserActionLog 배치 저장 버퍼
+// 핸들러는 log() 만 호출하고 기다리지 않는다. 모인 로그는 FLUSH_INTERVAL_MS 마다 또는 MAX_BATCH 개가 차면
+// insertMany 한 번으로 저장하고, 같은 배치로 일별 집계(UserActionDaily)도 $inc 로 갱신한다.
+const FLUSH_INTERVAL_MS = parseInt(process.env.USER_ACTION_LOG_FLUSH_MS) || 3000;
+const MAX_BATCH = 500;
+
+let queue = [];
+let flushing = null;
+
+const dayOf = (date) => {
+    const pad = (n) => String(n).padStart(2, '0');
+    return `${date.getFullYear()}-${pad(date.getMonth() + 1)}-${pad(date.getDate())}`;
+};
+
+function log(entry) {
+    queue.push({ ...entry, timestamp: entry.timestamp || new Date() });
+    if (queue.length >= MAX_BATCH) {
+        flush();
+    }
+}
+
+async function writeBatch(batch) {
+    // 집계는 실제로 저장된 문서만 센다 (거부된 로그가 일별 집계에 잡히지 않도록)
+    let inserted;
+    try {
+        // ordered: false → 검증에 실패한 항목(예: action 없는 클라이언트 로그)만 건너뛰고 나머지는 저장
+        // 검증에 실패한 항목은 반환값에서 빠진다
+        inserted = await UserActionLog.insertMany(batch, { ordered: false });
+    } catch (err) {
+        // 쓰기 오류(중복 키 등)가 나도 나머지는 저장됨 → 저장된 문서는 err.insertedDocs 에 있음
+        inserted = err.insertedDocs || [];
+        console.error(`[UserActionLog] insertMany failed (${batch.length - inserted.length}/${batch.length} entries not saved):`, err.message);
+    }
+    if (inserted.length === 0) return;
+
+    const counts = new Map();
+    for (const entry of inserted) {
+        const key = `${dayOf(entry.timestamp)}|${entry.action}`;
+        counts.set(key, (counts.get(key) || 0) + 1);
+    }
+    const ops = Array.from(counts, ([key, count]) => {
+        const [day, action] = key.split('|');
+        return {
+            updateOne: {
+                filter: { day, action },
+                update: { $inc: { count } },
+                upsert: true
+            }
+        };
+    });
+    try {
+        await UserActionDaily.bulkWrite(ops, { ordered: false });
+    } catch (err) {
+        console.error('[UserActionDaily] rollup failed:', err.message);
+    }
+}
+
+function flush() {
+    if (flushing) return flushing.then(flush);
+    if (queue.length === 0) return Promise.resolve();
+
+    const batch = queue;
+    queue = [];
+    flushing = writeBatch(batch).finally(() => {
+        flushing = null;
+    });
+    return flushing;
+}
+
+const timer = setInterval(flush, FLUSH_INTERVAL_MS);
+timer.unref();
+
+module.exports = { log, flush };
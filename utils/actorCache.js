@@ -0,0 +1,65 @@
+const crypto = require('crypto');
+const Actor = require('../models/Actor');
+const Movie = require('../models/Movie');
+
+// GET /api/actors 응답 캐시
+// 한글 이름(ko-KR) → 그 외(en) 순으로 정렬한 목록을 한 번만 만들어 JSON 문자열과 ETag 로 보관한다.
+// 배우 추가 시 invalidate(), 영화 등록/수정/삭제 시 invalidateCounts() 로 비운다.
+const koCollator = new Intl.Collator('ko-KR');
+const enCollator = new Intl.Collator('en');
+const isKorean = (name) => /[\u3131-\u318E\uAC00-\uD7A3]/.test(name);
+
+let listEntry = null;
+let countsEntry = null;
+
+const toEntry = (data) => {
+    const body = JSON.stringify(data);
+    const etag = `"${crypto.createHash('sha1').update(body).digest('base64url')}"`;
+    return { body, etag };
+};
+
+async function buildList() {
+    const actors = await Actor.find().lean();
+    const koreanActors = actors.filter(a => isKorean(a.name)).sort((a, b) => koCollator.compare(a.name, b.name));
+    const englishActors = actors.filter(a => !isKorean(a.name)).sort((a, b) => enCollator.compare(a.name, b.name));
+    return [...koreanActors, ...englishActors];
+}
+
+async function buildListWithCounts() {
+    const [actors, counts] = await Promise.all([
+        getList().then(entry => JSON.parse(entry.body)),
+        Movie.aggregate([{ $group: { _id: '$actor', count: { $sum: 1 } } }])
+    ]);
+    const countByName = new Map(counts.map(c => [c._id, c.count]));
+    return actors.map(a => ({ ...a, movieCount: countByName.get(a.name) || 0 }));
+}
+
+// 동시에 들어온 요청은 같은 Promise 를 공유 (실패하면 다음 요청에서 다시 생성)
+function getList() {
+    if (!listEntry) {
+        const entry = buildList().then(toEntry);
+        entry.catch(() => { if (listEntry === entry) listEntry = null; });
+        listEntry = entry;
+    }
+    return listEntry;
+}
+
+function getListWithCounts() {
+    if (!countsEntry) {
+        const entry = buildListWithCounts().then(toEntry);
+        entry.catch(() => { if (countsEntry === entry) countsEntry = null; });
+        countsEntry = entry;
+    }
+    return countsEntry;
+}
+
+function invalidate() {
+    listEntry = null;
+    countsEntry = null;
+}
+
+function invalidateCounts() {
+    countsEntry = null;
+}
+
+module.exports = { getList, getListWithCounts, invalidate, invalidateCounts };
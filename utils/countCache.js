@@ -0,0 +1,36 @@
+// 목록 필터 조합별 totalCount 캐시
+// countDocuments 는 카탈로그가 커질수록 느려지므로 결과를 메모리에 보관하고,
+// 영화 등록/수정/삭제 시 invalidate() 로 전부 비운다. (TTL 은 다른 경로로 DB가 바뀐 경우 대비)
+// 키에 검색어(품번/배우)가 들어가 타이핑할 때마다 항목이 생기므로 최근 사용 순(LRU)으로 개수를 제한한다.
+const TTL_MS = parseInt(process.env.COUNT_CACHE_TTL_MS) || 10 * 60 * 1000;
+const MAX_ENTRIES = parseInt(process.env.COUNT_CACHE_MAX) || 500;
+
+const cache = new Map();
+// invalidate() 마다 증가. 계산을 시작한 뒤 invalidate 됐으면 결과가 이미 오래된 값이므로 저장하지 않음
+let generation = 0;
+
+async function getCount(key, compute) {
+    const hit = cache.get(key);
+    if (hit && Date.now() - hit.at < TTL_MS) {
+        cache.delete(key);
+        cache.set(key, hit);
+        return hit.value;
+    }
+    const startedGeneration = generation;
+    const value = await compute();
+    if (startedGeneration === generation) {
+        cache.delete(key);
+        cache.set(key, { value, at: Date.now() });
+        while (cache.size > MAX_ENTRIES) {
+            cache.delete(cache.keys().next().value);
+        }
+    }
+    return value;
+}
+
+function invalidate() {
+    generation++;
+    cache.clear();
+}
+
+module.exports = { getCount, invalidate };
@@ -16,17 +16,6 @@ const downloadContents = async (serialNumber, url) => {
     return filePath.replace(/\\/g, '/');
 }
 
-function updateM3U8Paths(m3u8FilePath, baseUrl) {
-    try {
-      const content = fs.readFileSync(m3u8FilePath, 'utf-8');
-      const updatedContent = content.replace(/^(?!#)(.+\.ts)$/gm, `${baseUrl}$1`);
-      fs.writeFileSync(m3u8FilePath, updatedContent, 'utf-8');
-      console.log(`Updated .m3u8 file with Base URL: ${baseUrl}`);
-    } catch (err) {
-      console.error(`Failed to update .m3u8 file: ${err.message}`);
-    }
-}
-
 function transformSubtituteTrailerUrl(inputUrl, serialNumber) {
   try {
     const url = new URL(inputUrl);
@@ -106,7 +95,6 @@ async function resolveAvailableTrailerUrlFromPlaylist(playlistUrl, originalFileN
 
 module.exports = {
     downloadContents,
-    updateM3U8Paths,
     transformSubtituteTrailerUrl,
     resolveAvailableTrailerUrlFromPlaylist
 };
\ No newline at end of file
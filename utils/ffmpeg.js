@@ -1,71 +1,151 @@
-const ffmpeg = require('fluent-ffmpeg');
-const axios = require('axios');
-const fs_extra = require('fs-extra');
 const path = require('path');
 const fs = require('fs');
-const { exec, execSync } = require('child_process');
-const { updateM3U8Paths } = require('./downloader');
+const { exec, execFile } = require('child_process');
 
-async function handleHLSDownload(m3u8Url, outputFilePath) {
-    try {
-      const response = await axios.get(m3u8Url);
-      const m3u8Content = response.data;
-  
-      const tempM3U8Path = path.join(__dirname, '..', 'temp.m3u8');
-      await fs_extra.outputFile(tempM3U8Path, m3u8Content);
-
-      const absoluteOutputPath = path.resolve(__dirname, '..', outputFilePath);
+// 세그먼트 동시 다운로드 + 재인코딩 없는 MP4 변환은 simple_scripts/hls_fetch.py 가 담당.
+// 작업 폴더가 출력 파일별로 분리되므로 동시 등록 시에도 충돌하지 않음.
+const PYTHON_PATH = process.env.PYTHON_PATH || (process.platform === 'win32' ? 'python' : 'python3');
+const HLS_FETCH_SCRIPT = path.join(__dirname, '..', 'simple_scripts', 'hls_fetch.py');
 
-     const baseUrl = m3u8Url.substring(0, m3u8Url.lastIndexOf('/') + 1);
+function handleHLSDownload(m3u8Url, outputFilePath) {
+    const absoluteOutputPath = path.resolve(__dirname, '..', outputFilePath);
 
-     updateM3U8Paths(tempM3U8Path,baseUrl);
-  
-      return new Promise((resolve, reject) => {
-        ffmpeg(tempM3U8Path)
-          .inputOptions([
-            '-protocol_whitelist', 'file,http,https,tcp,tls',
-          ])
-          .outputOptions([
-            '-c:v', 'libx264',
-            '-c:a', 'aac',
-            '-strict', 'experimental',
-            '-hls_base_url', baseUrl,
-          ])
-          .on('start', () => console.log('HLS to MP4 conversion started'))
-          .on('end', () => {
-            console.log('HLS to MP4 conversion completed');
-            fs.unlinkSync(tempM3U8Path);
+    return new Promise((resolve, reject) => {
+        console.log('HLS to MP4 download started');
+        execFile(PYTHON_PATH, [HLS_FETCH_SCRIPT, m3u8Url, absoluteOutputPath], (err, stdout, stderr) => {
+            if (stdout) console.log(stdout.trim());
+            if (err) {
+                console.error('Error handling HLS download:', stderr || err);
+                return reject(err);
+            }
+            console.log('HLS to MP4 download completed');
             resolve(absoluteOutputPath);
-          })
-          .on('error', (err) => {
-            console.error('Error during conversion:', err);
-            reject(err);
-          })
-          .on('stderr', (stderrLine) => {
-            console.log('FFmpeg stderr:', stderrLine);
-          })
-          .save(absoluteOutputPath);
-      });
-    } catch (err) {
-      console.error('Error handling HLS download:', err);
-      throw err;
+        });
+    });
+}
+
+// ffprobe 결과 캐시 (경로 + 크기 + 수정시각 기준). 같은 원본은 한 번만 probe 하고
+// 동시에 들어온 요청은 같은 Promise 를 공유한다. execFile 이라 이벤트 루프를 막지 않음.
+// 트랜스코딩이 끝나면 원본이 지워지므로 오래 쓰이지 않은 항목부터 버림 (Map 삽입 순서 = LRU)
+const PROBE_CACHE_MAX = 200;
+const probeCache = new Map();
+
+function probeMedia(filePath) {
+    return fs.promises.stat(filePath).then(stat => {
+        const key = `${path.resolve(filePath)}:${stat.size}:${stat.mtimeMs}`;
+        if (probeCache.has(key)) {
+            const cached = probeCache.get(key);
+            probeCache.delete(key);
+            probeCache.set(key, cached);
+        } else {
+            const probe = new Promise((resolve, reject) => {
+                execFile('ffprobe', [
+                    '-v', 'error',
+                    '-show_entries', 'format=duration,start_time:stream=index,codec_type,codec_name,channels:stream_tags=language,title',
+                    '-of', 'json',
+                    filePath
+                ], (err, stdout) => {
+                    if (err) return reject(err);
+                    try {
+                        const info = JSON.parse(stdout);
+                        const format = info.format || {};
+                        const audioStreams = (info.streams || [])
+                            .filter(s => s.codec_type === 'audio')
+                            .map(s => ({
+                                index: s.index,
+                                codec: s.codec_name,
+                                channels: s.channels || 2,
+                                language: (s.tags && s.tags.language) || 'und',
+                                title: (s.tags && s.tags.title) || ''
+                            }));
+                        resolve({
+                            duration: parseFloat(format.duration) || 0,
+                            startTime: parseFloat(format.start_time) || 0,
+                            audioStreams
+                        });
+                    } catch (parseErr) {
+                        reject(parseErr);
+                    }
+                });
+            });
+            probe.catch(() => probeCache.delete(key));
+            probeCache.set(key, probe);
+            while (probeCache.size > PROBE_CACHE_MAX) {
+                probeCache.delete(probeCache.keys().next().value);
+            }
+        }
+        return probeCache.get(key);
+    });
+}
+
+// 단일 파일(byte-range) 모드: 세그먼트 파일 대신 playlist 옆에 <이름>.ts 하나로 출력 (#EXT-X-BYTERANGE)
+function singleFileOptions(playlistPath) {
+    const mediaPath = playlistPath.replace(/\.m3u8$/, '.ts');
+    return ['-hls_flags', 'single_file', '-hls_segment_filename', mediaPath];
+}
+
+// 첫 세그먼트가 들어있는 파일. 단일 파일 모드면 미디어 파일 자체가 첫 세그먼트로 시작한다.
+function firstSegmentPath(hlsPath) {
+    const candidates = ['segment_000.ts', 'video.ts', 'master.ts', 'audio.ts'];
+    for (const name of candidates) {
+        const filePath = path.join(hlsPath, name);
+        try {
+            if (fs.statSync(filePath).size > 0) return filePath;
+        } catch {
+            // 없으면 다음 후보
+        }
+    }
+    return null;
+}
+
+// 완료된 playlist 의 세그먼트 URI 에 인코딩마다 다른 ?v= 를 붙임
+// 같은 폴더를 다시 만들어도 URL 이 바뀌므로 middleware/hlsStatic.js 가 immutable 로 캐시할 수 있다
+function versionSegmentUris(content, version) {
+    return content.split('\n').map(line => {
+        const uri = line.trim();
+        if (!uri || uri.startsWith('#') || uri.includes('?')) return line;
+        return `${uri}?v=${version}`;
+    }).join('\n');
+}
+
+// 트랜스코딩이 끝난 EVENT playlist 를 VOD 로 바꾸고 ENDLIST 가 없으면 추가, 세그먼트 URI 에 버전 추가
+async function finalizePlaylist(playlistPath) {
+    let content;
+    try {
+        content = await fs.promises.readFile(playlistPath, 'utf8');
+    } catch {
+        return false;
+    }
+    if (!content.includes('#EXTINF')) return false;
+    let updated = versionSegmentUris(content, Date.now().toString(36));
+    updated = updated.replace('#EXT-X-PLAYLIST-TYPE:EVENT', '#EXT-X-PLAYLIST-TYPE:VOD');
+    if (!updated.includes('#EXT-X-PLAYLIST-TYPE')) {
+        updated = updated.replace('#EXTM3U\n', '#EXTM3U\n#EXT-X-PLAYLIST-TYPE:VOD\n');
+    }
+    if (!updated.includes('#EXT-X-ENDLIST')) {
+        updated = updated.replace(/\n*$/, '\n#EXT-X-ENDLIST\n');
     }
+    if (updated === content) return false;
+    const tmpPath = `${playlistPath}.tmp`;
+    await fs.promises.writeFile(tmpPath, updated, 'utf8');
+    await fs.promises.rename(tmpPath, playlistPath);
+    return true;
 }
 
 function monitorAndFixSubtitles(hlsPath) {
-    const segment0Path = path.join(hlsPath, 'segment_000.ts');
     let attempts = 0;
     const maxAttempts = 300;
 
     const checkInterval = setInterval(() => {
         attempts++;
         if (attempts > maxAttempts) {
-            console.log('[AirPlay Sync] Timeout waiting for segment_000.ts');
+            console.log('[AirPlay Sync] Timeout waiting for the first segment');
             clearInterval(checkInterval);
             return;
         }
 
-        if (fs.existsSync(segment0Path)) {
+        const segment0Path = firstSegmentPath(hlsPath);
+        if (segment0Path) {
             exec(`ffprobe -v error -show_entries format=start_time -of default=noprint_wrappers=1:nokey=1 "${segment0Path}"`, (error, stdout) => {
                 if (!error && stdout) {
                     const startTime = parseFloat(stdout.trim());
@@ -101,4 +181,11 @@ function monitorAndFixSubtitles(hlsPath) {
     }, 100);
 }
 
-module.exports = { handleHLSDownload, monitorAndFixSubtitles };
\ No newline at end of file
+module.exports = {
+    handleHLSDownload,
+    monitorAndFixSubtitles,
+    probeMedia,
+    singleFileOptions,
+    firstSegmentPath,
+    finalizePlaylist
+};
\ No newline at end of file
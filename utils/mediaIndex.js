@@ -0,0 +1,88 @@
+// simple_scripts/media_index.py 가 만든 미디어 인덱스(media_index.json) 조회
+// 폴더 mtime 이 인덱스에 기록된 값보다 새롭지 않을 때만 인덱스를 믿고,
+// 인덱스가 없거나 폴더가 바뀌었으면 기존처럼 existsSync 로 확인한다.
+const fs = require('fs');
+const path = require('path');
+
+const ROOT_DIR = path.join(__dirname, '..');
+const INDEX_PATH = process.env.MEDIA_INDEX_PATH || path.join(ROOT_DIR, 'media_index.json');
+// 인덱스 파일 변경 여부는 이 간격마다 한 번만 확인
+const INDEX_CHECK_MS = 1000;
+
+// media_index.py 의 LANG_CODES 와 같은 규칙: name.vtt -> ko, name.<lang>.vtt -> lang
+const SUBTITLE_LANGS = ['en', 'ja', 'zh'];
+
+let index = null;
+let indexMtimeMs = 0;
+let checkedAt = 0;
+
+function loadIndex() {
+    const now = Date.now();
+    if (now - checkedAt < INDEX_CHECK_MS) return index;
+    checkedAt = now;
+    try {
+        const stat = fs.statSync(INDEX_PATH);
+        if (stat.mtimeMs !== indexMtimeMs) {
+            index = JSON.parse(fs.readFileSync(INDEX_PATH, 'utf8'));
+            indexMtimeMs = stat.mtimeMs;
+        }
+    } catch (err) {
+        index = null;
+        indexMtimeMs = 0;
+    }
+    return index;
+}
+
+// 프로젝트 루트 기준 상대 경로 ('uploads/a.mp4', 'uploads\\a.mp4', 절대 경로 모두 허용)
+function toRelative(p) {
+    return path.relative(ROOT_DIR, path.resolve(ROOT_DIR, p)).split(path.sep).join('/');
+}
+
+// 인덱스를 믿을 수 있는 폴더면 그 폴더의 files 맵, 아니면 null
+function trustedFiles(relDir) {
+    const data = loadIndex();
+    const entry = data && data.dirs && data.dirs[relDir];
+    if (!entry || !entry.files) return null;
+    try {
+        const stat = fs.statSync(path.join(ROOT_DIR, relDir));
+        // Python st_mtime(초, float)과 비교하므로 1ms 오차 허용
+        if (stat.mtimeMs > entry.mtime * 1000 + 1) return null;
+    } catch (err) {
+        return null;
+    }
+    return entry.files;
+}
+
+// 미디어 파일(영상/자막/playlist) 존재 여부
+function exists(filePath) {
+    const rel = toRelative(filePath);
+    const files = trustedFiles(path.posix.dirname(rel));
+    if (files) {
+        return Object.prototype.hasOwnProperty.call(files, path.posix.basename(rel));
+    }
+    return fs.existsSync(path.join(ROOT_DIR, rel));
+}
+
+// 영상 옆의 자막(.vtt) 목록: { ko: 'uploads/a.vtt', en: 'uploads/a.en.vtt', ... }
+// 반환 경로는 입력(videoPath)과 같은 기준(폴더 표기)을 유지한다.
+function findSubtitles(videoPath) {
+    const ext = path.extname(videoPath);
+    const dir = path.dirname(videoPath);
+    const base = path.basename(videoPath, ext);
+    const candidates = { ko: path.join(dir, `${base}.vtt`) };
+    SUBTITLE_LANGS.forEach(lang => {
+        candidates[lang] = path.join(dir, `${base}.${lang}.vtt`);
+    });
+
+    const files = trustedFiles(toRelative(dir));
+    const found = {};
+    for (const [lang, candidate] of Object.entries(candidates)) {
+        const present = files
+            ? Object.prototype.hasOwnProperty.call(files, path.basename(candidate))
+            : fs.existsSync(path.resolve(ROOT_DIR, candidate));
+        if (present) found[lang] = candidate;
+    }
+    return found;
+}
+
+module.exports = { exists, findSubtitles, SUBTITLE_LANGS };
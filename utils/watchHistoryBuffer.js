@@ -0,0 +1,65 @@
+const WatchHistory = require('../models/WatchHistory');
+
+// 재생 위치 write-behind 버퍼
+// 플레이어의 진행 상황 ping 마다 DB에 쓰지 않고 (userId, movieId, episodeIndex)별 최신 값만 메모리에 보관하다가
+// FLUSH_INTERVAL_MS 마다 bulkWrite 한 번으로 저장한다. 조회는 buffer → DB 순서로 읽으므로 이어보기 위치가 뒤처지지 않는다.
+const FLUSH_INTERVAL_MS = parseInt(process.env.WATCH_HISTORY_FLUSH_MS) || 5000;
+
+let pending = new Map();
+let inflight = new Map();
+let flushing = null;
+
+const keyOf = (userId, movieId, episodeIndex) => `${userId}:${movieId}:${episodeIndex}`;
+
+function record(userId, movieId, episodeIndex, lastWatchedTime) {
+    pending.set(keyOf(userId, movieId, episodeIndex), {
+        userId,
+        movieId,
+        episodeIndex,
+        lastWatchedTime,
+        updatedAt: new Date()
+    });
+}
+
+function peek(userId, movieId, episodeIndex) {
+    const key = keyOf(userId, movieId, episodeIndex);
+    return pending.get(key) || inflight.get(key);
+}
+
+async function writeBatch(batch) {
+    const ops = Array.from(batch.values()).map(entry => ({
+        updateOne: {
+            filter: { userId: entry.userId, movieId: entry.movieId, episodeIndex: entry.episodeIndex },
+            update: { $set: { lastWatchedTime: entry.lastWatchedTime, updatedAt: entry.updatedAt } },
+            upsert: true
+        }
+    }));
+    try {
+        await WatchHistory.bulkWrite(ops, { ordered: false });
+    } catch (err) {
+        console.error(`[WatchHistory] bulkWrite failed (${ops.length} entries), will retry:`, err.message);
+        // 실패한 항목은 그 사이 새 값이 들어오지 않았다면 다음 flush 에서 다시 시도
+        for (const [key, entry] of batch) {
+            if (!pending.has(key)) pending.set(key, entry);
+        }
+    }
+}
+
+function flush() {
+    // 진행 중인 flush 가 있으면 끝난 뒤 그 사이 쌓인 값까지 저장
+    if (flushing) return flushing.then(flush);
+    if (pending.size === 0) return Promise.resolve();
+
+    inflight = pending;
+    pending = new Map();
+    flushing = writeBatch(inflight).finally(() => {
+        inflight = new Map();
+        flushing = null;
+    });
+    return flushing;
+}
+
+const timer = setInterval(flush, FLUSH_INTERVAL_MS);
+timer.unref();
+
+module.exports = { record, peek, flush };